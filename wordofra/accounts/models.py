@@ -42,6 +42,11 @@ class CustomUser(AbstractUser):
                 self.reset_failed_login()
         return False
 
+    @property
+    def display_name(self):
+        """The name shown next to public content; never the email address."""
+        return self.get_full_name() or self.username
+
     def __str__(self):
         return self.email
 
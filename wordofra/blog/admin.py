@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django import forms
 from tinymce.widgets import TinyMCE
+from . import moderation
 from .models import Post, Category, Tag, Quote, Comment
 
 
@@ -28,19 +29,24 @@ class QuoteAdmin(admin.ModelAdmin):
 
 # Admin class for Comment model
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('user', 'post_or_quote', 'created_at', 'is_approved')
-    list_filter = ('is_approved',)
+    list_display = ('user', 'post_or_quote', 'created_at', 'is_approved', 'is_rejected')
+    list_filter = ('is_approved', 'is_rejected')
+    list_select_related = ('user', 'post', 'quote')
     search_fields = ('user__username', 'content')
-    actions = ['approve_comments']
+    actions = ['approve_comments', 'reject_comments']
 
     def post_or_quote(self, obj):
         return obj.post if obj.post else obj.quote
     post_or_quote.short_description = 'Post/Quote'
 
     def approve_comments(self, request, queryset):
-        queryset.update(is_approved=True)
+        moderation.approve(queryset.values('pk'))
     approve_comments.short_description = "Approve selected comments"
 
+    def reject_comments(self, request, queryset):
+        moderation.reject(queryset.values('pk'))
+    reject_comments.short_description = "Reject selected comments"
+
 # Register models with their respective admin classes
 admin.site.register(Category)
 admin.site.register(Tag, TagAdmin)
@@ -0,0 +1,178 @@
+"""
+Read-through response cache for the read-only blog API.
+
+Cached responses are keyed on the view, the normalized request parameters,
+the visibility class of the caller and the current *generation* of every
+model scope the view depends on. Signal handlers in ``blog.signals`` bump a
+scope's generation whenever one of its rows changes, which makes every key
+built from the old generation unreachable without scanning or deleting keys;
+stale entries simply expire. Each bump also records when the scope last
+changed, which list endpoints send as Last-Modified (see blog.conditional).
+
+Generations only reach every worker through a shared cache (``REDIS_URL``).
+With the per-process default, a worker never sees bumps made by another
+worker or by a management command, so generations also expire after
+``BLOG_GENERATION_TIMEOUT`` seconds; a fresh generation invalidates
+everything built from the old one.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+GENERATION_KEY = 'blog:generation:{scope}'
+CHANGED_KEY = 'blog:generation-changed:{scope}'
+RESPONSE_KEY = 'blog:response:{digest}'
+STATS_KEY = 'blog:response-cache:{outcome}'
+CACHE_HEADER = 'X-Cache'
+# Response headers stored with the cached data and replayed on hits
+STORED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_response_cache_timeout():
+    return getattr(settings, 'BLOG_RESPONSE_CACHE_TIMEOUT', 60 * 15)
+
+
+def get_generation_timeout():
+    return getattr(settings, 'BLOG_GENERATION_TIMEOUT', 60 * 60)
+
+
+def _new_generation():
+    # Seeded from the clock so an evicted counter never restarts at a value
+    # that old cache keys were built from.
+    return time.time_ns()
+
+
+def get_generations(scopes):
+    """Return the current generation of each scope, creating missing ones."""
+    keys = {scope: GENERATION_KEY.format(scope=scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    generations = {}
+    for scope, key in keys.items():
+        if key not in found:
+            cache.add(key, _new_generation(), timeout=get_generation_timeout())
+            found[key] = cache.get(key)
+        generations[scope] = found[key]
+    return generations
+
+
+def bump_generation(*scopes):
+    """Invalidate every cached response that depends on any of ``scopes``."""
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_generation(), timeout=get_generation_timeout())
+    now = int(time.time())
+    cache.set_many({CHANGED_KEY.format(scope=scope): now for scope in scopes}, timeout=get_generation_timeout())
+
+
+def get_last_changed(scopes):
+    """When any of ``scopes`` last had its generation bumped, as a UTC datetime (None without scopes)."""
+    keys = [CHANGED_KEY.format(scope=scope) for scope in scopes]
+    if not keys:
+        return None
+    found = cache.get_many(keys)
+    now = int(time.time())
+    for key in keys:
+        if key not in found:
+            # Unknown, e.g. evicted: claiming a change now only costs clients a refetch
+            cache.add(key, now, timeout=get_generation_timeout())
+            found[key] = cache.get(key) or now
+    return datetime.fromtimestamp(max(found.values()), tz=timezone.utc)
+
+
+def _count(outcome):
+    key = STATS_KEY.format(outcome=outcome)
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
+
+
+def cache_stats():
+    counts = cache.get_many([STATS_KEY.format(outcome=outcome) for outcome in ('hit', 'miss')])
+    hits = counts.get(STATS_KEY.format(outcome='hit'), 0)
+    misses = counts.get(STATS_KEY.format(outcome='miss'), 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+
+
+def reset_cache_stats():
+    cache.delete_many([STATS_KEY.format(outcome=outcome) for outcome in ('hit', 'miss')])
+
+
+def get_visibility(request):
+    """Anonymous and authenticated users see different sets of posts."""
+    return 'auth' if request.user and request.user.is_authenticated else 'anon'
+
+
+def response_cache_key(view, request, scopes):
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ''
+    )
+    generations = get_generations(scopes)
+    parts = [
+        view.__class__.__name__,
+        view.action or '',
+        repr(sorted(view.kwargs.items())),
+        repr(params),
+        repr(sorted(generations.items())),
+        get_visibility(request),
+        request.accepted_renderer.format,
+        request.get_host(),  # Pagination links are absolute URLs
+    ]
+    digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    return RESPONSE_KEY.format(digest=digest)
+
+
+class CachedResponseMixin:
+    """
+    Serves ``list`` and ``retrieve`` from the response cache. Set
+    ``cache_scopes`` to the model scopes (model names) the output depends on.
+
+    Validator headers are cached with the data, so a conditional request that
+    hits the cache is answered without touching the database.
+    """
+    cache_scopes = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        timeout = get_response_cache_timeout()
+        if not timeout:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache_key(self, request, self.cache_scopes)
+        cached = cache.get(key)
+        if cached is not None:
+            _count('hit')
+            headers = cached['headers']
+            response = get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+            ) or Response(cached['data'])
+            for name, value in headers.items():
+                response[name] = value
+            response[CACHE_HEADER] = 'HIT'
+            return response
+
+        _count('miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+            cache.set(key, {'data': response.data, 'headers': headers}, timeout)
+        response[CACHE_HEADER] = 'MISS'
+        return response
@@ -0,0 +1,67 @@
+"""
+Per-post comment data for post lists, loaded for a whole page at once.
+
+``attach`` sets ``approved_comment_count`` on every post with one grouped
+``COUNT`` query, and, when asked, ``latest_comments`` (the newest
+``LATEST_COMMENTS`` approved comments of each post) with one query that
+ranks comments per post with a ``ROW_NUMBER()`` window. Both read the
+``comment_appr_post_idx`` partial index.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from blog.models import Comment
+
+LATEST_COMMENTS = 3
+INCLUDE_PARAM = 'include'
+LATEST_COMMENTS_INCLUDE = 'latest_comments'
+
+
+def wants_latest_comments(request):
+    """True for requests with ?include=latest_comments (comma-separated values allowed)."""
+    if request is None:
+        return False
+    values = request.query_params.get(INCLUDE_PARAM, '').split(',')
+    return LATEST_COMMENTS_INCLUDE in {value.strip() for value in values}
+
+
+def approved_counts(post_ids):
+    rows = (
+        Comment.objects.filter(post_id__in=post_ids, is_approved=True)
+        .values('post_id')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    return {row['post_id']: row['count'] for row in rows}
+
+
+def latest_comments(post_ids, limit=LATEST_COMMENTS):
+    comments = (
+        Comment.objects.filter(post_id__in=post_ids, is_approved=True)
+        .annotate(position=Window(
+            RowNumber(), partition_by=F('post_id'), order_by=(F('created_at').desc(), F('id').desc()),
+        ))
+        .filter(position__lte=limit)
+        .select_related('user')
+        .only('id', 'post_id', 'content', 'created_at', 'user__username', 'user__first_name', 'user__last_name')
+        .order_by('post_id', 'position')
+    )
+    grouped = defaultdict(list)
+    for comment in comments:
+        grouped[comment.post_id].append(comment)
+    return grouped
+
+
+def attach(posts, include_latest=False):
+    """Set the comment attributes the post list serializer reads on ``posts``."""
+    post_ids = [post.pk for post in posts]
+    if not post_ids:
+        return
+    counts = approved_counts(post_ids)
+    latest = latest_comments(post_ids) if include_latest else {}
+    for post in posts:
+        post.approved_comment_count = counts.get(post.pk, 0)
+        if include_latest:
+            post.latest_comments = latest.get(post.pk, [])
@@ -0,0 +1,104 @@
+"""
+Conditional GET (ETag / Last-Modified) support for read-only API viewsets.
+
+Validators are computed without the serialized body, so a matching
+``If-None-Match`` or ``If-Modified-Since`` is answered with a 304 before the
+full rows are loaded or serialized. A detail validator comes from a
+metadata query over the row's ``updated_at``. A list validator comes from a
+summary query over the filtered rows (count and newest ``updated_at``), so
+inserts, edits and deletes change it whichever process made them. Changes
+that leave the rows alone, such as an approved comment, are covered by the
+generations of the view's cache scopes and the time they last changed (see
+``blog.cache``); those only reach every worker through a shared cache.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from django.db.models import Count, Max
+
+from blog.cache import get_generations, get_last_changed, get_visibility
+
+
+def set_validator_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+class ConditionalGetMixin:
+    """
+    Adds strong ETags and Last-Modified headers to ``list`` and ``retrieve``
+    and answers matching conditional requests with 304 Not Modified.
+
+    The ETag also covers the generations of ``cache_scopes`` (see
+    ``blog.cache``), so changes to related rows that do not touch
+    ``updated_at``, such as a renamed tag, still produce a new ETag. List
+    validators come from those scopes alone, so they must cover every table
+    the list reads.
+    """
+    last_modified_field = 'updated_at'
+    cache_scopes = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.get_list_validators, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(self.get_detail_validators, super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, get_validators, handler, request, *args, **kwargs):
+        validators = get_validators()
+        if validators is None:
+            # Missing or forbidden object: let the handler build the error response
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            set_validator_headers(response, etag, last_modified)
+        return response
+
+    def get_list_validators(self):
+        """Validators for the filtered list: row count and newest ``updated_at``, plus scope changes."""
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        summary = queryset.aggregate(count=Count('pk'), last_modified=Max(self.last_modified_field))
+        last_modified = max(
+            (value for value in (summary['last_modified'], get_last_changed(self.cache_scopes)) if value),
+            default=None,
+        )
+        return self.build_validators(summary['count'], summary['last_modified'], last_modified)
+
+    def get_detail_validators(self):
+        row = self.get_detail_metadata()
+        if row is None:
+            return None
+        return self.build_validators(row['pk'], row[self.last_modified_field])
+
+    def get_detail_metadata(self):
+        """The primary key and ``updated_at`` of the requested object, or None."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().prefetch_related(None)
+        return (
+            queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values('pk', self.last_modified_field)
+            .first()
+        )
+
+    def build_validators(self, *parts):
+        last_modified = parts[-1]
+        request = self.request
+        generations = get_generations(self.cache_scopes)
+        fingerprint = '|'.join([
+            self.__class__.__name__,
+            self.action or '',
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            get_visibility(request),
+            repr(sorted(generations.items())),
+            *(value.isoformat() if hasattr(value, 'isoformat') else repr(value) for value in parts),
+        ])
+        etag = quote_etag(hashlib.sha256(fingerprint.encode()).hexdigest())
+        return etag, int(last_modified.timestamp()) if last_modified else None
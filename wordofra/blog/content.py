@@ -0,0 +1,56 @@
+"""
+Helpers for deriving plain-text metadata from post HTML content.
+
+These functions are kept free of ORM access so they can run in worker
+processes (see the backfill_post_metadata management command).
+"""
+import math
+import re
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+FIRST_IMAGE_PATTERN = re.compile(r'''<img[^>]+src=["']([^"'>]+)["']''')
+
+EXCERPT_LENGTH = 150
+WORDS_PER_MINUTE = 200
+
+
+def strip_tags(html):
+    """Return the text of an HTML fragment with all tags removed."""
+    return TAG_PATTERN.sub("", html or "").strip()
+
+
+def search_text(html):
+    """Return the text of an HTML fragment for indexing, keeping word breaks at tags."""
+    return TAG_PATTERN.sub(" ", html or "")
+
+
+def build_excerpt(text):
+    return text[:EXCERPT_LENGTH] + "..." if len(text) > EXCERPT_LENGTH else text
+
+
+def find_first_image_url(html):
+    """Return the src of the first <img>, or None if it is an inline data URI."""
+    match = FIRST_IMAGE_PATTERN.search(html or "")
+    if match:
+        src = match.group(1)
+        if not src.startswith("data:"):
+            return src
+    return None
+
+
+def reading_time_minutes(word_count):
+    if not word_count:
+        return 0
+    return max(1, math.ceil(word_count / WORDS_PER_MINUTE))
+
+
+def compute_derived_fields(content):
+    """Compute every precomputed Post column from the raw content HTML."""
+    text = strip_tags(content)
+    word_count = len(text.split())
+    return {
+        "excerpt": build_excerpt(text),
+        "first_image_url": find_first_image_url(content),
+        "word_count": word_count,
+        "reading_time": reading_time_minutes(word_count),
+    }
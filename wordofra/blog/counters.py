@@ -0,0 +1,117 @@
+"""
+Denormalized post counts on Category and Tag.
+
+``published_post_count`` counts published posts and ``public_post_count``
+the published posts anonymous visitors can see (not restricted). The signal
+handlers in ``blog.signals`` keep them current with relative ``F()``
+updates, so concurrent saves never overwrite each other's changes.
+``reconcile`` repairs drift left by ``QuerySet.update()`` or raw SQL.
+"""
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from blog.cache import bump_generation
+from blog.models import Category, Post, Tag
+
+COUNTER_FIELDS = ('published_post_count', 'public_post_count')
+
+
+def contribution(status, is_restricted, sign=1):
+    """What one post adds to each counter of its category and tags."""
+    published = status == 'published'
+    return (sign * published, sign * (published and not is_restricted))
+
+
+def apply(queryset, delta):
+    """Add ``delta`` (published, public) to the counters of every row in ``queryset``."""
+    published, public = delta
+    if not published and not public:
+        return
+    # Floored at zero: a count that already drifted low (rows inserted without
+    # signals) must not make a later delete fail on the unsigned column.
+    # The reconcile_post_counts command repairs the drift itself.
+    queryset.update(
+        published_post_count=Greatest(F('published_post_count') + published, 0),
+        public_post_count=Greatest(F('public_post_count') + public, 0),
+    )
+    bump_generation(queryset.model._meta.model_name)
+
+
+def load_post_state(post):
+    """The saved (status, is_restricted, category_id) of ``post``, or None if it is new."""
+    if post.pk is None:
+        return None
+    return Post.objects.filter(pk=post.pk).values_list('status', 'is_restricted', 'category_id').first()
+
+
+def post_saved(post, previous):
+    """Move the post's contribution from its ``previous`` state to its current one."""
+    new = contribution(post.status, post.is_restricted)
+    if previous is None:
+        apply(Category.objects.filter(pk=post.category_id), new)
+        return  # A new post has no tags yet; they arrive through m2m_changed
+
+    status, is_restricted, category_id = previous
+    old = contribution(status, is_restricted)
+    delta = (new[0] - old[0], new[1] - old[1])
+    if category_id == post.category_id:
+        apply(Category.objects.filter(pk=post.category_id), delta)
+    else:
+        apply(Category.objects.filter(pk=category_id), (-old[0], -old[1]))
+        apply(Category.objects.filter(pk=post.category_id), new)
+    apply(Tag.objects.filter(posts__pk=post.pk), delta)
+
+
+def post_deleted(post):
+    removed = contribution(post.status, post.is_restricted, sign=-1)
+    apply(Category.objects.filter(pk=post.category_id), removed)
+    apply(Tag.objects.filter(posts__pk=post.pk), removed)
+
+
+def post_tags_changed(instance, action, reverse, pk_set):
+    """
+    Handle ``Post.tags`` changes. Removals are counted before they happen,
+    while the rows being removed can still be seen; additions after.
+    """
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    sign = 1 if action == 'post_add' else -1
+
+    if not reverse:
+        # post.tags.add(...): instance is the Post and pk_set holds tag ids
+        tags = Tag.objects.filter(pk__in=pk_set) if action == 'post_add' else instance.tags.all()
+        if action == 'pre_remove':
+            tags = tags.filter(pk__in=pk_set)
+        apply(Tag.objects.filter(pk__in=tags.values('pk')), contribution(instance.status, instance.is_restricted, sign))
+        return
+
+    # tag.posts.add(...): instance is the Tag and pk_set holds post ids
+    posts = Post.objects.filter(pk__in=pk_set) if action == 'post_add' else instance.posts.all()
+    if action == 'pre_remove':
+        posts = posts.filter(pk__in=pk_set)
+    counts = posts.aggregate(
+        published=Count('pk', filter=Q(status='published')),
+        public=Count('pk', filter=Q(status='published', is_restricted=False)),
+    )
+    apply(Tag.objects.filter(pk=instance.pk), (sign * counts['published'], sign * counts['public']))
+
+
+def true_counts(model):
+    """``model`` rows annotated with their counters as computed from posts."""
+    return model.objects.annotate(
+        true_published=Count('posts', filter=Q(posts__status='published')),
+        true_public=Count('posts', filter=Q(posts__status='published', posts__is_restricted=False)),
+    )
+
+
+def reconcile(model, repair=True):
+    """Recount ``model``'s counters in one query; bulk-fix the rows that drifted."""
+    drifted = []
+    for row in true_counts(model).order_by('pk').iterator(chunk_size=2000):
+        if (row.published_post_count, row.public_post_count) != (row.true_published, row.true_public):
+            row.published_post_count, row.public_post_count = row.true_published, row.true_public
+            drifted.append(row)
+    if repair and drifted:
+        model.objects.bulk_update(drifted, COUNTER_FIELDS, batch_size=1000)
+        bump_generation(model._meta.model_name)
+    return drifted
@@ -0,0 +1,76 @@
+"""
+Content-addressed registry of uploaded images.
+
+An image is identified by the SHA-256 of its decoded bytes, and
+``ImageAsset`` maps that digest to the uploaded URL. An image embedded in
+many posts (a logo, a divider, an author photo) is therefore uploaded once
+and its URL reused everywhere. The Cloudinary public id is derived from the
+digest as well, so two processes racing to upload the same image overwrite
+one asset instead of creating two.
+
+``reuses`` on each asset counts the uploads it saved; ``savings`` sums them.
+An upload that loses the race to register its digest is counted as a reuse
+of the winning asset.
+"""
+import hashlib
+
+import cloudinary.uploader
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from blog.models import ImageAsset
+
+ASSET_FOLDER = 'blog/assets'
+
+
+def cloudinary_upload(image_bytes, folder, public_id):
+    """Upload one image and return its URL. Callers accept another uploader for tests."""
+    result = cloudinary.uploader.upload(
+        image_bytes,
+        folder=folder,
+        public_id=public_id,
+        resource_type="image",
+        overwrite=True,
+    )
+    return result["secure_url"]
+
+
+def digest(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def find(digests):
+    """Registered URLs by digest, for the digests that have been uploaded."""
+    return dict(ImageAsset.objects.filter(sha256__in=digests).values_list('sha256', 'url'))
+
+
+def upload(image_bytes, sha256, uploader=None):
+    """Upload without consulting the registry; pass the result to ``register``."""
+    return (uploader or cloudinary_upload)(image_bytes, folder=ASSET_FOLDER, public_id=sha256)
+
+
+def register(sha256, url, size):
+    """Record an upload. If another process registered the digest first, its asset wins and is reused."""
+    asset, created = ImageAsset.objects.get_or_create(
+        sha256=sha256, defaults={'url': url, 'public_id': f'{ASSET_FOLDER}/{sha256}', 'bytes': size},
+    )
+    if not created:
+        record_reuses({sha256: 1})
+    return asset
+
+
+def record_reuses(counts):
+    """Count uploads saved, given a mapping of digest to number of reuses."""
+    now = timezone.now()
+    for sha256, count in counts.items():
+        if count:
+            ImageAsset.objects.filter(sha256=sha256).update(reuses=F('reuses') + count, last_used_at=now)
+
+
+def savings():
+    """Registry totals: assets, upload calls saved and bytes not uploaded again."""
+    return ImageAsset.objects.aggregate(
+        assets=Count('pk'),
+        uploads_saved=Sum('reuses', default=0),
+        bytes_saved=Sum(F('bytes') * F('reuses'), default=0),
+    )
@@ -0,0 +1,129 @@
+"""
+Write-behind comment ingestion.
+
+With ``BLOG_COMMENT_INGESTION = 'outbox'``, the API checks a new comment
+against cached sets of live post and quote ids, so no query is needed to
+validate it. The comment is appended to ``CommentOutbox`` and the API
+answers 202 with the row's tracking id. ``flush`` moves pending rows into
+``Comment`` a batch at a time with ``bulk_create`` and records the outcome
+on each outbox row. Run it from the flush_comment_outbox command.
+
+Comments are timestamped when they are flushed. Rows whose post was
+unpublished or deleted in the meantime are marked dropped and logged, as
+are replies whose parent comment is missing, unapproved or on another
+post. The targets are locked while a batch is written, so one deleted
+concurrently cannot fail the insert.
+
+The cached id sets follow the post and quote generations. They also expire
+after ``LIVE_IDS_TIMEOUT`` so that a worker with a per-process cache, which
+never sees another worker's bumps, accepts new targets within minutes; a
+stale id is caught by the flush.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog import threads
+from blog.cache import bump_generation, get_generations
+from blog.models import Comment, CommentOutbox, Post, Quote
+
+LIVE_IDS_KEY = 'blog:live-ids:{scope}:{generation}'
+LIVE_IDS_TIMEOUT = 60 * 5
+FLUSH_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def ingestion_mode():
+    return getattr(settings, 'BLOG_COMMENT_INGESTION', 'direct')
+
+
+def _live_targets(scope):
+    if scope == 'post':
+        return Post.objects.filter(status='published')
+    return Quote.objects.all()
+
+
+def live_ids(scope):
+    """Ids of the posts or quotes (``scope``) that accept comments; cached per generation."""
+    generation = get_generations([scope])[scope]
+    key = LIVE_IDS_KEY.format(scope=scope, generation=generation)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(_live_targets(scope).values_list('pk', flat=True))
+        cache.set(key, ids, LIVE_IDS_TIMEOUT)
+    return ids
+
+
+def enqueue(user, content, post=None, quote=None, parent=None):
+    return CommentOutbox.objects.create(user=user, content=content, post_id=post, quote_id=quote, parent_id=parent)
+
+
+def flush(batch_size=FLUSH_BATCH_SIZE):
+    """Publish the oldest pending batch; returns (published, dropped)."""
+    with transaction.atomic():
+        pending = CommentOutbox.objects.filter(status=CommentOutbox.PENDING).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)  # Concurrent flushers take disjoint batches
+        rows = list(pending[:batch_size])
+        if not rows:
+            return 0, 0
+
+        # Locked until commit: a target deleted meanwhile waits for the batch
+        # and then takes its new comments with it
+        posts = set(
+            _live_targets('post').filter(pk__in={row.post_id for row in rows if row.post_id})
+            .select_for_update(no_key=True).values_list('pk', flat=True)
+        )
+        quotes = set(
+            _live_targets('quote').filter(pk__in={row.quote_id for row in rows if row.quote_id})
+            .select_for_update(no_key=True).values_list('pk', flat=True)
+        )
+        parent_ids = {row.parent_id for row in rows if row.parent_id}
+        parents = Comment.objects.filter(pk__in=parent_ids, is_approved=True).only(
+            'post_id', 'quote_id', 'path', 'depth'
+        ).select_for_update(no_key=True).in_bulk() if parent_ids else {}
+
+        def placeable(row):
+            if row.parent_id is None:
+                return True
+            parent = parents.get(row.parent_id)
+            return (
+                parent is not None and (parent.post_id, parent.quote_id) == (row.post_id, row.quote_id)
+                and parent.depth < threads.MAX_DEPTH
+            )
+
+        kept = [
+            row for row in rows
+            if (row.post_id is None or row.post_id in posts) and (row.quote_id is None or row.quote_id in quotes)
+            and placeable(row)
+        ]
+        comments = Comment.objects.bulk_create([
+            Comment(
+                post_id=row.post_id, quote_id=row.quote_id, user_id=row.user_id, content=row.content,
+                parent_id=row.parent_id, depth=parents[row.parent_id].depth + 1 if row.parent_id else 0,
+            )
+            for row in kept
+        ])
+        # Paths end with the new ids, which bulk_create only now returned
+        for comment in comments:
+            parent_path = parents[comment.parent_id].path if comment.parent_id else ''
+            comment.path = threads.child_path(parent_path, comment.pk)
+        Comment.objects.bulk_update(comments, ['path'])
+
+        now = timezone.now()
+        for row in rows:
+            row.status, row.processed_at = CommentOutbox.DROPPED, now
+        for row, comment in zip(kept, comments):
+            row.status, row.comment = CommentOutbox.PUBLISHED, comment
+        CommentOutbox.objects.bulk_update(rows, ['status', 'comment', 'processed_at'])
+
+    dropped = len(rows) - len(comments)
+    if dropped:
+        logger.info("Dropped %d queued comments whose post, quote or parent no longer accepts them", dropped)
+    if comments:
+        bump_generation('comment')
+    return len(comments), dropped
@@ -0,0 +1,68 @@
+"""
+Django management command: Recomputes the excerpt, first image URL, word count
+and reading time columns for existing posts. The HTML scanning runs in worker
+processes; the main process streams content from the database and writes the
+results back with bulk updates.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_generation
+from blog.content import compute_derived_fields
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Backfill precomputed excerpt/first image/reading time columns on posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=200,
+            help="Posts read and written per batch (default: 200).",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+        total = Post.objects.count()
+        self.stdout.write(f"Backfilling {total} posts with {workers} worker(s)...")
+
+        rows = Post.objects.order_by("pk").values_list("pk", "content").iterator(chunk_size=batch_size)
+
+        updated = 0
+        # Spawned (not forked) workers so they never share the parent's
+        # database connection; they only import blog.content.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    updated += self._process_batch(pool, batch, workers)
+                    batch = []
+            if batch:
+                updated += self._process_batch(pool, batch, workers)
+
+        # bulk_update bypasses the signals that invalidate cached responses
+        bump_generation('post')
+        self.stdout.write(self.style.SUCCESS(f"Done! Updated {updated} posts."))
+
+    def _process_batch(self, pool, batch, workers):
+        chunksize = max(1, len(batch) // workers)
+        contents = [content for _, content in batch]
+        posts = []
+        for (pk, _), values in zip(batch, pool.map(compute_derived_fields, contents, chunksize=chunksize)):
+            post = Post(pk=pk)
+            for field, value in values.items():
+                setattr(post, field, value)
+            posts.append(post)
+        Post.objects.bulk_update(posts, Post.DERIVED_FIELDS)
+        self.stdout.write(f"  Updated {len(posts)} posts (through id {posts[-1].pk})")
+        return len(posts)
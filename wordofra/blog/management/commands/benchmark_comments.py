@@ -0,0 +1,108 @@
+"""
+Django management command: Benchmarks the comment list endpoint on a post
+with many approved comments, against the previous implementation (users
+loaded per row through StringRelatedField, no select_related). Reports the
+queries and median time per page. The comments are created inside a
+transaction that is rolled back at the end, so the command is safe to run
+against a development database.
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from blog.models import Category, Comment, Post
+from blog.views import CommentViewSet
+
+
+class _NaiveCommentSerializer(serializers.ModelSerializer):
+    user = serializers.StringRelatedField()
+
+    class Meta:
+        model = Comment
+        fields = ["id", "post", "quote", "user", "content", "created_at", "is_approved"]
+
+
+class Command(BaseCommand):
+    help = "Measure queries and latency of comment list pages on a heavily commented post"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comments", type=int, default=10_000, help="Approved comments (default: 10000).")
+        parser.add_argument("--users", type=int, default=500, help="Distinct commenters (default: 500).")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per page (default: 5).")
+
+    def handle(self, *args, **options):
+        view = CommentViewSet.as_view({"get": "list"}, throttle_classes=[])
+        factory = APIRequestFactory()
+        host = next((host for host in settings.ALLOWED_HOSTS if host != "*"), "localhost").lstrip(".")
+
+        with transaction.atomic():
+            post = self._seed(options["comments"], options["users"])
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE blog_comment")
+
+            size = options["page_size"]
+            last_page = max((options["comments"] + size - 1) // size, 1)
+            self.stdout.write(f"{'page':<16}{'naive queries':>15}{'naive ms':>10}{'queries':>10}{'ms':>8}")
+            for page in (1, last_page // 2 or 1, last_page):
+                params = {"post": post.pk, "page": page, "page_size": size}
+                naive = self._measure(lambda: self._naive_page(post, page, size), options["repeat"])
+                request = lambda: view(factory.get("/", params, HTTP_HOST=host)).render()
+                current = self._measure(request, options["repeat"])
+                self.stdout.write(
+                    f"{page:<16}{naive[0]:>15}{naive[1]:>10.1f}{current[0]:>10}{current[1]:>8.1f}"
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Done! No data was kept."))
+
+    def _seed(self, comments, users):
+        User = get_user_model()
+        self.stdout.write(f"Seeding {comments} comments from {users} users...")
+        User.objects.bulk_create([
+            User(
+                username=f"comment-benchmark-{i}", email=f"comment-benchmark-{i}@example.com",
+                first_name="Reader", last_name=str(i),
+            )
+            for i in range(users)
+        ])
+        commenters = list(User.objects.filter(username__startswith="comment-benchmark-"))
+        post = Post.objects.create(
+            title="Comment benchmark", slug="comment-benchmark", content="<p>Body</p>",
+            author=commenters[0], category=Category.objects.create(name="Comment benchmark"),
+            status="published",
+        )
+        Comment.objects.bulk_create(
+            [
+                Comment(post=post, user=commenters[i % len(commenters)], content=f"Comment {i}", is_approved=True)
+                for i in range(comments)
+            ],
+            batch_size=2000,
+        )
+        return post
+
+    @staticmethod
+    def _naive_page(post, page, size):
+        queryset = Comment.objects.filter(is_approved=True, post=post).order_by("-created_at")
+        queryset.count()
+        offset = (page - 1) * size
+        return _NaiveCommentSerializer(queryset[offset:offset + size], many=True).data
+
+    @staticmethod
+    def _measure(func, repeat):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return len(queries), statistics.median(timings)
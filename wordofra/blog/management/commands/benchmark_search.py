@@ -0,0 +1,106 @@
+"""
+Django management command: Benchmarks the full-text search backend against
+DRF's SearchFilter (icontains over title and content) on a synthetic corpus.
+The corpus is created inside a transaction that is rolled back at the end, so
+the command is safe to run against a development database.
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from blog.models import Category, Post
+from blog.search import get_search_backend
+
+PAGE_SIZE = 10
+
+
+class _SearchView:
+    search_fields = ['title', 'content']
+
+
+class Command(BaseCommand):
+    help = "Compare full-text search with the icontains SearchFilter on a synthetic corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100_000, help="Corpus size (default: 100000).")
+        parser.add_argument("--words", type=int, default=300, help="Words per post body (default: 300).")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query (default: 5).")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        vocabulary = [self._word(rng) for _ in range(5000)]
+        # Zipf-like weights so the corpus has both common and rare terms
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        terms = [vocabulary[0], vocabulary[50], vocabulary[2000], f"{vocabulary[10]} {vocabulary[400]}"]
+
+        with transaction.atomic():
+            self._seed(rng, vocabulary, weights, options["posts"], options["words"])
+            started = time.perf_counter()
+            get_search_backend().rebuild()
+            self.stdout.write(f"Indexed {options['posts']} posts in {time.perf_counter() - started:.1f}s")
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE blog_post")
+
+            self.stdout.write(f"{'query':<24}{'icontains ms':>14}{'full-text ms':>14}{'speedup':>10}")
+            for term in terms:
+                baseline = self._time(lambda: self._icontains_page(term), options["repeat"])
+                fulltext = self._time(lambda: self._fulltext_page(term), options["repeat"])
+                self.stdout.write(
+                    f"{term:<24}{baseline:>14.1f}{fulltext:>14.1f}{baseline / max(fulltext, 0.001):>9.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, rng, vocabulary, weights, total, words):
+        author = get_user_model().objects.create_user(
+            username="search-benchmark", email="search-benchmark@example.com", password=None
+        )
+        category = Category.objects.create(name="Search benchmark")
+        self.stdout.write(f"Seeding {total} posts...")
+        batch = []
+        for i in range(total):
+            body = " ".join(rng.choices(vocabulary, weights, k=words))
+            batch.append(Post(
+                title=" ".join(rng.choices(vocabulary, weights, k=6)),
+                slug=f"search-benchmark-{i}",
+                content=f"<p>{body}</p>",
+                author=author,
+                category=category,
+                status="published",
+            ))
+            if len(batch) == 2000:
+                Post.objects.bulk_create(batch)
+                batch = []
+        Post.objects.bulk_create(batch)
+
+    def _icontains_page(self, term):
+        request = Request(APIRequestFactory().get("/", {"search": term}))
+        queryset = SearchFilter().filter_queryset(request, Post.objects.all(), _SearchView())
+        queryset.count()
+        list(queryset.order_by("-created_at")[:PAGE_SIZE])
+
+    def _fulltext_page(self, term):
+        queryset = get_search_backend().search(Post.objects.all(), term)
+        queryset.count()
+        list(queryset.order_by("-search_rank", "-created_at")[:PAGE_SIZE])
+
+    @staticmethod
+    def _time(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    @staticmethod
+    def _word(rng):
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
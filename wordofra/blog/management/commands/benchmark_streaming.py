@@ -0,0 +1,138 @@
+"""
+Django management command: Compares the streaming JSON renderer
+(?format=jsonstream) with DRF's JSONRenderer on list endpoints, reporting
+time-to-first-byte, total time and peak Python heap per request.
+
+Quotes and projects are keyset-paginated, so those lists are read in full by
+following their next links: TTFB is that of the first page, total time and
+body size add up over all pages, and peak memory is that of the largest page.
+
+Peak memory is measured with tracemalloc, which isolates each request's
+allocations; process RSS only ever grows, so it cannot be reset between runs.
+The data is created inside a transaction that is rolled back at the end, so
+the command is safe to run against a development database.
+"""
+import statistics
+import time
+import tracemalloc
+from urllib.parse import parse_qsl, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from blog.content import compute_derived_fields
+from blog.models import Category, Post, Quote
+from blog.views import PostViewSet, QuoteViewSet
+from portfolio.models import Project
+from portfolio.views import ProjectViewSet
+
+
+class Command(BaseCommand):
+    help = "Compare TTFB and peak memory of streamed and buffered list responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000, help="Rows per model (default: 2000).")
+        parser.add_argument("--body-kb", type=int, default=16, help="Size of each text body in KB (default: 16).")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5).")
+
+    def handle(self, *args, **options):
+        body = "<p>" + "lorem ipsum dolor sit amet " * (options["body_kb"] * 1024 // 27) + "</p>"
+        endpoints = [
+            # (label, viewset, query parameters, follow the next links)
+            ("posts (page of 50)", PostViewSet, {"page_size": 50}, False),
+            ("quotes (all pages)", QuoteViewSet, {"page_size": 100}, True),
+            ("projects (all pages)", ProjectViewSet, {"page_size": 50}, True),
+        ]
+
+        # Measure the renderers, not the response cache or the rate limits
+        with transaction.atomic(), override_settings(BLOG_RESPONSE_CACHE_TIMEOUT=0):
+            self._seed(options["rows"], body)
+            self.stdout.write(
+                f"{'endpoint':<22}{'format':>12}{'TTFB ms':>10}{'total ms':>10}{'peak MB':>10}{'body MB':>10}"
+            )
+            for label, viewset, params, walk in endpoints:
+                view = viewset.as_view({"get": "list"}, throttle_classes=[])
+                pages = self._pages(view, params) if walk else [params]
+                for renderer in ("json", "jsonstream"):
+                    pages_params = [{**page, "format": renderer} for page in pages]
+                    timings = [self._timed(view, pages_params) for _ in range(options["repeat"])]
+                    ttfb = statistics.median(t[0] for t in timings)
+                    total = statistics.median(t[1] for t in timings)
+                    peak, size = self._peak_memory(view, pages_params)
+                    self.stdout.write(
+                        f"{label:<22}{renderer:>12}{ttfb:>10.1f}{total:>10.1f}"
+                        f"{peak / 2 ** 20:>10.1f}{size / 2 ** 20:>10.1f}"
+                    )
+            transaction.set_rollback(True)
+
+    def _seed(self, rows, body):
+        author = get_user_model().objects.create_user(
+            username="streaming-benchmark", email="streaming-benchmark@example.com", password=None
+        )
+        category = Category.objects.create(name="Streaming benchmark")
+        self.stdout.write(f"Seeding {rows} posts, quotes and projects...")
+        derived = compute_derived_fields(body)
+        Post.objects.bulk_create([
+            Post(
+                title=f"Streaming benchmark {i}", slug=f"streaming-benchmark-{i}", content=body,
+                author=author, category=category, status="published", **derived
+            )
+            for i in range(rows)
+        ], batch_size=500)
+        Quote.objects.bulk_create([Quote(content=body, owner=f"Owner {i}") for i in range(rows)], batch_size=500)
+        Project.objects.bulk_create([
+            Project(title=f"Streaming benchmark {i}", slug=f"streaming-benchmark-{i}", description=body)
+            for i in range(rows)
+        ], batch_size=500)
+
+    def _request(self, view, params):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != "*"), "localhost").lstrip(".")
+        return view(APIRequestFactory().get("/", params, HTTP_HOST=host))
+
+    def _pages(self, view, params):
+        """Query parameters of every page of a keyset-paginated list, found by following the next links."""
+        pages = [params]
+        while True:
+            next_link = self._request(view, {**pages[-1], "format": "json"}).data["next"]
+            if not next_link:
+                return pages
+            pages.append({**params, **dict(parse_qsl(urlsplit(next_link).query))})
+
+    def _timed(self, view, pages):
+        """(time to first byte of the first page, total time of all pages) in milliseconds."""
+        started = time.perf_counter()
+        first_byte = None
+        for params in pages:
+            response = self._request(view, params)
+            if response.streaming:
+                chunks = iter(response.streaming_content)
+                next(chunks, b"")
+                first_byte = first_byte or time.perf_counter()
+                for _ in chunks:
+                    pass
+            else:
+                response.render()
+                first_byte = first_byte or time.perf_counter()
+        finished = time.perf_counter()
+        return (first_byte - started) * 1000, (finished - started) * 1000
+
+    def _peak_memory(self, view, pages):
+        """Peak traced allocations while serving the largest page, and the total body size."""
+        peak = size = 0
+        for params in pages:
+            tracemalloc.start()
+            try:
+                response = self._request(view, params)
+                if response.streaming:
+                    # A client drains the stream; only one chunk is alive at a time
+                    size += sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size += len(response.render().content)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        return peak, size
@@ -0,0 +1,53 @@
+"""
+Django management command: Runs the post content rendering pipeline over
+every post and reports how much smaller the served HTML is than the stored
+HTML, and how long rendering takes. Pass --warm to store the results in the
+rendered-content cache as well.
+"""
+import gzip
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.rendering import render_content, render_html
+
+
+class Command(BaseCommand):
+    help = "Report size reduction and latency of the post content rendering pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--warm", action="store_true", help="Fill the rendered-content cache.")
+
+    def handle(self, *args, **options):
+        raw_bytes = rendered_bytes = raw_gzip = rendered_gzip = 0
+        timings = []
+        for content in Post.objects.values_list("content", flat=True).iterator(chunk_size=100):
+            started = time.perf_counter()
+            rendered = render_html(content)
+            timings.append((time.perf_counter() - started) * 1000)
+            if options["warm"]:
+                render_content(content)
+
+            raw, served = (content or "").encode(), rendered.encode()
+            raw_bytes += len(raw)
+            rendered_bytes += len(served)
+            raw_gzip += len(gzip.compress(raw))
+            rendered_gzip += len(gzip.compress(served))
+
+        if not timings:
+            self.stdout.write("No posts to render.")
+            return
+
+        self.stdout.write(f"Posts rendered: {len(timings)}")
+        self.stdout.write(f"{'':<12}{'stored KB':>12}{'served KB':>12}{'saved':>8}")
+        for label, before, after in (("raw", raw_bytes, rendered_bytes), ("gzip", raw_gzip, rendered_gzip)):
+            saved = 1 - after / before if before else 0
+            self.stdout.write(f"{label:<12}{before / 1024:>12.1f}{after / 1024:>12.1f}{saved:>8.1%}")
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"Render ms: median {statistics.median(timings):.2f}, p95 {p95:.2f}, max {timings[-1]:.2f}"
+        )
+        self.stdout.write(self.style.SUCCESS("Done!"))
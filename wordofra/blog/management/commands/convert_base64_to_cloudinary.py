@@ -1,71 +1,231 @@
 """
 Django management command: Extracts base64 images from blog post content,
 uploads them to Cloudinary, and replaces the data URIs with Cloudinary URLs.
+
+Posts are read in primary-key chunks. Only posts whose content still holds a
+data URI, and that have not been converted since they were last edited, are
+loaded. Uploads run in a bounded thread pool while later posts are scanned.
+Each post is rewritten in a single pass once its uploads are done.
+
+Images go through the content-addressed registry (blog/images.py). An image
+embedded in many posts is uploaded once and its URL reused in all of them.
+Every image a post uses is checkpointed (ContentImageUpload), and so is
+every fully converted post (ContentImageConversion). A rerun after a failure
+or an interruption resumes where the last one stopped.
 """
-import re
 import base64
-import cloudinary.uploader
-from django.core.management.base import BaseCommand
-from blog.models import Post
+import binascii
+import hashlib
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.utils import timezone
+
+from blog import images
+from blog.models import ContentImageConversion, ContentImageUpload, Post
 
 
 BASE64_IMG_PATTERN = re.compile(
     r'(<img[^>]+src=")data:image/([a-zA-Z]+);base64,([^"]+)("[^>]*>)'
 )
+DATA_URI_MARKER = 'data:image/'
+CHUNK_SIZE = 50
+POSTS_IN_FLIGHT_PER_WORKER = 2  # Bounds the post bodies held in memory
+
+
+def rewrite(content, matches, urls):
+    """Replace each matched data URI whose digest has a URL, in one pass over ``content``."""
+    parts, end = [], 0
+    for match, digest in matches:
+        url = urls.get(digest)
+        if url is None:
+            continue
+        parts += [content[end:match.start()], match.group(1), url, match.group(4)]
+        end = match.end()
+    parts.append(content[end:])
+    return ''.join(parts)
 
 
 class Command(BaseCommand):
     help = "Convert base64 images in blog post content to Cloudinary URLs"
+    stealth_options = ("uploader",)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be uploaded; change nothing.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Uploads to run at once (default: 4).")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Posts read per query (default: 50).")
 
     def handle(self, *args, **options):
-        posts = Post.objects.all()
-        self.stdout.write(f"Checking {posts.count()} posts for base64 images...")
+        concurrency = options["concurrency"]
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        self.uploader = options.get("uploader")
+        self.dry_run = options["dry_run"]
+        self.stats = Counter()
+        # Image digest -> URL, or the Future of an upload started in this run
+        self.assets = {}
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            in_flight = deque()
+            for post in self._candidates(options["chunk_size"]):
+                in_flight.append(self._start(post, executor))
+                if len(in_flight) > concurrency * POSTS_IN_FLIGHT_PER_WORKER:
+                    self._finish(*in_flight.popleft())
+            while in_flight:
+                self._finish(*in_flight.popleft())
+        self._report(time.perf_counter() - started)
+
+    def _candidates(self, chunk_size):
+        """Posts that may still hold base64 images, read in primary-key chunks."""
+        queryset = (
+            Post.objects.filter(content__contains=DATA_URI_MARKER)
+            .exclude(image_conversion__converted_at__gte=F('updated_at'))
+            .defer('search_vector')
+            .order_by('pk')
+        )
+        last_pk = 0
+        while chunk := list(queryset.filter(pk__gt=last_pk)[:chunk_size]):
+            yield from chunk
+            last_pk = chunk[-1].pk
 
-        for post in posts:
-            matches = list(BASE64_IMG_PATTERN.finditer(post.content))
-            if not matches:
-                self.stdout.write(f"  [{post.slug}] No base64 images found.")
+    def _start(self, post, executor):
+        """
+        Scan ``post`` and submit the uploads it needs. Returns what ``_finish``
+        needs: the matches, the checkpointed URLs, the image digest, size and
+        URL (or pending upload) of every other data URI, and the digests this
+        post uploads itself.
+        """
+        self.stats["posts"] += 1
+        matches = [
+            (match, hashlib.sha256(match.group(3).encode()).hexdigest())
+            for match in BASE64_IMG_PATTERN.finditer(post.content)
+        ]
+        payloads = {digest: match.group(3) for match, digest in matches}
+        done = dict(
+            ContentImageUpload.objects.filter(post=post, digest__in=payloads).values_list('digest', 'url')
+        ) if payloads else {}
+        self.stats["resumed"] += len(done)
+
+        decoded = {}
+        for digest, payload in payloads.items():
+            if digest in done:
                 continue
+            try:
+                decoded[digest] = base64.b64decode(payload)
+            except (binascii.Error, ValueError) as e:
+                self.stats["failed"] += 1
+                self.stderr.write(f"    ERROR decoding image {digest[:12]} of [{post.slug}]: {e}")
+        digests = {digest: images.digest(data) for digest, data in decoded.items()}
+        self.assets.update(images.find(set(digests.values()) - self.assets.keys()))
 
-            self.stdout.write(f"  [{post.slug}] Found {len(matches)} base64 image(s). Uploading...")
-            updated_content = post.content
+        sources, owned = {}, set()
+        for digest, sha256 in digests.items():
+            size = len(decoded[digest])
+            if sha256 in self.assets:
+                if self.dry_run:
+                    self.stats["reused"] += 1
+                    self.stats["bytes_saved"] += size
+            elif self.dry_run:
+                self.assets[sha256] = None
+                self.stats["pending"] += 1
+                self.stats["bytes"] += size
+            else:
+                self.assets[sha256] = executor.submit(images.upload, decoded[digest], sha256, self.uploader)
+                owned.add(sha256)
+            sources[digest] = (sha256, size, self.assets[sha256])
 
-            for i, match in enumerate(matches):
-                prefix = match.group(1)      # <img ... src="
-                img_format = match.group(2)   # jpeg, png, etc.
-                b64_data = match.group(3)     # the base64 string
-                suffix = match.group(4)       # " ... >
+        if not matches:
+            self.stdout.write(f"  [{post.slug}] No base64 images found.")
+        else:
+            self.stdout.write(
+                f"  [{post.slug}] Found {len(matches)} base64 image(s), {len(owned)} to upload."
+            )
+        return post, matches, done, sources, owned
 
+    def _finish(self, post, matches, done, sources, owned):
+        """Collect the post's uploads, then rewrite and checkpoint ``post``."""
+        if self.dry_run:
+            return
+        urls, checkpoints, reuses = dict(done), [], Counter()
+        for digest, (sha256, size, asset) in sources.items():
+            if isinstance(asset, Future):
                 try:
-                    image_bytes = base64.b64decode(b64_data)
-                    result = cloudinary.uploader.upload(
-                        image_bytes,
-                        folder=f"blog/{post.slug}",
-                        public_id=f"content_img_{i}",
-                        resource_type="image",
-                        overwrite=True,
-                    )
-                    cloudinary_url = result["secure_url"]
-                    self.stdout.write(f"    Uploaded image {i} -> {cloudinary_url}")
-
-                    old_full = match.group(0)
-                    new_full = f'{prefix}{cloudinary_url}{suffix}'
-                    updated_content = updated_content.replace(old_full, new_full, 1)
-
+                    url = asset.result()
                 except Exception as e:
-                    self.stderr.write(f"    ERROR uploading image {i}: {e}")
+                    self.stats["failed"] += 1
+                    self.stderr.write(f"    ERROR uploading image {sha256[:12]} of [{post.slug}]: {e}")
+                    if self.assets.get(sha256) is asset:
+                        del self.assets[sha256]  # Posts scanned later retry the upload
                     continue
+                if self.assets.get(sha256) is asset:
+                    # Posts finish in the order they started, so the uploading post registers
+                    self.assets[sha256] = images.register(sha256, url, size).url
+                asset = self.assets[sha256]
+            if sha256 in owned:
+                self.stats["uploaded"] += 1
+                self.stats["bytes"] += size
+            else:
+                reuses[sha256] += 1
+                self.stats["reused"] += 1
+                self.stats["bytes_saved"] += size
+            urls[digest] = asset
+            checkpoints.append(ContentImageUpload(post=post, digest=digest, url=urls[digest], bytes=size))
+        ContentImageUpload.objects.bulk_create(checkpoints, ignore_conflicts=True)
+        images.record_reuses(reuses)
+
+        if not Post.objects.filter(pk=post.pk, updated_at=post.updated_at).exists():
+            # Edited during the run; its images are checkpointed for the next one
+            self.stderr.write(f"    [{post.slug}] Changed since it was read; skipped.")
+            self.stats["skipped"] += 1
+            return
 
-            if updated_content != post.content:
-                old_size = len(post.content)
-                new_size = len(updated_content)
-                post.content = updated_content
-                post.save(update_fields=["content"])
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"    Saved! Content: {old_size:,} -> {new_size:,} bytes "
-                        f"({(1 - new_size/old_size)*100:.1f}% reduction)"
-                    )
+        old_size = len(post.content)
+        updated_content = rewrite(post.content, matches, urls)
+        if updated_content != post.content:
+            post.content = updated_content
+            post.save(update_fields=["content", "updated_at"])
+            new_size = len(updated_content)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"    Saved! Content: {old_size:,} -> {new_size:,} bytes "
+                    f"({(1 - new_size/old_size)*100:.1f}% reduction)"
                 )
+            )
+        if len(urls) == len({digest for _, digest in matches}):
+            ContentImageConversion.objects.update_or_create(
+                post=post,
+                defaults={
+                    'images': len(matches),
+                    'bytes_before': old_size,
+                    'bytes_after': len(post.content),
+                    'converted_at': timezone.now(),
+                },
+            )
 
-        self.stdout.write(self.style.SUCCESS("Done!"))
+    def _report(self, elapsed):
+        stats = self.stats
+        megabytes = stats["bytes"] / 1_000_000
+        saved = f"reused {stats['reused']} ({stats['bytes_saved'] / 1_000_000:.1f} MB not uploaded)"
+        if self.dry_run:
+            self.stdout.write(self.style.SUCCESS(
+                f"Done! Dry run over {stats['posts']} posts: {stats['pending']} images "
+                f"({megabytes:.1f} MB) to upload, {saved}, {stats['resumed']} already converted."
+            ))
+            return
+        rate = stats["uploaded"] / elapsed if elapsed else 0
+        throughput = megabytes / elapsed if elapsed else 0
+        totals = images.savings()
+        self.stdout.write(
+            f"Image registry: {totals['assets']} assets, {totals['uploads_saved']} upload calls and "
+            f"{totals['bytes_saved'] / 1_000_000:.1f} MB saved in total."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done! Scanned {stats['posts']} posts in {elapsed:.1f}s. Uploaded {stats['uploaded']} images "
+            f"({megabytes:.1f} MB, {rate:.1f} images/s, {throughput:.2f} MB/s), {saved}, "
+            f"resumed {stats['resumed']}, failed {stats['failed']}, skipped {stats['skipped']} changed posts."
+        ))
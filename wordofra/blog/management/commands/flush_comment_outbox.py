@@ -0,0 +1,48 @@
+"""
+Django management command: Writes comments queued in the outbox (see
+blog/ingestion.py) to the comments table in batches, until the outbox is
+empty. Schedule it, or run it in a loop with --interval, whenever
+BLOG_COMMENT_INGESTION is 'outbox'. Processed outbox rows are deleted once
+they are older than --keep-days.
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog import ingestion
+from blog.models import CommentOutbox
+
+
+class Command(BaseCommand):
+    help = "Flush queued comments from the outbox with batched inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=ingestion.FLUSH_BATCH_SIZE)
+        parser.add_argument("--interval", type=float, help="Keep running, flushing every INTERVAL seconds.")
+        parser.add_argument("--keep-days", type=int, default=7, help="Days to keep processed rows (default: 7).")
+
+    def handle(self, *args, **options):
+        while True:
+            self._flush(options["batch_size"])
+            cutoff = timezone.now() - timedelta(days=options["keep_days"])
+            CommentOutbox.objects.exclude(status=CommentOutbox.PENDING).filter(processed_at__lt=cutoff).delete()
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
+
+    def _flush(self, batch_size):
+        started = time.perf_counter()
+        published = dropped = 0
+        while True:
+            batch_published, batch_dropped = ingestion.flush(batch_size)
+            if not batch_published and not batch_dropped:
+                break
+            published += batch_published
+            dropped += batch_dropped
+        elapsed = time.perf_counter() - started
+        rate = published / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Done! Published {published} comments ({rate:.0f}/s), dropped {dropped}."
+        ))
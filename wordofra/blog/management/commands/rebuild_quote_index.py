@@ -0,0 +1,21 @@
+"""
+Django management command: Renumbers the dense quote index behind the quote
+of the day (see blog/quote_rotation.py). Saves and deletes keep it current;
+run this after bulk changes that bypass model signals, such as
+QuerySet.update(), raw SQL or loaddata.
+"""
+from django.core.management.base import BaseCommand
+
+from blog import quote_rotation
+from blog.models import Quote, QuoteSlot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the dense quote index used by the daily and random quote endpoints"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding quote index...")
+        quote_rotation.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Done! Indexed {QuoteSlot.objects.count()} of {Quote.objects.count()} quotes."
+        ))
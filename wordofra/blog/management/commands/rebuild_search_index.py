@@ -0,0 +1,26 @@
+"""
+Django management command: Rebuilds the full-text search index for every post
+(the search_vector column on Postgres, the FTS5 table on SQLite). Saves keep
+the index current; run this after bulk imports or raw SQL edits.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import bump_generation
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for blog posts"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f"Rebuilding search index with {backend.__class__.__name__}...")
+        started = time.perf_counter()
+        with transaction.atomic():
+            count = backend.rebuild()
+        bump_generation('post')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Done! Indexed {count} posts in {elapsed:.2f}s."))
@@ -0,0 +1,38 @@
+"""
+Django management command: Recounts the denormalized post counters on
+categories and tags from the posts themselves and repairs any drift in bulk.
+Signals keep the counters current; drift comes from QuerySet.update(),
+raw SQL or restored backups. Use --check to report drift without fixing it.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import counters
+from blog.models import Category, Tag
+
+
+class Command(BaseCommand):
+    help = "Recount category and tag post counters and repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true", help="Only report drift; exit with an error if any is found."
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Category, Tag):
+            drifted = counters.reconcile(model, repair=not options["check"])
+            total += len(drifted)
+            for row in drifted:
+                self.stdout.write(
+                    f"{model.__name__} {row.slug}: should be published={row.published_post_count}, "
+                    f"public={row.public_post_count}"
+                )
+            self.stdout.write(f"{model.__name__}: {len(drifted)} drifted row(s)")
+
+        if options["check"]:
+            if total:
+                raise CommandError(f"{total} counter row(s) have drifted.")
+            self.stdout.write(self.style.SUCCESS("Done! Counters are consistent."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Done! Repaired {total} row(s)."))
@@ -0,0 +1,32 @@
+"""
+Django management command: Recomputes the cached "popular posts" ranking
+from the hourly view buckets. Web processes refresh it as they flush their
+buffered views; schedule this so the ranking keeps decaying on quiet sites.
+--prune DAYS also deletes buckets older than DAYS days.
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog import tracking
+from blog.models import PostViewBucket
+
+
+class Command(BaseCommand):
+    help = "Recompute the popular posts ranking from recorded views"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', type=int, metavar='DAYS', help="Delete view buckets older than DAYS days")
+
+    def handle(self, *args, **options):
+        if options['prune'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['prune'])
+            deleted, _ = PostViewBucket.objects.filter(hour__lt=cutoff).delete()
+            self.stdout.write(f"Pruned {deleted} view buckets")
+
+        started = time.perf_counter()
+        ranked = tracking.refresh_popular()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Done! Ranked {len(ranked)} posts in {elapsed:.2f}s."))
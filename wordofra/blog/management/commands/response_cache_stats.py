@@ -0,0 +1,23 @@
+"""
+Django management command: Reports hit/miss counts for the blog API response
+cache (see blog/cache.py).
+"""
+from django.core.management.base import BaseCommand
+
+from blog.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show blog API response cache hit/miss statistics"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after reporting.")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        self.stdout.write(
+            f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit ratio: {stats['hit_ratio']:.1%}"
+        )
+        if options["reset"]:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
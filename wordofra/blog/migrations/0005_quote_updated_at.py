@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:05
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    Quote = apps.get_model('blog', 'Quote')
+    Quote.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
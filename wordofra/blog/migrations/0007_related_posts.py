@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_terms_index(apps, schema_editor):
+    """GIN index for the shared-term candidate lookup (Postgres only)."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX blog_posttermvector_terms_gin ON blog_posttermvector USING gin (terms)'
+        )
+
+
+def drop_terms_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS blog_posttermvector_terms_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=255, unique=True)),
+                ('documents', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostTermVector',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='term_vector', serialize=False, to='blog.post')),
+                ('terms', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_rows', to='blog.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_related', to='blog.post')),
+            ],
+            options={
+                'ordering': ['post', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'rank'), name='related_post_rank_unique'), models.UniqueConstraint(fields=('post', 'related'), name='related_post_pair_unique')],
+            },
+        ),
+        migrations.RunPython(create_terms_index, drop_terms_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:03
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_posts(apps, schema_editor):
+    for name in ('Category', 'Tag'):
+        model = apps.get_model('blog', name)
+        rows = list(model.objects.annotate(
+            published=Count('posts', filter=Q(posts__status='published')),
+            public=Count('posts', filter=Q(posts__status='published', posts__is_restricted=False)),
+        ))
+        for row in rows:
+            row.published_post_count, row.public_post_count = row.published, row.public
+        model.objects.bulk_update(rows, ['published_post_count', 'public_post_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_related_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='public_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='public_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_view_buckets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_rejected',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', False), ('is_rejected', False)), fields=['created_at', 'id'], name='comment_moderation_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from blog.threads import encode
+
+
+def set_root_paths(apps, schema_editor):
+    # Every existing comment is top-level
+    Comment = apps.get_model('blog', 'Comment')
+    batch = []
+    for comment in Comment.objects.only('pk').iterator(chunk_size=2000):
+        comment.path = encode(comment.pk)
+        batch.append(comment)
+        if len(batch) == 2000:
+            Comment.objects.bulk_update(batch, ['path'])
+            batch = []
+    Comment.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_comment_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='blog.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=252),
+        ),
+        migrations.RunPython(set_root_paths, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='commentoutbox',
+            name='parent_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_thread_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['path'], name='comment_path_idx'),
+        ),
+    ]
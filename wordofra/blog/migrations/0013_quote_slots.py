@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_quotes(apps, schema_editor):
+    Quote = apps.get_model('blog', 'Quote')
+    QuoteSlot = apps.get_model('blog', 'QuoteSlot')
+    QuoteSlot.objects.bulk_create(
+        [
+            QuoteSlot(position=position, quote_id=quote_id)
+            for position, quote_id in enumerate(Quote.objects.order_by('id').values_list('id', flat=True))
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteSlot',
+            fields=[
+                ('position', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('quote', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='slot', to='blog.quote')),
+            ],
+        ),
+        migrations.RunPython(index_quotes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_quote_slots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['-created_at', '-id'], name='quote_created_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_quote_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentImageConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('images', models.PositiveIntegerField(default=0)),
+                ('bytes_before', models.PositiveIntegerField(default=0)),
+                ('bytes_after', models.PositiveIntegerField(default=0)),
+                ('converted_at', models.DateTimeField()),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='image_conversion', to='blog.post')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentImageUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64)),
+                ('url', models.URLField(max_length=500)),
+                ('bytes', models.PositiveIntegerField()),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('post', 'digest'), name='content_image_upload_unique')],
+            },
+        ),
+    ]
@@ -1,9 +1,14 @@
-from django.db import models
+import uuid
+
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 from accounts.models import CustomUser
 from tinymce.models import HTMLField
 from cloudinary.models import CloudinaryField
+from blog import threads
+from blog.content import compute_derived_fields
 
 
 # Category model
@@ -21,6 +26,9 @@ def unique_slugify(instance, value, slug_field):
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True, editable=False)
+    # Maintained by blog.counters; public excludes restricted posts
+    published_post_count = models.PositiveIntegerField(default=0, editable=False)
+    public_post_count = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -35,6 +43,9 @@ class Category(models.Model):
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True, blank=True, editable=False)
+    # Maintained by blog.counters; public excludes restricted posts
+    published_post_count = models.PositiveIntegerField(default=0, editable=False)
+    public_post_count = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
         # Automatically generate slug from tag name if not provided
@@ -64,10 +75,29 @@ class Post(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
     is_restricted = models.BooleanField(default=False)  # For posts restricted to registered users
 
+    # Derived from content on save so list views never have to load or scan it
+    excerpt = models.TextField(blank=True, editable=False)
+    first_image_url = models.TextField(blank=True, null=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)  # In minutes
+    # Weighted full-text vector, maintained by blog.search (Postgres only)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    DERIVED_FIELDS = ('excerpt', 'first_image_url', 'word_count', 'reading_time')
+
+    def refresh_derived_fields(self):
+        """Recompute the columns derived from content."""
+        for field, value in compute_derived_fields(self.content).items():
+            setattr(self, field, value)
+
     def save(self, *args, **kwargs):
         # Automatically generate slug from title if not provided
         if not self.slug:
             self.slug = slugify(self.title)
+        self.refresh_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS)
         super(Post, self).save(*args, **kwargs)
 
     def __str__(self):
@@ -75,16 +105,43 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Newest-first listings of published posts, optionally narrowed
+            # by visibility, category or author (see PostViewSet.get_queryset)
+            models.Index(
+                fields=['-created_at', '-id'], name='post_published_created_idx',
+                condition=models.Q(status='published'),
+            ),
+            models.Index(
+                fields=['-created_at', '-id'], name='post_public_created_idx',
+                condition=models.Q(status='published', is_restricted=False),
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'], name='post_pub_category_idx',
+                condition=models.Q(status='published'),
+            ),
+            models.Index(
+                fields=['author', '-created_at', '-id'], name='post_pub_author_idx',
+                condition=models.Q(status='published'),
+            ),
+        ]
 
 class Quote(models.Model):
     content = models.TextField()
     owner = models.CharField(max_length=255) 
     owner_image = CloudinaryField('image', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True) 
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'Quote by {self.owner}'
 
+    class Meta:
+        indexes = [
+            # Newest-first cursor pages (see QuoteViewSet)
+            models.Index(fields=['-created_at', '-id'], name='quote_created_idx'),
+        ]
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, related_name='comments', on_delete=models.CASCADE, null=True, blank=True)
@@ -93,11 +150,202 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_approved = models.BooleanField(default=False)
+    is_rejected = models.BooleanField(default=False)  # Kept out of the moderation queue
+    # Reply threads as materialized paths (see blog.threads)
+    parent = models.ForeignKey('self', related_name='replies', on_delete=models.CASCADE, null=True, blank=True)
+    path = models.CharField(max_length=threads.PATH_MAX_LENGTH, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.post and not self.quote:
             raise ValueError("A comment must be linked to either a Post or a Quote.")
-        super().save(*args, **kwargs)
+        if not self._state.adding or self.path:
+            super().save(*args, **kwargs)
+            return
+        # The path ends with the comment's own id, known only after the INSERT
+        parent_path = self.parent.path if self.parent_id else ''
+        self.depth = self.parent.depth + 1 if self.parent_id else 0
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = threads.child_path(parent_path, self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
     def __str__(self):
         return f'Comment by {self.user} on {self.post if self.post else self.quote}'
+
+    class Meta:
+        indexes = [
+            # Newest-first listings of approved comments, optionally narrowed
+            # by post, quote or user (see CommentViewSet.get_queryset)
+            models.Index(
+                fields=['-created_at', '-id'], name='comment_approved_created_idx',
+                condition=models.Q(is_approved=True),
+            ),
+            models.Index(
+                fields=['post', '-created_at', '-id'], name='comment_appr_post_idx',
+                condition=models.Q(is_approved=True),
+            ),
+            models.Index(
+                fields=['quote', '-created_at', '-id'], name='comment_appr_quote_idx',
+                condition=models.Q(is_approved=True),
+            ),
+            models.Index(
+                fields=['user', '-created_at', '-id'], name='comment_appr_user_idx',
+                condition=models.Q(is_approved=True),
+            ),
+            # Depth-first threads of a post, and subtree ranges (see blog.threads)
+            models.Index(fields=['post', 'path'], name='comment_thread_post_idx'),
+            models.Index(fields=['path'], name='comment_path_idx'),
+            # Oldest-first moderation queue (see CommentModerationViewSet)
+            models.Index(
+                fields=['created_at', 'id'], name='comment_moderation_queue_idx',
+                condition=models.Q(is_approved=False, is_rejected=False),
+            ),
+        ]
+
+
+# Related posts, maintained by blog.related
+
+class PostTermVector(models.Model):
+    """The pruned, L2-normalized TF-IDF vector of a published post."""
+    post = models.OneToOneField(Post, primary_key=True, related_name='term_vector', on_delete=models.CASCADE)
+    terms = models.JSONField(default=dict)  # term -> weight
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Terms of {self.post_id}'
+
+
+class DocumentFrequency(models.Model):
+    """How many published posts contained ``term`` at the last full rebuild."""
+    term = models.CharField(max_length=255, unique=True)
+    documents = models.PositiveIntegerField()
+
+    def __str__(self):
+        return self.term
+
+
+class RelatedPost(models.Model):
+    """One of the precomputed nearest neighbours of ``post``."""
+    post = models.ForeignKey(Post, related_name='related_rows', on_delete=models.CASCADE)
+    related = models.ForeignKey(Post, related_name='incoming_related', on_delete=models.CASCADE)
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f'{self.related_id} related to {self.post_id}'
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='related_post_rank_unique'),
+            models.UniqueConstraint(fields=['post', 'related'], name='related_post_pair_unique'),
+        ]
+
+
+# View counts, written in bulk by blog.tracking
+
+class PostViewBucket(models.Model):
+    """Views of ``post`` during the hour starting at ``hour``."""
+    post = models.ForeignKey(Post, related_name='view_buckets', on_delete=models.CASCADE)
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.views} views of {self.post_id} at {self.hour:%Y-%m-%d %H:00}'
+
+    class Meta:
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'hour'], name='post_view_bucket_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='post_view_bucket_hour_idx'),
+        ]
+
+
+# Write-behind comment ingestion, drained by blog.ingestion
+
+class CommentOutbox(models.Model):
+    """A submitted comment waiting to be written to ``Comment`` in a batch."""
+    PENDING, PUBLISHED, DROPPED = 'pending', 'published', 'dropped'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (PUBLISHED, 'Published'), (DROPPED, 'Dropped')]
+
+    tracking_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(CustomUser, related_name='+', on_delete=models.CASCADE)
+    # Validated against cached ids and again when flushed; no foreign keys, so
+    # a burst of submissions takes no locks on the post or quote rows
+    post_id = models.BigIntegerField(null=True, blank=True)
+    quote_id = models.BigIntegerField(null=True, blank=True)
+    parent_id = models.BigIntegerField(null=True, blank=True)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    comment = models.ForeignKey(Comment, null=True, blank=True, related_name='+', on_delete=models.SET_NULL)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.tracking_id} ({self.status})'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], name='comment_outbox_pending_idx', condition=models.Q(status='pending')),
+        ]
+
+
+# Dense quote index for the quote of the day, maintained by blog.quote_rotation
+
+class QuoteSlot(models.Model):
+    """Gives each quote a position in 0..n-1 with no gaps, so picking one is a key lookup."""
+    position = models.PositiveIntegerField(primary_key=True)
+    quote = models.OneToOneField(Quote, related_name='slot', on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f'{self.position}: {self.quote_id}'
+
+
+# Checkpoints of the convert_base64_to_cloudinary command
+
+class ContentImageUpload(models.Model):
+    """An inline base64 image of ``post`` that has been uploaded; reruns reuse ``url``."""
+    post = models.ForeignKey(Post, related_name='+', on_delete=models.CASCADE)
+    digest = models.CharField(max_length=64)  # SHA-256 of the base64 payload
+    url = models.URLField(max_length=500)
+    bytes = models.PositiveIntegerField()
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.digest[:12]} of {self.post_id}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'digest'], name='content_image_upload_unique'),
+        ]
+
+
+class ContentImageConversion(models.Model):
+    """``post`` was fully converted at ``converted_at``; skipped until it is edited again."""
+    post = models.OneToOneField(Post, related_name='image_conversion', on_delete=models.CASCADE)
+    images = models.PositiveIntegerField(default=0)
+    bytes_before = models.PositiveIntegerField(default=0)
+    bytes_after = models.PositiveIntegerField(default=0)
+    converted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.post_id} converted at {self.converted_at:%Y-%m-%d %H:%M}'
+
+
+# Content-addressed image registry, maintained by blog.images
+
+class ImageAsset(models.Model):
+    """An uploaded image, found by the SHA-256 of its bytes so it is uploaded only once."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    url = models.URLField(max_length=500)
+    public_id = models.CharField(max_length=255)
+    bytes = models.PositiveIntegerField()
+    reuses = models.PositiveIntegerField(default=0)  # Uploads avoided by finding this row
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.public_id
@@ -0,0 +1,34 @@
+"""
+Batched comment moderation.
+
+``approve`` and ``reject`` change any number of comments with a single
+``UPDATE`` and invalidate cached comment data once per batch. They bypass
+``Comment.save()`` and its per-row signals on purpose. Rejected comments
+are kept, hidden from the API and out of the moderation queue.
+"""
+from blog.cache import bump_generation
+from blog.models import Comment
+
+MAX_BATCH = 5000
+
+
+def queue():
+    """Comments awaiting a decision, oldest first."""
+    return Comment.objects.filter(is_approved=False, is_rejected=False).order_by('created_at', 'id')
+
+
+def _decide(comment_ids, approved):
+    updated = Comment.objects.filter(pk__in=comment_ids).update(is_approved=approved, is_rejected=not approved)
+    if updated:
+        bump_generation('comment')
+    return updated
+
+
+def approve(comment_ids):
+    """Approve the comments with ``comment_ids``; returns how many exist."""
+    return _decide(comment_ids, approved=True)
+
+
+def reject(comment_ids):
+    """Reject (and unpublish) the comments with ``comment_ids``; returns how many exist."""
+    return _decide(comment_ids, approved=False)
@@ -0,0 +1,176 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed ordering.
+
+    Each page is fetched with a ``WHERE (created_at, id) < (...)`` style
+    condition instead of ``OFFSET``, and without a ``COUNT(*)``, so every page
+    costs the same regardless of depth. The last field of ``ordering`` must be
+    unique to keep the order stable when earlier fields tie. Cursors are
+    signed, so clients cannot forge or edit them. The order is fixed, so a
+    view's ordering and search parameters are rejected with a 400 rather
+    than silently ignored.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    ordering = ('-created_at', '-id')
+    signing_salt = 'blog.pagination.KeysetPagination'
+    invalid_cursor_message = 'Invalid cursor'
+    unsupported_param_message = 'Not supported with cursor pagination; use page numbers instead.'
+
+    @classmethod
+    def is_requested(cls, request):
+        """Cursor mode is opt-in: ?pagination=cursor, or any ?cursor= value."""
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get(cls.mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.check_query_params(request, view)
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-'), queryset.model._meta.get_field(name.lstrip('-')))
+            for name in self.ordering
+        ]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = [('-' if desc != reverse else '') + name for name, desc, _ in self.fields]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_condition(position, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def check_query_params(self, request, view):
+        """Reject the ordering and search parameters of the view's filter backends."""
+        for backend in getattr(view, 'filter_backends', ()):
+            for attr in ('ordering_param', 'search_param'):
+                param = getattr(backend, attr, None)
+                if param and request.query_params.get(param):
+                    raise exceptions.ValidationError({param: [self.unsupported_param_message]})
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def _seek_condition(self, position, reverse):
+        """Rows strictly after ``position`` in the (possibly reversed) ordering."""
+        condition = Q()
+        for index, (name, desc, _) in enumerate(self.fields):
+            lookup = 'lt' if desc != reverse else 'gt'
+            clause = Q(**{f'{name}__{lookup}': position[index]})
+            for prior_index in range(index):
+                clause &= Q(**{self.fields[prior_index][0]: position[prior_index]})
+            condition |= clause
+        # Redundant bound on the leading field so the database can range-scan an index
+        name, desc, _ = self.fields[0]
+        return Q(**{f"{name}__{'lte' if desc != reverse else 'gte'}": position[0]}) & condition
+
+    def encode_cursor(self, obj, reverse):
+        position = [field.value_to_string(obj) for _, _, field in self.fields]
+        token = signing.dumps({'p': position, 'r': reverse}, salt=self.signing_salt, compress=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = signing.loads(token, salt=self.signing_salt)
+            position = [
+                field.to_python(value) for (_, _, field), value in zip(self.fields, payload['p'], strict=True)
+            ]
+            reverse = bool(payload['r'])
+        except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque cursor returned in the next/previous links.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class KeysetPaginationMixin:
+    """
+    Lets a viewset switch from its page-number ``pagination_class`` to
+    ``keyset_pagination_class`` when the client opts in to cursor mode.
+    """
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.keyset_pagination_class and self.keyset_pagination_class.is_requested(self.request):
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
@@ -0,0 +1,136 @@
+"""
+Column projection for list endpoints.
+
+``projected_fields`` works out which model columns a serializer reads, so a
+list queryset can be restricted with ``QuerySet.only()`` and never fetch
+large columns such as ``Post.content`` that the list output drops.
+
+``forbid_deferred_loading`` is the safety net: while it is active (and the
+``BLOG_STRICT_QUERY_PROJECTION`` setting is on, as it is in the test suite),
+touching a deferred field raises instead of silently issuing a per-row query.
+The guard replaces ``DeferredAttribute.__get__`` only while at least one
+guarded block is running and restores Django's own when the last one exits.
+"""
+import contextvars
+import functools
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.query_utils import DeferredAttribute
+from rest_framework import serializers
+
+
+class DeferredFieldLoadError(RuntimeError):
+    """A deferred field was loaded lazily while projection was enforced."""
+
+
+@functools.cache
+def projected_fields(serializer_class):
+    """Return the ``only()`` paths needed to serialize with ``serializer_class``."""
+    paths, full_relations = set(), set()
+    _collect(serializer_class(), serializer_class.Meta.model, '', paths, full_relations)
+    # A relation rendered through __str__ (or similar) needs its whole row
+    return sorted(
+        path for path in paths
+        if not any(path.startswith(relation + '__') for relation in full_relations)
+    )
+
+
+def _collect(serializer, model, prefix, paths, full_relations):
+    opts = model._meta
+    paths.add(prefix + opts.pk.name)
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            # Method fields must only read projected columns; the guard enforces it
+            continue
+        bits = field.source.split('.')
+        try:
+            model_field = opts.get_field(bits[0])
+        except FieldDoesNotExist:
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            continue  # Loaded separately with prefetch_related()
+        paths.add(prefix + model_field.name)
+        if not model_field.is_relation:
+            continue
+
+        relation = prefix + model_field.name
+        related_opts = model_field.related_model._meta
+        if isinstance(field, serializers.BaseSerializer):
+            _collect(field, model_field.related_model, relation + '__', paths, full_relations)
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            pass  # Reads the local foreign key column only
+        elif isinstance(field, serializers.SlugRelatedField):
+            paths.add(f'{relation}__{field.slug_field}')
+        elif len(bits) == 2 and _is_concrete(related_opts, bits[1]):
+            paths.add(f'{relation}__{bits[1]}')
+        else:
+            full_relations.add(relation)
+
+
+def _is_concrete(opts, name):
+    try:
+        return opts.get_field(name).concrete
+    except FieldDoesNotExist:
+        return False
+
+
+_guard_active = contextvars.ContextVar('blog_deferred_guard', default=False)
+_unguarded_get = DeferredAttribute.__get__
+_patch_lock = threading.Lock()
+_patch_users = 0
+
+
+def _guarded_get(self, instance, cls=None):
+    if (
+        instance is not None
+        and _guard_active.get()
+        and self.field.attname not in instance.__dict__
+        and self._check_parent_chain(instance) is None
+    ):
+        raise DeferredFieldLoadError(
+            f'{instance.__class__.__name__}.{self.field.attname} was deferred by the list '
+            f'projection and would be loaded with one query per row.'
+        )
+    return _unguarded_get(self, instance, cls)
+
+
+@contextmanager
+def forbid_deferred_loading():
+    if not getattr(settings, 'BLOG_STRICT_QUERY_PROJECTION', False):
+        yield
+        return
+    global _patch_users
+    with _patch_lock:
+        if not _patch_users:
+            DeferredAttribute.__get__ = _guarded_get
+        _patch_users += 1
+    token = _guard_active.set(True)
+    try:
+        yield
+    finally:
+        _guard_active.reset(token)
+        with _patch_lock:
+            _patch_users -= 1
+            if not _patch_users:
+                DeferredAttribute.__get__ = _unguarded_get
+
+
+class ProjectedListMixin:
+    """
+    Restricts ``list`` querysets to the columns the list serializer reads.
+    Add columns read by method fields or properties to ``projection_extra_fields``.
+    """
+    projection_extra_fields = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = queryset.only(*projected_fields(self.get_serializer_class()), *self.projection_extra_fields)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        with forbid_deferred_loading():
+            return super().list(request, *args, **kwargs)
@@ -0,0 +1,165 @@
+"""
+Quote of the day and random quotes without ``ORDER BY RANDOM()``.
+
+Every quote holds a slot in a dense index (``QuoteSlot``): positions 0 to
+n-1 with no gaps. A new quote takes position n. A deleted quote's position
+is filled by the last slot (swap-remove). Picking a quote is therefore a
+primary-key lookup once n is known, and n is cached per quote generation
+for at most ``COUNT_TIMEOUT`` seconds, so a missed bump heals itself.
+
+The quote of day ``d`` sits at position ``(d * step) mod n``. ``step`` is
+coprime with n, so every quote is featured once every n days, in an order
+that jumps around the collection instead of following insertion order.
+The day's choice is cached until midnight UTC, keyed on the day alone, so
+adding or editing other quotes never swaps it mid-day; only deleting the
+chosen quote does. Its serialized form is refreshed when quotes change.
+"""
+import math
+import random
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from blog.cache import bump_generation, get_generations
+from blog.models import Quote, QuoteSlot
+
+COUNT_KEY = 'blog:quote-slots:{generation}'
+COUNT_TIMEOUT = 60 * 5
+PICK_KEY = 'blog:quote-of-the-day:{day}'
+DAILY_KEY = 'blog:quote-of-the-day:{day}:{generation}'
+GOLDEN_RATIO = (math.sqrt(5) - 1) / 2
+ADD_ATTEMPTS = 3
+
+
+def _last_position():
+    return QuoteSlot.objects.order_by('-position').values_list('position', flat=True).first()
+
+
+def slot_count():
+    """How many quotes are indexed; cached until a quote changes, for at most ``COUNT_TIMEOUT``."""
+    key = COUNT_KEY.format(generation=get_generations(['quote'])['quote'])
+    count = cache.get(key)
+    if count is None:
+        last = _last_position()
+        count = 0 if last is None else last + 1
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def rotation_step(count):
+    """A step coprime with ``count`` near ``count`` / golden ratio, so consecutive days land far apart."""
+    step = max(int(count * GOLDEN_RATIO), 1)
+    while math.gcd(step, count) != 1:
+        step += 1
+    return step
+
+
+def daily_position(day, count):
+    return (day.toordinal() * rotation_step(count)) % count
+
+
+def quote_at(position):
+    return Quote.objects.filter(slot__position=position).first()
+
+
+def add(quote):
+    """Index a new quote at the end."""
+    for attempt in range(ADD_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                if QuoteSlot.objects.filter(quote=quote).exists():
+                    return
+                last = _last_position()
+                QuoteSlot.objects.create(position=0 if last is None else last + 1, quote=quote)
+            break
+        except IntegrityError:
+            # A concurrent add took the position; read the new end and retry
+            if attempt == ADD_ATTEMPTS - 1:
+                raise
+    bump_generation('quote')
+
+
+def fill(position):
+    """Move the last slot into ``position``, left empty by a deleted quote."""
+    with transaction.atomic():
+        while True:
+            # Lock the tail so concurrent deletes cannot both move it. A waiter
+            # gets the row back after it has moved, so check it is still last.
+            last = QuoteSlot.objects.select_for_update().order_by('-position').values_list('position', flat=True).first()
+            if last is None or last <= position:
+                break
+            if _last_position() == last:
+                QuoteSlot.objects.filter(position=last).update(position=position)
+                break
+    bump_generation('quote')
+
+
+def rebuild():
+    """Renumber every quote from scratch, oldest first."""
+    with transaction.atomic():
+        QuoteSlot.objects.all().delete()
+        QuoteSlot.objects.bulk_create(
+            [
+                QuoteSlot(position=position, quote_id=quote_id)
+                for position, quote_id in enumerate(Quote.objects.order_by('id').values_list('id', flat=True))
+            ],
+            batch_size=2000,
+        )
+    bump_generation('quote')
+
+
+def seconds_until_midnight(now=None):
+    now = now or timezone.now()
+    midnight = datetime.combine(now.astimezone(dt_timezone.utc).date() + timedelta(days=1), time(), dt_timezone.utc)
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def _pick(position_for):
+    count = slot_count()
+    if not count:
+        return None
+    quote = quote_at(position_for(count))
+    if quote is None:
+        # The cached count is behind a deletion; retry with the real one
+        cache.delete(COUNT_KEY.format(generation=get_generations(['quote'])['quote']))
+        count = slot_count()
+        if not count:
+            return None
+        position = position_for(count)
+        # Still missing if a concurrent delete left a hole: take the next slot
+        quote = quote_at(position) or (
+            Quote.objects.filter(slot__position__gte=position).order_by('slot__position').first()
+            or Quote.objects.filter(slot__isnull=False).order_by('slot__position').first()
+        )
+    return quote
+
+
+def daily(serialize, now=None):
+    """
+    Serialized quote of the UTC day, or None when there are no quotes. The
+    result is cached until midnight UTC, or until a quote changes.
+    """
+    now = now or timezone.now()
+    today = now.astimezone(dt_timezone.utc).date()
+    day = today.isoformat()
+    key = DAILY_KEY.format(day=day, generation=get_generations(['quote'])['quote'])
+    data = cache.get(key)
+    if data is None:
+        timeout = seconds_until_midnight(now)
+        quote_id = cache.get(PICK_KEY.format(day=day))
+        quote = Quote.objects.filter(pk=quote_id).first() if quote_id is not None else None
+        if quote is None:
+            # First request of the day, or the chosen quote was deleted
+            quote = _pick(lambda count: daily_position(today, count))
+            if quote is None:
+                return None
+            cache.set(PICK_KEY.format(day=day), quote.pk, timeout)
+        data = serialize(quote)
+        cache.set(key, data, timeout)
+    return data
+
+
+def random_quote():
+    return _pick(random.randrange)
@@ -0,0 +1,244 @@
+"""
+Related posts from TF-IDF cosine similarity.
+
+Every published post gets a sparse term vector (``PostTermVector``) built
+from its title, body text, tags and category, weighted by TF-IDF, pruned to
+its ``MAX_TERMS`` strongest terms and L2-normalized so that a dot product is
+the cosine similarity. The ``NEIGHBOURS`` most similar posts are stored as
+``RelatedPost`` rows, so serving them is a plain indexed read.
+
+``rebuild`` computes all vectors and document frequencies, then every
+post's neighbours in one batched pass: an inverted index over the vectors
+is multiplied against each vector (a sparse A x A^T product). ``update_post``
+handles a single saved post using the document frequencies of the last
+rebuild: it only scores posts sharing a selective term with it and patches
+their neighbour lists. Category terms and terms found in more than
+``CANDIDATE_MAX_SHARE`` of the posts still count towards the scores but do
+not pull in candidates, as nearly every post would share them. A neighbour list that loses an entry that way is refilled
+by the next rebuild.
+
+Signals call ``schedule_update`` rather than ``update_post``: saving a post
+and then setting its tags fires several signals, and they share one
+recompute that runs when the transaction commits.
+"""
+import heapq
+import itertools
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from blog.cache import bump_generation
+from blog.cache import bump_generation
+from blog.content import search_text
+from blog.models import DocumentFrequency, Post, PostTermVector, RelatedPost
+
+NEIGHBOURS = 10
+MAX_TERMS = 64
+# Raw term counts are scaled by where the term appears
+TITLE_WEIGHT = 3
+TAXONOMY_WEIGHT = 2
+BODY_WEIGHT = 1
+# Terms in more than this share of posts (and over CANDIDATE_MIN_DOCUMENTS) select no candidates
+CANDIDATE_MAX_SHARE = 0.1
+CANDIDATE_MIN_DOCUMENTS = 50
+
+_scheduled = threading.local()
+
+TOKEN_PATTERN = re.compile(r'[^\W_]{3,}', re.UNICODE)
+STOP_WORDS = frozenset("""
+    about above after again against all also and any are because been before being below between both
+    but can could did does doing down during each few for from further had has have having her here
+    hers herself him himself his how into its itself just more most myself nor not now off once only
+    other our ours ourselves out over own same she should some such than that the their theirs them
+    themselves then there these they this those through too under until very was were what when where
+    which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def term_counts(title, content, category_slug, tag_slugs):
+    """Weighted raw counts of every feature of a post."""
+    counts = Counter()
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    for token in tokenize(search_text(content)):
+        counts[token] += BODY_WEIGHT
+    for slug in tag_slugs:
+        counts[f'tag:{slug}'] += TAXONOMY_WEIGHT
+    if category_slug:
+        counts[f'category:{category_slug}'] += TAXONOMY_WEIGHT
+    return counts
+
+
+def weigh(counts, document_frequencies, documents):
+    """Sublinear TF x smoothed IDF, pruned to ``MAX_TERMS`` and L2-normalized."""
+    weights = {
+        term: (1 + math.log(count)) * (math.log((1 + documents) / (1 + document_frequencies.get(term, 0))) + 1)
+        for term, count in counts.items()
+    }
+    strongest = heapq.nlargest(MAX_TERMS, weights.items(), key=lambda item: (item[1], item[0]))
+    norm = math.sqrt(sum(weight * weight for _, weight in strongest)) or 1.0
+    return {term: weight / norm for term, weight in strongest}
+
+
+def cosine(vector, other):
+    if len(other) < len(vector):
+        vector, other = other, vector
+    return sum(weight * other.get(term, 0.0) for term, weight in vector.items())
+
+
+def top_neighbours(scores):
+    """The ``NEIGHBOURS`` best (post id, score) pairs, ties broken by id."""
+    positive = ((post_id, score) for post_id, score in scores.items() if score > 0)
+    return heapq.nsmallest(NEIGHBOURS, positive, key=lambda item: (-item[1], item[0]))
+
+
+def _rows(post_id, neighbours):
+    return [
+        RelatedPost(post_id=post_id, related_id=related_id, score=score, rank=rank)
+        for rank, (related_id, score) in enumerate(neighbours, start=1)
+    ]
+
+
+def _published_features():
+    """(post id, weighted counts) for every published post, in two queries."""
+    tags = defaultdict(list)
+    for post_id, slug in Post.tags.through.objects.filter(post__status='published').values_list(
+        'post_id', 'tag__slug'
+    ):
+        tags[post_id].append(slug)
+    posts = Post.objects.filter(status='published').values_list('pk', 'title', 'content', 'category__slug')
+    for post_id, title, content, category_slug in posts.iterator(chunk_size=500):
+        yield post_id, term_counts(title, content, category_slug, tags[post_id])
+
+
+def rebuild():
+    """Recompute every vector, document frequency and neighbour list."""
+    features = dict(_published_features())
+    document_frequencies = Counter()
+    for counts in features.values():
+        document_frequencies.update(counts.keys())
+    vectors = {
+        post_id: weigh(counts, document_frequencies, len(features))
+        for post_id, counts in features.items()
+    }
+
+    postings = defaultdict(list)
+    for post_id, vector in vectors.items():
+        for term, weight in vector.items():
+            postings[term].append((post_id, weight))
+    rows = []
+    for post_id, vector in vectors.items():
+        scores = defaultdict(float)
+        for term, weight in vector.items():
+            for other_id, other_weight in postings[term]:
+                if other_id != post_id:
+                    scores[other_id] += weight * other_weight
+        rows += _rows(post_id, top_neighbours(scores))
+
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        PostTermVector.objects.all().delete()
+        DocumentFrequency.objects.all().delete()
+        DocumentFrequency.objects.bulk_create(
+            [DocumentFrequency(term=term, documents=count) for term, count in document_frequencies.items()],
+            batch_size=2000,
+        )
+        PostTermVector.objects.bulk_create(
+            [PostTermVector(post_id=post_id, terms=vector) for post_id, vector in vectors.items()],
+            batch_size=500,
+        )
+        RelatedPost.objects.bulk_create(rows, batch_size=2000)
+    return len(vectors)
+
+
+def update_post(post):
+    """Refresh one post's vector and neighbours after it was saved."""
+    if post.status != 'published':
+        remove_post(post.pk)
+        return
+
+    counts = term_counts(
+        post.title, post.content, post.category.slug, post.tags.values_list('slug', flat=True)
+    )
+    document_frequencies = dict(
+        DocumentFrequency.objects.filter(term__in=list(counts)).values_list('term', 'documents')
+    )
+    documents = max(PostTermVector.objects.count(), 1)
+    vector = weigh(counts, document_frequencies, documents)
+
+    common = max(CANDIDATE_MIN_DOCUMENTS, documents * CANDIDATE_MAX_SHARE)
+    selective = [
+        term for term in vector
+        if not term.startswith('category:') and document_frequencies.get(term, 0) <= common
+    ]
+
+    with transaction.atomic():
+        PostTermVector.objects.update_or_create(post_id=post.pk, defaults={'terms': vector})
+        # Posts sharing a selective term, plus any that listed this post before the edit
+        condition = Q(post__related_rows__related_id=post.pk)
+        if selective:
+            condition |= Q(terms__has_any_keys=selective)
+        candidates = dict(
+            PostTermVector.objects.filter(condition)
+            .exclude(post_id=post.pk)
+            .distinct()
+            .values_list('post_id', 'terms')
+        ) if vector else {}
+        scores = {other_id: cosine(vector, terms) for other_id, terms in candidates.items()}
+
+        current = defaultdict(list)
+        for row in RelatedPost.objects.filter(post_id__in=[post.pk, *candidates]):
+            current[row.post_id].append((row.related_id, row.score))
+
+        changed = {post.pk: top_neighbours(scores)}
+        for other_id in candidates:
+            merged = {related_id: score for related_id, score in current[other_id] if related_id != post.pk}
+            merged[post.pk] = scores[other_id]
+            neighbours = top_neighbours(merged)
+            if neighbours != current[other_id]:
+                changed[other_id] = neighbours
+
+        RelatedPost.objects.filter(post_id__in=list(changed)).delete()
+        RelatedPost.objects.bulk_create([
+            row for post_id, neighbours in changed.items() for row in _rows(post_id, neighbours)
+        ])
+
+
+def remove_post(post_id):
+    """Drop a post that is no longer published from the index."""
+    RelatedPost.objects.filter(Q(post_id=post_id) | Q(related_id=post_id)).delete()
+    PostTermVector.objects.filter(post_id=post_id).delete()
+
+
+def schedule_update(post_id):
+    """Run ``update_post`` for a post once the transaction commits; calls before one run share it."""
+    state = _scheduled.__dict__
+    if 'ticks' not in state:
+        state.update(ticks=itertools.count(), last_run={})
+    scheduled_at = next(state['ticks'])
+
+    def run():
+        # Every call queued its own callback. The first to run covers all the
+        # calls made before it; the rest skip. A rollback only drops callbacks.
+        if state['last_run'].get(post_id, -1) > scheduled_at:
+            return
+        state['last_run'][post_id] = next(state['ticks'])
+        post = Post.objects.select_related('category').filter(pk=post_id).first()
+        if post is not None:  # Reloaded, so the recompute sees the final fields and tags
+            update_post(post)
+            # The save bumped the generation before the neighbours changed, so a
+            # related list cached in between would otherwise outlive them
+            bump_generation('post')
+            # The save bumped the generation before the neighbours changed, so a
+            # related list cached in between would otherwise outlive them
+            bump_generation('post')
+
+    transaction.on_commit(run)
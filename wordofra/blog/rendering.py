@@ -0,0 +1,227 @@
+"""
+Rendering pipeline for post bodies.
+
+TinyMCE stores content with editor cruft: inline styles, ``data-mce-*``
+attributes, empty paragraphs and plenty of whitespace. ``render_content``
+turns it into the HTML the API serves:
+
+* sanitized against a whitelist of tags, attributes and URL schemes,
+* minified (whitespace collapsed outside ``<pre>``, empty attributes and
+  empty paragraphs dropped),
+* with every heading given a normalized, unique ``id`` anchor,
+* with every ``<img>`` of an original Cloudinary upload given a responsive
+  ``src``/``srcset`` (see blog.responsive).
+
+Output only depends on the content, so it is cached by content hash and
+``RENDER_VERSION``; bump the version whenever the rules change. Edits and
+version bumps leave the old entries unreachable, so they expire after
+``BLOG_RENDER_CACHE_TIMEOUT`` seconds.
+"""
+import hashlib
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import slugify
+
+from blog import responsive
+
+RENDER_VERSION = 2
+RENDERED_KEY = 'blog:rendered:{version}:{digest}'
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup', 'small', 'mark',
+    'blockquote', 'pre', 'code', 'ul', 'ol', 'li', 'a', 'img', 'figure', 'figcaption',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'ol': {'start'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'code': {'class'},
+    'pre': {'class'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+# Posts still embed base64 images (see convert_base64_to_cloudinary)
+DATA_IMAGE_PREFIX = 'data:image/'
+# Dropped together with everything inside them
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template', 'svg', 'math'}
+VOID_TAGS = {'br', 'hr', 'img'}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+# Paragraph-level tags between which whitespace carries no meaning
+BLOCK_TAGS = {
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'ul', 'ol', 'li', 'hr',
+    'figure', 'figcaption', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption',
+}
+
+WHITESPACE = re.compile(r'[ \t\n\r\f]+')
+SCHEME = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+CODE_CLASS = re.compile(r'^language-[\w+-]+$')
+
+
+class _Renderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open = []  # Allowed tags currently open
+        self.dropping = None  # The dropped tag being skipped, if any
+        self.dropping_depth = 0
+        self.preformatted = 0
+        self.anchors = {}
+        self.heading = None  # (index in out, tag) of the open heading
+
+    # Parser callbacks
+
+    def handle_starttag(self, tag, attrs):
+        if self.dropping:
+            self.dropping_depth += tag == self.dropping
+            return
+        if tag in DROPPED_TAGS:
+            self.dropping, self.dropping_depth = tag, 1
+            return
+        if tag not in ALLOWED_TAGS:
+            return  # Unwrapped: its text is kept
+        attributes = self.clean_attributes(tag, attrs)
+        if tag == 'img':
+            if 'src' not in attributes:
+                return
+            attributes = responsive.rewrite_img(attributes)
+        if tag in BLOCK_TAGS:
+            self.trim_trailing_space()
+        if tag in HEADING_TAGS and self.heading is None:
+            self.heading = (len(self.out), tag)
+        self.out.append(f'<{tag}{self.format_attributes(attributes)}>')
+        if tag in VOID_TAGS:
+            return
+        self.open.append(tag)
+        if tag == 'pre':
+            self.preformatted += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            self.dropping_depth -= tag == self.dropping
+            if not self.dropping_depth:
+                self.dropping = None
+            return
+        if tag not in self.open:
+            return  # Stray or unwrapped end tag
+        while self.open:
+            name = self.open.pop()
+            self.close_tag(name)
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        if not self.preformatted:
+            data = WHITESPACE.sub(' ', data)
+            previous = self.out[-1] if self.out else ''
+            if data.startswith(' ') and (not previous or previous.endswith(' ') or self.after_block(previous)):
+                data = data[1:]
+            if not data:
+                return
+        self.out.append(escape(data, quote=False))
+
+    # Output helpers
+
+    def close_tag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.trim_trailing_space()
+        if tag == 'pre':
+            self.preformatted -= 1
+        if self.heading and self.heading[1] == tag:
+            self.add_anchor()
+        if tag == 'p':
+            # Empty paragraphs (often just &nbsp;) are editor spacing
+            if self.out[-1] != '<p>' and not self.out[-1].startswith('<') and not self.out[-1].strip(' \xa0'):
+                self.out.pop()
+            if self.out[-1] == '<p>':
+                self.out.pop()
+                return
+        self.out.append(f'</{tag}>')
+
+    def add_anchor(self):
+        index, tag = self.heading
+        self.heading = None
+        text = unescape(''.join(part for part in self.out[index + 1:] if not part.startswith('<')))
+        base = slugify(text.replace('\xa0', ' ')) or 'section'
+        self.anchors[base] = count = self.anchors.get(base, 0) + 1
+        anchor = base if count == 1 else f'{base}-{count}'
+        self.out[index] = f'<{tag} id="{anchor}">'
+
+    def trim_trailing_space(self):
+        if self.out and not self.out[-1].startswith('<') and self.out[-1].endswith(' '):
+            self.out[-1] = self.out[-1].rstrip(' ')
+            if not self.out[-1]:
+                self.out.pop()
+
+    @staticmethod
+    def after_block(part):
+        match = re.match(r'^</?([a-z0-9]+)', part)
+        return bool(match) and match.group(1) in BLOCK_TAGS | {'br'}
+
+    @staticmethod
+    def clean_attributes(tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+        attributes = {}
+        for name, value in attrs:
+            value = (value or '').strip()
+            if name not in allowed or not value:
+                continue
+            if name in URL_ATTRIBUTES and not _is_safe_url(value, allow_data_image=tag == 'img'):
+                continue
+            if name == 'class' and not CODE_CLASS.match(value):
+                continue
+            attributes[name] = value
+        return attributes
+
+    @staticmethod
+    def format_attributes(attributes):
+        return ''.join(f' {name}="{escape(value)}"' for name, value in attributes.items())
+
+    def render(self, html):
+        self.feed(html)
+        self.close()
+        while self.open:
+            self.close_tag(self.open.pop())
+        return ''.join(self.out).strip()
+
+
+def _is_safe_url(url, allow_data_image=False):
+    compact = re.sub(r'[\x00-\x20]', '', url)
+    if allow_data_image and compact.lower().startswith(DATA_IMAGE_PREFIX):
+        return True
+    match = SCHEME.match(compact)
+    return match is None or match.group(1).lower() in ALLOWED_SCHEMES
+
+
+def render_html(html):
+    """Run the pipeline on ``html``; uncached."""
+    return _Renderer().render(html or '')
+
+
+def get_render_cache_timeout():
+    return getattr(settings, 'BLOG_RENDER_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def render_content(html):
+    """Rendered ``html``, computed once per distinct content and pipeline version."""
+    digest = hashlib.sha256((html or '').encode()).hexdigest()
+    key = RENDERED_KEY.format(version=RENDER_VERSION, digest=digest)
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = render_html(html)
+        cache.set(key, rendered, get_render_cache_timeout())
+    return rendered
@@ -0,0 +1,82 @@
+"""
+Responsive URL sets for Cloudinary images.
+
+Image fields used to be served as a single original-size reference, so
+phones downloaded full-resolution files. ``image_set`` describes each image
+at several widths instead, as an ``<img>`` ``src`` plus a ``srcset``. Every
+variant has Cloudinary pick the format and quality (``f_auto``/``q_auto``)
+and is capped at its width without upscaling (``c_limit``).
+
+Building the URLs is pure string work on the public id and version, so the
+result is memoized per image; a new upload gets a new version and therefore
+new URLs. ``rewrite_img`` applies the same sets to ``<img>`` tags in post
+bodies (see blog.rendering), and ``ImageSetField`` exposes them in the
+blog and portfolio serializers.
+"""
+import re
+from functools import lru_cache
+
+import cloudinary
+from cloudinary.utils import cloudinary_url
+from rest_framework import serializers
+
+WIDTHS = (320, 640, 960, 1280, 1920)
+DEFAULT_WIDTH = 960  # The ``src`` fallback for clients without srcset support
+CONTENT_SIZES = '(max-width: 960px) 100vw, 960px'  # Post bodies are at most 960px wide
+
+# Untransformed delivery URLs: .../<cloud>/image/upload/[v<version>/]<public id>[.<format>]
+CLOUDINARY_URL = re.compile(
+    r'^https?://res\.cloudinary\.com/(?P<cloud_name>[^/]+)/image/upload/'
+    r'(?:v(?P<version>\d+)/)?(?P<public_id>[^?#]+?)(?:\.(?P<format>[a-zA-Z0-9]+))?$'
+)
+TRANSFORMATION = re.compile(r'^[a-z]{1,3}_[^/,]+(?:,[a-z]{1,3}_[^/,]+)*$')
+
+
+@lru_cache(maxsize=4096)
+def build_image_set(public_id, version, format, cloud_name):
+    """(src, srcset) for one image; memoized, as the URLs never change for a given version."""
+    def url(width):
+        return cloudinary_url(
+            public_id, version=version, format=format, cloud_name=cloud_name,
+            secure=True, crop='limit', width=width, fetch_format='auto', quality='auto',
+        )[0]
+    srcset = ', '.join(f'{url(width)} {width}w' for width in WIDTHS)
+    return url(DEFAULT_WIDTH), srcset
+
+
+def image_set(resource):
+    """The src/srcset of a CloudinaryField value; None without an image or a configured cloud."""
+    public_id = getattr(resource, 'public_id', None)
+    cloud_name = cloudinary.config().cloud_name
+    if not public_id or not cloud_name:
+        return None
+    src, srcset = build_image_set(public_id, str(resource.version or '') or None, resource.format or None, cloud_name)
+    return {'src': src, 'srcset': srcset, 'widths': list(WIDTHS)}
+
+
+class ImageSetField(serializers.Field):
+    """The ``image_set`` of a CloudinaryField, as a read-only serializer field."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return image_set(value)
+
+
+def parse_url(url):
+    """(public id, version, format, cloud name) of an untransformed Cloudinary image URL, or None."""
+    match = CLOUDINARY_URL.match(url)
+    if match is None or TRANSFORMATION.match(match['public_id'].split('/', 1)[0]):
+        return None
+    return match['public_id'], match['version'], match['format'], match['cloud_name']
+
+
+def rewrite_img(attributes):
+    """Give an ``<img>`` pointing at an original Cloudinary upload a responsive src/srcset."""
+    parsed = parse_url(attributes.get('src', ''))
+    if parsed is None:
+        return attributes
+    src, srcset = build_image_set(*parsed)
+    return {**attributes, 'src': src, 'srcset': srcset, 'sizes': CONTENT_SIZES}
@@ -0,0 +1,151 @@
+"""
+Full-text search for blog posts.
+
+Production runs on Postgres, where each post keeps a weighted ``tsvector`` in
+``Post.search_vector`` backed by a GIN index. SQLite (local development) uses
+an FTS5 virtual table, ``blog_post_fts``, keyed by the post id. Both backends
+weight matches in the title above tags, and tags above the body text, and are
+kept up to date by the signal handlers in ``blog.signals``.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+from blog.content import search_text
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'blog_post_fts'
+# bm25() column weights for the FTS5 table: title, tags, body
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _tag_text(post):
+    return ' '.join(tag.name for tag in post.tags.all())
+
+
+class PostgresSearchBackend:
+    def index_post(self, post):
+        from blog.models import Post
+
+        Post.objects.filter(pk=post.pk).update(
+            search_vector=(
+                SearchVector(F('title'), weight='A', config=SEARCH_CONFIG)
+                + SearchVector(Value(_tag_text(post)), weight='B', config=SEARCH_CONFIG)
+                + SearchVector(Value(search_text(post.content)), weight='C', config=SEARCH_CONFIG)
+            )
+        )
+
+    def remove_post(self, post_id):
+        # The vector is stored on the post row itself.
+        pass
+
+    def rebuild(self):
+        """Recompute every vector in a single statement."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE blog_post SET search_vector =
+                    setweight(to_tsvector(%(config)s, blog_post.title), 'A')
+                    || setweight(to_tsvector(%(config)s, coalesce((
+                        SELECT string_agg(blog_tag.name, ' ')
+                        FROM blog_post_tags
+                        JOIN blog_tag ON blog_tag.id = blog_post_tags.tag_id
+                        WHERE blog_post_tags.post_id = blog_post.id
+                    ), '')), 'B')
+                    || setweight(to_tsvector(%(config)s, regexp_replace(blog_post.content, '<[^>]+>', ' ', 'g')), 'C')
+                """,
+                {'config': SEARCH_CONFIG},
+            )
+            return cursor.rowcount
+
+    def search(self, queryset, term):
+        query = SearchQuery(term, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+
+class SQLiteSearchBackend:
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, tags, body) VALUES (%s, %s, %s, %s)',
+                [post.pk, post.title, _tag_text(post), search_text(post.content)],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        from blog.models import Post
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        count = 0
+        for post in Post.objects.prefetch_related('tags').iterator(chunk_size=500):
+            self.index_post(post)
+            count += 1
+        return count
+
+    def search(self, queryset, term):
+        match = self._match_expression(term)
+        if not match:
+            return queryset.none()
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            # bm25() is lower for better matches, so negate it to rank descending
+            search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = blog_post.id',
+                [match],
+            )
+        )
+
+    @staticmethod
+    def _match_expression(term):
+        # Quote every token so user input can never be parsed as FTS5 syntax.
+        return ' '.join(f'"{token}"' for token in TOKEN_PATTERN.findall(term))
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """
+    Filters posts with the full-text search backend and, unless the client
+    asked for an explicit ordering, orders them by relevance.
+    """
+    search_param = 'search'
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        queryset = get_search_backend().search(queryset, term)
+        if request.query_params.get(self.ordering_param):
+            return queryset
+        return queryset.order_by('-search_rank', '-created_at')
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Full-text search over title, tags and content, ranked by relevance.',
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -1,6 +1,50 @@
-import re
+from django.db import models
 from rest_framework import serializers
-from blog.models import Category, Comment, Post, Quote, Tag
+
+from blog import comment_stats, threads
+from blog.ingestion import live_ids
+from blog.models import Category, Comment, CommentOutbox, Post, Quote, Tag
+from blog.moderation import MAX_BATCH
+from blog.rendering import render_content
+from blog.responsive import ImageSetField
+
+
+class RenderedContentField(serializers.CharField):
+    """Post HTML as served: sanitized, minified and with heading anchors (see blog.rendering)."""
+
+    def to_representation(self, value):
+        return render_content(value)
+
+
+class PostCountField(serializers.Field):
+    """Published posts the caller can see: restricted posts only count for signed-in users."""
+
+    def __init__(self, **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            return instance.published_post_count
+        return instance.public_post_count
+
+
+class CommentPreviewSerializer(serializers.ModelSerializer):
+    user = serializers.CharField(source='user.display_name', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ["id", "user", "content", "created_at"]
+
+
+class PostListListSerializer(serializers.ListSerializer):
+    """Loads comment counts (and previews) for all the posts at once; see blog.comment_stats."""
+
+    def to_representation(self, data):
+        posts = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        comment_stats.attach(posts, include_latest=comment_stats.wants_latest_comments(self.context.get('request')))
+        return super().to_representation(posts)
 
 
 class PostListSerializer(serializers.ModelSerializer):
@@ -8,33 +52,31 @@ class PostListSerializer(serializers.ModelSerializer):
     category = serializers.SlugRelatedField(slug_field="slug", read_only=True)
     tags = serializers.SlugRelatedField(slug_field="slug", read_only=True, many=True)
     author = serializers.StringRelatedField()
-    excerpt = serializers.SerializerMethodField()
-    first_image_url = serializers.SerializerMethodField()
+    image_set = ImageSetField(source='image')
+    approved_comment_count = serializers.IntegerField(read_only=True)
+    # Only with ?include=latest_comments
+    latest_comments = CommentPreviewSerializer(many=True, read_only=True)
 
     class Meta:
         model = Post
         fields = [
-            "id", "title", "slug", "image", "author", "category", "tags",
+            "id", "title", "slug", "image", "image_set", "author", "category", "tags",
             "created_at", "updated_at", "status", "is_restricted",
-            "excerpt", "first_image_url"
+            "excerpt", "first_image_url", "word_count", "reading_time",
+            "approved_comment_count", "latest_comments",
         ]
+        list_serializer_class = PostListListSerializer
 
-    def get_excerpt(self, obj):
-        text = re.sub(r"<[^>]+>", "", obj.content)
-        text = text.strip()
-        return text[:150] + "..." if len(text) > 150 else text
-
-    def get_first_image_url(self, obj):
-        pattern = r'''<img[^>]+src=["']([^"'>]+)["']'''
-        match = re.search(pattern, obj.content)
-        if match:
-            src = match.group(1)
-            if not src.startswith("data:"):
-                return src
-        return None
+    def get_fields(self):
+        fields = super().get_fields()
+        if not comment_stats.wants_latest_comments(self.context.get('request')):
+            del fields['latest_comments']
+        return fields
 
 
 class PostSerializer(serializers.ModelSerializer):
+    content = RenderedContentField(read_only=True)
+    image_set = ImageSetField(source='image')
     category = serializers.SlugRelatedField(slug_field="slug", read_only=True)
     tags = serializers.SlugRelatedField(slug_field="slug", read_only=True, many=True)
     author = serializers.StringRelatedField()
@@ -42,39 +84,141 @@ class PostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = [
-            "id", "title", "slug", "content", "image", "author", "category", "tags",
-            "created_at", "updated_at", "status", "is_restricted"
+            "id", "title", "slug", "content", "image", "image_set", "author", "category", "tags",
+            "created_at", "updated_at", "status", "is_restricted",
+            "word_count", "reading_time"
         ]
 
 
+UNLINKED_COMMENT_MESSAGE = "A comment must be linked to either a Post or a Quote."
+
+
+def validate_reply(data, depth, parent_targets):
+    """A reply belongs to its parent's post or quote: fill them in, or reject a mismatch or a too deep thread."""
+    for target, value in parent_targets.items():
+        if data.get(target) is None:
+            data[target] = value
+        elif data[target] != value:
+            raise serializers.ValidationError({"parent": f"The parent comment is not on this {target}."})
+    if depth >= threads.MAX_DEPTH:
+        raise serializers.ValidationError({"parent": "This thread is too deep for further replies."})
+
+
 class CommentSerializer(serializers.ModelSerializer):
-    user = serializers.StringRelatedField()
+    user = serializers.CharField(source='user.display_name', read_only=True)
     post = serializers.PrimaryKeyRelatedField(queryset=Post.objects.all(), required=False, allow_null=True)
     quote = serializers.PrimaryKeyRelatedField(queryset=Quote.objects.all(), required=False, allow_null=True)
+    parent = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.filter(is_approved=True), required=False, allow_null=True,
+    )
 
     class Meta:
         model = Comment
-        fields = ["id", "post", "quote", "user", "content", "created_at", "is_approved"]
+        fields = ["id", "post", "quote", "parent", "depth", "user", "content", "created_at", "is_approved"]
+        read_only_fields = ["is_approved"]  # Only moderators approve
 
     def validate(self, data):
+        if self.instance is not None:
+            # Paths and depths are fixed when a comment is created (see
+            # blog.threads), so a comment cannot be moved after the fact
+            for field in ("post", "quote", "parent"):
+                if field in data and getattr(data[field], "pk", None) != getattr(self.instance, f"{field}_id"):
+                    raise serializers.ValidationError({field: "A comment cannot be moved once it is posted."})
+            return data
+        parent = data.get("parent")
+        if parent is not None:
+            validate_reply(data, parent.depth, {"post": parent.post, "quote": parent.quote})
         if not data.get("post") and not data.get("quote"):
-            raise serializers.ValidationError("A comment must be linked to either a Post or a Quote.")
+            raise serializers.ValidationError(UNLINKED_COMMENT_MESSAGE)
         return data
 
 
+class CommentSubmissionSerializer(serializers.Serializer):
+    """
+    A comment for the write-behind outbox, validated against cached live ids.
+    Replies cost one indexed lookup of the parent and are validated like
+    ``CommentSerializer`` validates them; the flush checks everything again.
+    """
+    post = serializers.IntegerField(required=False, allow_null=True)
+    quote = serializers.IntegerField(required=False, allow_null=True)
+    parent = serializers.IntegerField(required=False, allow_null=True)
+    content = serializers.CharField()
+
+    def validate(self, data):
+        does_not_exist = serializers.PrimaryKeyRelatedField.default_error_messages["does_not_exist"]
+        if data.get("parent") is not None:
+            parent = Comment.objects.filter(pk=data["parent"], is_approved=True).values(
+                "post_id", "quote_id", "depth"
+            ).first()
+            if parent is None:
+                raise serializers.ValidationError(
+                    {"parent": does_not_exist.format(pk_value=data["parent"])}, code="does_not_exist",
+                )
+            validate_reply(data, parent["depth"], {"post": parent["post_id"], "quote": parent["quote_id"]})
+        if not data.get("post") and not data.get("quote"):
+            raise serializers.ValidationError(UNLINKED_COMMENT_MESSAGE)
+        for scope in ("post", "quote"):
+            pk = data.get(scope)
+            if pk is not None and pk not in live_ids(scope):
+                raise serializers.ValidationError({scope: does_not_exist.format(pk_value=pk)}, code="does_not_exist")
+        return data
+
+
+class CommentSubmissionStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CommentOutbox
+        fields = ["tracking_id", "status", "comment", "created_at", "processed_at"]
+
+
+class ModerationPostSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Post
+        fields = ["id", "slug", "title"]
+
+
+class ModerationQuoteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Quote
+        fields = ["id", "owner"]
+
+
+class ModerationCommentSerializer(serializers.ModelSerializer):
+    """A queued comment with its author and target, for moderators."""
+    post = ModerationPostSerializer(read_only=True)
+    quote = ModerationQuoteSerializer(read_only=True)
+    user = serializers.CharField(source='user.display_name', read_only=True)
+    user_email = serializers.EmailField(source='user.email', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ["id", "post", "quote", "user", "user_email", "content", "created_at"]
+
+
+class ModerationBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BATCH,
+    )
+
+
 class CategorySerializer(serializers.ModelSerializer):
+    post_count = PostCountField()
+
     class Meta:
         model = Category
-        fields = ["id", "name", "slug"]
+        fields = ["id", "name", "slug", "post_count"]
 
 
 class TagSerializer(serializers.ModelSerializer):
+    post_count = PostCountField()
+
     class Meta:
         model = Tag
-        fields = ["id", "name", "slug"]
+        fields = ["id", "name", "slug", "post_count"]
 
 
 class QuoteSerializer(serializers.ModelSerializer):
+    owner_image_set = ImageSetField(source='owner_image')
+
     class Meta:
         model = Quote
-        fields = ["id", "content", "owner", "owner_image", "created_at"]
+        fields = ["id", "content", "owner", "owner_image", "owner_image_set", "created_at"]
@@ -0,0 +1,117 @@
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from blog import counters, quote_rotation, related, tracking
+from blog.cache import bump_generation
+from blog.models import Category, Comment, Post, Quote, QuoteSlot, Tag
+from blog.search import get_search_backend
+
+CACHED_MODELS = (Post, Tag, Category, Quote, Comment)
+
+
+def bump_model_generation(sender, **kwargs):
+    """Invalidate cached API responses built from ``sender``'s table."""
+    if kwargs.get('raw'):
+        return
+    bump_generation(sender._meta.model_name)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_model_generation, sender=model, dispatch_uid=f'bump-{model._meta.label}-save')
+    post_delete.connect(bump_model_generation, sender=model, dispatch_uid=f'bump-{model._meta.label}-delete')
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def bump_post_tags_generation(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_generation('post')
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_related_posts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    related.schedule_update(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tags feed the search vector and the related-posts terms, so reindex on tag changes."""
+    if reverse and action == 'pre_clear':
+        # tag.posts.clear() reports no pk_set afterwards, so remember the posts
+        instance._cleared_post_ids = list(instance.posts.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    backend = get_search_backend()
+    if not reverse:
+        backend.index_post(instance)
+        related.schedule_update(instance.pk)
+        return
+    # tag.posts.add(...): instance is the Tag and pk_set holds post ids
+    post_ids = instance.__dict__.pop('_cleared_post_ids', []) if action == 'post_clear' else pk_set
+    for post in Post.objects.filter(pk__in=post_ids or []).select_related('category').prefetch_related('tags'):
+        backend.index_post(post)
+        related.schedule_update(post.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_counted_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._counted_state = counters.load_post_state(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_post_counts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    counters.post_saved(instance, instance.__dict__.pop('_counted_state', None))
+
+
+@receiver(pre_delete, sender=Post)
+def uncount_deleted_post(sender, instance, **kwargs):
+    counters.post_deleted(instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_post_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    counters.post_tags_changed(instance, action, reverse, pk_set)
+
+
+@receiver(post_save, sender=Quote)
+def index_new_quote(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        quote_rotation.add(instance)
+
+
+@receiver(pre_delete, sender=Quote)
+def remember_quote_slot(sender, instance, **kwargs):
+    instance._slot_position = QuoteSlot.objects.filter(quote=instance).values_list('position', flat=True).first()
+
+
+@receiver(post_delete, sender=Quote)
+def fill_quote_slot(sender, instance, **kwargs):
+    """Keep the quote index dense: the last slot takes the deleted quote's position."""
+    position = instance.__dict__.pop('_slot_position', None)
+    if position is not None:
+        quote_rotation.fill(position)
+
+
+@receiver(request_finished, dispatch_uid='blog-flush-post-views')
+def flush_buffered_views(sender, **kwargs):
+    """Runs after the response is sent, so readers never wait on the view upsert."""
+    tracking.buffer.flush_if_due()
@@ -0,0 +1,64 @@
+"""
+Versioned in-process snapshots of small, read-mostly tables.
+
+Category, tag and service lists are requested on nearly every page but
+change rarely. Each process keeps the rows of such a list in memory,
+tagged with the generation of the list's cache scope (see ``blog.cache``).
+A request reads the current generation, which is a cache read and not a
+query, and reuses the snapshot while the generation is unchanged. Save and
+delete signals bump the generation, so the next request reloads the rows.
+
+Generations only reach every worker through a shared cache. With the
+per-process default cache, a bump is seen by the worker that made it only,
+so snapshots are also rebuilt once they are ``BLOG_SNAPSHOT_TIMEOUT``
+seconds old; that bounds how stale another worker can be.
+
+The generation is read before the rows are loaded. A change that lands
+while a snapshot is being built is therefore never hidden: the snapshot is
+stored under the older generation and replaced on the next request.
+"""
+import time
+
+from django.conf import settings
+
+from blog.cache import get_generations
+
+_snapshots = {}
+
+
+def get_snapshot_timeout():
+    return getattr(settings, 'BLOG_SNAPSHOT_TIMEOUT', 60)
+
+
+def snapshot(name, scope, queryset):
+    """The rows of ``queryset`` as a list, reloaded when ``scope``'s generation changes or the rows age out."""
+    generation = get_generations([scope])[scope]
+    now = time.monotonic()
+    cached = _snapshots.get(name)
+    if cached is not None:
+        cached_generation, built_at, rows = cached
+        if cached_generation == generation and now - built_at < get_snapshot_timeout():
+            return rows
+    rows = list(queryset)
+    _snapshots[name] = (generation, now, rows)
+    return rows
+
+
+def clear():
+    _snapshots.clear()
+
+
+class SnapshotListMixin:
+    """
+    Serves ``list`` from an in-process snapshot of ``get_queryset()``. Set
+    ``snapshot_scope`` to the cache scope whose generation versions it.
+    Pagination and serialization run over the in-memory rows, so a list
+    request runs no queries while the snapshot is current.
+    """
+    snapshot_scope = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        return snapshot(f'{self.__class__.__module__}.{self.__class__.__qualname__}', self.snapshot_scope, queryset)
@@ -0,0 +1,120 @@
+"""
+Streaming JSON output for list endpoints.
+
+``JSONRenderer`` serializes a whole page into one string before the first
+byte is sent. With ``?format=jsonstream`` a list is instead written to a
+``StreamingHttpResponse`` one object at a time: rows are fetched from the
+database in chunks, serialized per chunk and encoded as they go, so peak
+memory stays at roughly one chunk and the response starts straight away.
+
+The body is byte-for-byte what ``?format=json`` returns, pagination
+envelope included.
+"""
+from itertools import islice
+
+from django.core.paginator import InvalidPage
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from blog.projection import forbid_deferred_loading
+
+# Placeholder for the results list inside the pagination envelope
+_RESULTS = object()
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """Renders JSON like ``JSONRenderer``; lists opt in to streaming with ?format=jsonstream."""
+    format = 'jsonstream'
+
+    def render_stream(self, envelope, items, renderer_context=None):
+        """
+        Yield the encoded ``envelope`` with ``items`` streamed in place of its
+        results placeholder. ``envelope`` is None for unpaginated lists.
+        """
+        if envelope is None:
+            yield from self._render_items(items, renderer_context)
+            return
+
+        yield b'{'
+        for index, (key, value) in enumerate(envelope.items()):
+            yield (b',' if index else b'') + self._encode(key, renderer_context) + b':'
+            if value is _RESULTS:
+                yield from self._render_items(items, renderer_context)
+            else:
+                yield self._encode(value, renderer_context)
+        yield b'}'
+
+    def _render_items(self, items, renderer_context):
+        yield b'['
+        for index, item in enumerate(items):
+            yield (b',' if index else b'') + self._encode(item, renderer_context)
+        yield b']'
+
+    def _encode(self, value, renderer_context):
+        # render() turns None into an empty body rather than null
+        return b'null' if value is None else self.render(value, renderer_context=renderer_context)
+
+
+class StreamingListMixin:
+    """
+    Streams ``list`` responses requested with ?format=jsonstream.
+
+    Rows are read ``stream_chunk_size`` at a time with ``QuerySet.iterator()``
+    (prefetches run once per chunk). Keyset pages are already fetched in one
+    bounded query, so for those only the serialization is streamed.
+    """
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, StreamingJSONRenderer]
+    stream_chunk_size = 20
+
+    def list(self, request, *args, **kwargs):
+        if not isinstance(getattr(request, 'accepted_renderer', None), StreamingJSONRenderer):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        envelope, rows = self.paginate_stream(queryset)
+        renderer = request.accepted_renderer
+        content = renderer.render_stream(envelope, self.serialize_stream(rows), self.get_renderer_context())
+        return StreamingHttpResponse(content, content_type=renderer.media_type)
+
+    def paginate_stream(self, queryset):
+        """Return the pagination envelope (or None) and an iterable over the page's rows."""
+        paginator = self.paginator
+        if paginator is None:
+            return None, queryset
+
+        if isinstance(paginator, PageNumberPagination):
+            page = self._page_without_rows(paginator, queryset)
+            if page is None:
+                return None, queryset
+            rows = page.object_list
+        else:
+            rows = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(_RESULTS).data, rows
+
+    def _page_without_rows(self, paginator, queryset):
+        """``PageNumberPagination.paginate_queryset`` without evaluating the page."""
+        request = self.request
+        page_size = paginator.get_page_size(request)
+        if not page_size:
+            return None
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        page_number = paginator.get_page_number(request, django_paginator)
+        try:
+            paginator.page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        paginator.request = request
+        return paginator.page
+
+    def serialize_stream(self, rows):
+        if isinstance(rows, QuerySet):
+            rows = rows.iterator(chunk_size=self.stream_chunk_size)
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.stream_chunk_size)):
+            with forbid_deferred_loading():
+                data = self.get_serializer(chunk, many=True).data
+            yield from data
@@ -0,0 +1,282 @@
+"""
+Sitemaps and RSS/Atom feeds, served from prebuilt gzip artifacts in the cache.
+
+Artifacts are rebuilt lazily and piece by piece:
+
+* Each sitemap section is split into shards of ``SITEMAP_SHARD_SIZE`` URLs
+  by primary key range. Saving or deleting a row drops only its own shard.
+* Feed entries are rendered once per post and cached as XML fragments. The
+  feed document is reassembled from the fragments, so a changed post costs
+  one re-rendered entry.
+* The sitemap index and the feed documents are small; they are keyed on the
+  ``syndication`` generation, which every change bumps.
+
+Shards and entries are dropped by signals, which bulk updates and raw SQL
+skip, so they also expire after ``ARTIFACT_TIMEOUT``; nothing stays stale
+for longer than that.
+"""
+import gzip
+import hashlib
+import re
+from io import StringIO
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from blog.cache import bump_generation, get_generations
+from blog.models import Category, Post, Tag
+
+SITEMAP_SHARD_SIZE = 50_000  # The sitemap protocol's limit per file
+FEED_SIZE = 20
+FEED_TITLE = 'Wordofra'
+FEED_DESCRIPTION = 'Latest posts from the Wordofra blog.'
+MAX_AGE = 60 * 15
+ARTIFACT_TIMEOUT = 60 * 60  # Upper bound for shards and entries missed by invalidation
+SCOPE = 'syndication'
+
+SHARD_KEY = 'blog:syndication:sitemap:{section}:{shard}'
+DOCUMENT_KEY = 'blog:syndication:{name}:{generation}:{base}'
+ENTRY_KEY = 'blog:syndication:entry:{kind}:{pk}'
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+class SitemapSection:
+    """Frontend pages listed in the sitemap, one per row of ``queryset``."""
+
+    def __init__(self, name, queryset, path, lastmod_field=None):
+        self.name = name
+        self.queryset = queryset
+        self.path = path  # Formatted with the row's slug
+        self.lastmod_field = lastmod_field
+
+    @property
+    def model(self):
+        return self.queryset.model
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def location(self, slug):
+        return urljoin(settings.FRONTEND_URL, self.path.format(slug=slug))
+
+
+sitemap_sections = {}
+
+
+def register_section(section):
+    """Add ``section`` to the sitemap and drop its shards when its rows change."""
+    sitemap_sections[section.name] = section
+    uid = f'syndication-{section.name}'
+    post_save.connect(invalidate_instance, sender=section.model, dispatch_uid=f'{uid}-save')
+    post_delete.connect(invalidate_instance, sender=section.model, dispatch_uid=f'{uid}-delete')
+    return section
+
+
+def invalidate_instance(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    shard = instance.pk // SITEMAP_SHARD_SIZE
+    cache.delete_many([
+        SHARD_KEY.format(section=section.name, shard=shard)
+        for section in sitemap_sections.values() if section.model is sender
+    ])
+    if sender is Post:
+        cache.delete_many([ENTRY_KEY.format(kind=kind, pk=instance.pk) for kind in FEEDS])
+    bump_generation(SCOPE)
+
+
+def _artifact(xml):
+    data = xml.encode()
+    # Weak: the same validator is sent for the gzip and identity encodings
+    return {'body': gzip.compress(data, mtime=0), 'etag': f'W/"{hashlib.sha256(data).hexdigest()}"'}
+
+
+def artifact_response(request, artifact, content_type):
+    """Serve a cached artifact, compressed when the client accepts gzip."""
+    response = get_conditional_response(request, etag=artifact['etag'])
+    if response is None:
+        if ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response = HttpResponse(artifact['body'], content_type=content_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(artifact['body']), content_type=content_type)
+    response['ETag'] = artifact['etag']
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
+
+
+def _document(name, base_url, build):
+    generation = get_generations([SCOPE])[SCOPE]
+    base = hashlib.sha256(base_url.encode()).hexdigest()[:16]
+    key = DOCUMENT_KEY.format(name=name, generation=generation, base=base)
+    artifact = cache.get(key)
+    if artifact is None:
+        artifact = _artifact(build())
+        cache.set(key, artifact, MAX_AGE)
+    return artifact
+
+
+# Sitemaps
+
+def build_sitemap_shard(section, shard):
+    """The ``<urlset>`` of one shard, or None when the shard has no rows."""
+    low = shard * SITEMAP_SHARD_SIZE
+    fields = ['slug', section.lastmod_field] if section.lastmod_field else ['slug']
+    rows = (
+        section.get_queryset()
+        .filter(pk__gte=low, pk__lt=low + SITEMAP_SHARD_SIZE)
+        .order_by('pk')
+        .values_list(*fields)
+    )
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">']
+    for row in rows.iterator(chunk_size=2000):
+        lastmod = f'<lastmod>{row[1].isoformat(timespec="seconds")}</lastmod>' if len(row) > 1 else ''
+        parts.append(f'<url><loc>{escape(section.location(row[0]))}</loc>{lastmod}</url>')
+    if len(parts) == 1:
+        return None
+    parts.append('</urlset>\n')
+    return '\n'.join(parts)
+
+
+def get_sitemap_shard(section_name, shard):
+    section = sitemap_sections.get(section_name)
+    if section is None:
+        return None
+    key = SHARD_KEY.format(section=section_name, shard=shard)
+    artifact = cache.get(key)
+    if artifact is None:
+        xml = build_sitemap_shard(section, shard)
+        if xml is None:
+            return None
+        artifact = _artifact(xml)
+        cache.set(key, artifact, ARTIFACT_TIMEOUT)
+    return artifact
+
+
+def build_sitemap_index(base_url):
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">']
+    for section in sitemap_sections.values():
+        shards = section.get_queryset().order_by().annotate(shard=F('pk') / SITEMAP_SHARD_SIZE).values('shard')
+        if section.lastmod_field:
+            shards = shards.annotate(lastmod=Max(section.lastmod_field))
+        else:
+            shards = shards.annotate(rows=Count('pk'))
+        for row in shards.order_by('shard'):
+            path = reverse('sitemap-shard', kwargs={'section': section.name, 'shard': row['shard']})
+            lastmod = row.get('lastmod')
+            lastmod = f'<lastmod>{lastmod.isoformat(timespec="seconds")}</lastmod>' if lastmod else ''
+            parts.append(f'<sitemap><loc>{escape(urljoin(base_url, path))}</loc>{lastmod}</sitemap>')
+    parts.append('</sitemapindex>\n')
+    return '\n'.join(parts)
+
+
+def get_sitemap_index(base_url):
+    return _document('sitemap-index', base_url, lambda: build_sitemap_index(base_url))
+
+
+# Feeds
+
+class PrerenderedFeedMixin:
+    """Writes item XML rendered earlier by ``render_entry`` instead of ``items``."""
+    fragments = ()
+    last_updated = None
+
+    @classmethod
+    def render_entry(cls, **item):
+        feed = cls(title='', link='', description='')
+        feed.add_item(**item)
+        stream = StringIO()
+        handler = SimplerXMLGenerator(stream, 'utf-8', short_empty_elements=True)
+        super(PrerenderedFeedMixin, feed).write_items(handler)
+        return stream.getvalue()
+
+    def write_items(self, handler):
+        for fragment in self.fragments:
+            handler.ignorableWhitespace(fragment)  # Written out verbatim
+
+    def latest_post_date(self):
+        return self.last_updated or super().latest_post_date()
+
+
+class RssFeed(PrerenderedFeedMixin, feedgenerator.Rss201rev2Feed):
+    pass
+
+
+class AtomFeed(PrerenderedFeedMixin, feedgenerator.Atom1Feed):
+    pass
+
+
+FEEDS = {'rss': RssFeed, 'atom': AtomFeed}
+
+
+def feed_posts():
+    return Post.objects.filter(status='published', is_restricted=False).order_by('-created_at', '-id')
+
+
+def feed_item(post):
+    link = sitemap_sections['posts'].location(post.slug)
+    return {
+        'title': post.title,
+        'link': link,
+        'unique_id': link,
+        'description': post.excerpt,
+        'pubdate': post.created_at,
+        'updateddate': post.updated_at,
+    }
+
+
+def get_feed_fragments(kind, latest):
+    """Entry XML for ``latest`` (pk, updated_at) pairs, rendering only stale entries."""
+    keys = {pk: ENTRY_KEY.format(kind=kind, pk=pk) for pk, _ in latest}
+    cached = cache.get_many(keys.values())
+    fragments, stale = {}, []
+    for pk, updated_at in latest:
+        entry = cached.get(keys[pk])
+        if entry is not None and entry['updated_at'] == updated_at:
+            fragments[pk] = entry['xml']
+        else:
+            stale.append(pk)
+
+    if stale:
+        fresh = {}
+        posts = feed_posts().filter(pk__in=stale).only('title', 'slug', 'excerpt', 'created_at', 'updated_at')
+        for post in posts:
+            fragments[post.pk] = FEEDS[kind].render_entry(**feed_item(post))
+            fresh[keys[post.pk]] = {'updated_at': post.updated_at, 'xml': fragments[post.pk]}
+        cache.set_many(fresh, ARTIFACT_TIMEOUT)
+    return [fragments[pk] for pk, _ in latest if pk in fragments]
+
+
+def build_feed(kind, feed_url):
+    latest = list(feed_posts().values_list('pk', 'updated_at')[:FEED_SIZE])
+    feed = FEEDS[kind](
+        title=FEED_TITLE,
+        link=settings.FRONTEND_URL,
+        description=FEED_DESCRIPTION,
+        feed_url=feed_url,
+        language='en',
+    )
+    feed.fragments = get_feed_fragments(kind, latest)
+    feed.last_updated = max((updated_at for _, updated_at in latest), default=None)
+    return feed.writeString('utf-8')
+
+
+def get_feed(kind, feed_url):
+    return _document(f'feed-{kind}', feed_url, lambda: build_feed(kind, feed_url))
+
+
+register_section(SitemapSection('posts', feed_posts(), '/blog/{slug}', lastmod_field='updated_at'))
+register_section(SitemapSection('categories', Category.objects.all(), '/blog/category/{slug}'))
+register_section(SitemapSection('tags', Tag.objects.all(), '/blog/tag/{slug}'))
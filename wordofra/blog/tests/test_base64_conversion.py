@@ -0,0 +1,162 @@
+import base64
+import threading
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from blog import images
+from blog.models import Category, ContentImageConversion, ContentImageUpload, ImageAsset, Post
+
+User = get_user_model()
+
+RED, BLUE = (base64.b64encode(color).decode() for color in (b'red-pixels', b'blue-pixels'))
+
+
+def _img(payload):
+    return f'<img alt="x" src="data:image/png;base64,{payload}" width="10">'
+
+
+class FakeUploader:
+    """Stands in for Cloudinary; fails for payloads listed in ``failing``."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, image_bytes, folder, public_id):
+        with self.lock:
+            self.calls.append(image_bytes)
+        if image_bytes in self.failing:
+            raise ConnectionError('upload timed out')
+        return f'https://res.example.com/{folder}/{public_id}.png'
+
+
+@pytest.fixture
+def posts(db):
+    author = User.objects.create_user(username='archivist', email='archivist@example.com', password='testpass123')
+    category = Category.objects.create(name='Archive')
+    contents = {
+        'inline': f'<p>One</p>{_img(RED)}<p>Two</p>{_img(BLUE)}<p>Again</p>{_img(RED)}',
+        'plain': '<p>No pictures, just a data:image/png mention</p>',
+        'linked': '<p><img src="https://example.com/a.png"></p>',
+    }
+    return {
+        slug: Post.objects.create(title=slug, slug=slug, content=content, author=author, category=category)
+        for slug, content in contents.items()
+    }
+
+
+def _convert(uploader, *args):
+    out, err = StringIO(), StringIO()
+    call_command('convert_base64_to_cloudinary', *args, uploader=uploader, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db
+def test_converts_each_image_once(posts):
+    uploader = FakeUploader()
+    out, _ = _convert(uploader, '--concurrency', '3')
+
+    post = Post.objects.get(slug='inline')
+    assert 'base64' not in post.content
+    assert post.content.count('https://res.example.com/blog/assets/') == 3
+    assert post.content.startswith('<p>One</p><img alt="x" src="https://')
+    assert post.first_image_url.startswith('https://res.example.com/')  # Derived fields follow the content
+    assert sorted(uploader.calls) == sorted([b'red-pixels', b'blue-pixels'])
+    assert ContentImageUpload.objects.filter(post=post).count() == 2
+    assert ContentImageConversion.objects.get(post=post).images == 3
+    assert 'Scanned 2 posts' in out  # 'linked' never matched the data URI filter
+    assert 'Uploaded 2 images' in out
+
+
+@pytest.mark.django_db
+def test_shared_images_are_uploaded_once_across_posts(posts):
+    author, category = posts['inline'].author, posts['inline'].category
+    for i in range(3):
+        Post.objects.create(
+            title=f'Shared {i}', slug=f'shared-{i}', content=f'<p>Logo</p>{_img(RED)}', author=author, category=category,
+        )
+    uploader = FakeUploader()
+    out, _ = _convert(uploader, '--concurrency', '2', '--chunk-size', '2')
+
+    assert sorted(uploader.calls) == sorted([b'red-pixels', b'blue-pixels'])
+    red = ImageAsset.objects.get(sha256=images.digest(b'red-pixels'))
+    assert red.reuses == 3
+    assert all(red.url in post.content for post in Post.objects.filter(slug__startswith='shared-'))
+    assert 'reused 3' in out
+    assert images.savings() == {'assets': 2, 'uploads_saved': 3, 'bytes_saved': 3 * len(b'red-pixels')}
+
+
+@pytest.mark.django_db
+def test_registered_assets_are_reused(posts):
+    sha256 = images.digest(b'red-pixels')
+    asset = images.register(sha256, images.upload(b'red-pixels', sha256, FakeUploader()), len(b'red-pixels'))
+    assert asset.public_id == f'blog/assets/{sha256}'
+
+    uploader = FakeUploader()
+    _convert(uploader)
+    assert uploader.calls == [b'blue-pixels']
+    assert asset.url in Post.objects.get(slug='inline').content
+    assert ImageAsset.objects.get(pk=asset.pk).reuses == 1
+
+
+@pytest.mark.django_db
+def test_losing_a_registration_race_counts_a_reuse():
+    sha256 = images.digest(b'red-pixels')
+    winner = images.register(sha256, 'https://res.example.com/winner.png', 10)
+
+    assert images.register(sha256, 'https://res.example.com/loser.png', 10) == winner
+    assert ImageAsset.objects.get().reuses == 1
+
+
+@pytest.mark.django_db
+def test_rerun_resumes_after_failures(posts):
+    _, err = _convert(FakeUploader(failing=[b'blue-pixels']))
+    assert 'ERROR uploading image' in err
+    post = Post.objects.get(slug='inline')
+    assert post.content.count('base64') == 1
+    assert not ContentImageConversion.objects.filter(post=post).exists()
+
+    uploader = FakeUploader()
+    out, _ = _convert(uploader)
+    assert uploader.calls == [b'blue-pixels']  # The red image's checkpoint is reused
+    assert 'base64' not in Post.objects.get(slug='inline').content
+    assert 'Scanned 1 posts' in out  # 'plain' was checkpointed by the first run
+
+    uploader = FakeUploader()
+    out, _ = _convert(uploader)
+    assert uploader.calls == []
+    assert 'Scanned 0 posts' in out
+
+
+@pytest.mark.django_db
+def test_edited_posts_are_scanned_again(posts):
+    _convert(FakeUploader())
+    post = Post.objects.get(slug='inline')
+    post.content += _img(base64.b64encode(b'green-pixels').decode())
+    post.save()
+
+    uploader = FakeUploader()
+    _convert(uploader)
+    assert uploader.calls == [b'green-pixels']
+    assert 'base64' not in Post.objects.get(slug='inline').content
+
+
+@pytest.mark.django_db
+def test_dry_run_changes_nothing(posts):
+    uploader = FakeUploader()
+    out, _ = _convert(uploader, '--dry-run')
+
+    assert uploader.calls == []
+    assert Post.objects.get(slug='inline').content == posts['inline'].content
+    assert not ContentImageUpload.objects.exists() and not ContentImageConversion.objects.exists()
+    assert '2 images' in out
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(CommandError):
+        _convert(FakeUploader(), '--concurrency', '0')
@@ -219,6 +219,23 @@ class TestCommentViewSet:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['results']) > 0
 
+    def test_list_comments_shows_display_names(self, api_client, post, django_assert_num_queries):
+        """Commenters appear by name, never by email, without a query per comment."""
+        for i in range(20):
+            user = User.objects.create_user(
+                username=f'commenter{i}', email=f'commenter{i}@example.com', password='testpass123',
+                first_name='Ada' if i % 2 else '', last_name=f'Lovelace {i}' if i % 2 else '',
+            )
+            Comment.objects.create(post=post, user=user, content=f'Comment {i}', is_approved=True)
+
+        url = reverse('comment-list') + f'?post={post.id}&page_size=20'
+        with django_assert_num_queries(2):  # Count, comments joined with their users
+            response = api_client.get(url)
+
+        names = {comment['user'] for comment in response.data['results']}
+        assert names == {f'Ada Lovelace {i}' if i % 2 else f'commenter{i}' for i in range(20)}
+        assert '@' not in str(response.data)
+
     def test_create_comment(self, api_client, authenticated_user, post):
         """Test creating a comment."""
         api_client.force_authenticate(user=authenticated_user)
@@ -233,7 +250,8 @@ class TestCommentViewSet:
         
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data['content'] == 'New test comment'
-        assert response.data['user'] == authenticated_user.email
+        assert response.data['user'] == authenticated_user.display_name
+        assert authenticated_user.email not in str(response.data)
 
     def test_create_comment_unauthenticated(self, api_client, post):
         """Test comment creation fails for unauthenticated users."""
@@ -0,0 +1,75 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import moderation
+from blog.models import Category, Comment, Post
+
+User = get_user_model()
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(
+        username='counted', email='counted@example.com', password='testpass123', first_name='Ada', last_name='L',
+    )
+
+
+def _posts(author, count):
+    category = Category.objects.create(name=f'Counted {count}')
+    posts = []
+    for i in range(count):
+        post = Post.objects.create(
+            title=f'Counted {count}-{i}', slug=f'counted-{count}-{i}', content='<p>Body</p>', author=author,
+            category=category, status='published',
+        )
+        for j in range(i % 5):
+            Comment.objects.create(post=post, user=author, content=f'Comment {j}', is_approved=True)
+        Comment.objects.create(post=post, user=author, content='Pending')
+        posts.append(post)
+    return posts
+
+
+def _list(params=None):
+    return APIClient().get(reverse('post-list'), {'page_size': 50, **(params or {})})
+
+
+@pytest.mark.django_db
+def test_counts_and_previews(author):
+    posts = _posts(author, 5)
+
+    results = {post['slug']: post for post in _list({'include': 'latest_comments'}).data['results']}
+
+    for i, post in enumerate(posts):
+        entry = results[post.slug]
+        assert entry['approved_comment_count'] == i % 5
+        expected = [f'Comment {j}' for j in reversed(range(i % 5))][:3]  # Newest first
+        assert [comment['content'] for comment in entry['latest_comments']] == expected
+    assert results[posts[4].slug]['latest_comments'][0]['user'] == 'Ada L'
+    assert 'latest_comments' not in _list().data['results'][0]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params,queries', [
+    ({}, 5),                                   # ETag summary, count, posts, tags, comment counts
+    ({'include': 'latest_comments'}, 6),       # ... and the windowed latest-comments query
+    ({'include': 'latest_comments', 'pagination': 'cursor'}, 5),  # No count with cursors
+])
+def test_query_count_does_not_depend_on_page_size(author, django_assert_num_queries, params, queries):
+    _posts(author, 2)
+    with django_assert_num_queries(queries):
+        assert len(_list(params).data['results']) == 2
+
+    _posts(author, 20)
+    with django_assert_num_queries(queries):
+        assert len(_list(params).data['results']) == 22
+
+
+@pytest.mark.django_db
+def test_comment_changes_refresh_cached_lists(author):
+    post = _posts(author, 2)[1]
+    assert _list().data['results'][0]['approved_comment_count'] == 1
+
+    moderation.approve(Comment.objects.filter(post=post, is_approved=False).values('pk'))
+    assert _list().data['results'][0]['approved_comment_count'] == 2
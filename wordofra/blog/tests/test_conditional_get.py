@@ -0,0 +1,150 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import cache as blog_cache
+from blog.models import Category, Comment, Post, Quote, Tag
+from portfolio.models import Project
+
+User = get_user_model()
+
+
+@pytest.fixture
+def post(db):
+    author = User.objects.create_user(username='etag', email='etag@example.com', password='testpass123')
+    category = Category.objects.create(name='Validators')
+    return Post.objects.create(
+        title='Validated', content='<p>Body</p>', author=author, category=category, status='published'
+    )
+
+
+@pytest.fixture(params=['post-detail', 'post-list', 'quote-detail', 'project-detail', 'project-list'])
+def url(request, post):
+    quote = Quote.objects.create(content='Quoted', owner='Owner')
+    project = Project.objects.create(title='Project', description='Described')
+    kwargs = {
+        'post-detail': {'pk': post.slug},
+        'quote-detail': {'pk': quote.pk},
+        'project-detail': {'pk': project.slug},
+    }.get(request.param, {})
+    return reverse(request.param, kwargs=kwargs)
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_validators_on_every_endpoint(self, url):
+        client = APIClient()
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response['ETag'].startswith('"')
+        assert response.has_header('Last-Modified')
+
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert not_modified.status_code == 304
+        assert not_modified['ETag'] == response['ETag']
+
+        by_date = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert by_date.status_code == 304
+
+    def test_304_skips_loading_content(self, post, django_assert_num_queries):
+        client = APIClient()
+        url = reverse('post-detail', kwargs={'pk': post.slug})
+        etag = client.get(url)['ETag']
+        # The cached validators answer without any query at all
+        with django_assert_num_queries(0):
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_304_from_metadata_query_when_uncached(self, post, settings, django_assert_num_queries):
+        settings.BLOG_RESPONSE_CACHE_TIMEOUT = 0
+        client = APIClient()
+        url = reverse('post-detail', kwargs={'pk': post.slug})
+        etag = client.get(url)['ETag']
+        with django_assert_num_queries(1) as ctx:
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert '"blog_post"."content"' not in ctx.captured_queries[0]['sql']
+
+    def test_edit_changes_etag(self, post):
+        client = APIClient()
+        url = reverse('post-detail', kwargs={'pk': post.slug})
+        etag = client.get(url)['ETag']
+
+        post.title = 'Edited'
+        post.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_tag_change_changes_list_etag(self, post):
+        client = APIClient()
+        etag = client.get(reverse('post-list'))['ETag']
+
+        post.tags.add(Tag.objects.create(name='New'))
+        assert client.get(reverse('post-list'), HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_deleting_a_post_changes_list_etag(self, post):
+        client = APIClient()
+        Post.objects.create(
+            title='Older', content='<p>Body</p>', author=post.author, category=post.category, status='published'
+        )
+        etag = client.get(reverse('post-list'))['ETag']
+
+        # Deleting an older post leaves max(updated_at) alone
+        Post.objects.filter(title='Older').delete()
+        assert client.get(reverse('post-list'), HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_list_last_modified_follows_deletes_and_approvals(self, post, monkeypatch):
+        client = APIClient()
+        older = Post.objects.create(
+            title='Older', content='<p>Body</p>', author=post.author, category=post.category, status='published'
+        )
+        comment = Comment.objects.create(post=post, user=post.author, content='Pending')
+        url = reverse('post-list')
+        clock = [time.time()]
+        monkeypatch.setattr(blog_cache, 'time', SimpleNamespace(time=lambda: clock[0], time_ns=time.time_ns))
+
+        def approve():
+            comment.is_approved = True
+            comment.save()
+
+        # Neither touches the newest updated_at in the list
+        for change in (older.delete, approve):
+            last_modified = client.get(url)['Last-Modified']
+            clock[0] += 60
+            change()
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            assert response.status_code == 200
+            assert response['Last-Modified'] != last_modified
+
+    def test_list_etag_changes_without_seeing_the_bump(self, post, settings):
+        settings.BLOG_RESPONSE_CACHE_TIMEOUT = 0  # As once the cached response expired
+        client = APIClient()
+        Post.objects.create(
+            title='Older', content='<p>Body</p>', author=post.author, category=post.category, status='published'
+        )
+        etag = client.get(reverse('post-list'))['ETag']
+        keys = [
+            key.format(scope=scope) for key in (blog_cache.GENERATION_KEY, blog_cache.CHANGED_KEY)
+            for scope in ('post', 'category', 'tag', 'comment')
+        ]
+        seen = cache.get_many(keys)
+
+        Post.objects.filter(title='Older').delete()
+        cache.set_many(seen)  # As if another worker made the change
+        assert client.get(reverse('post-list'), HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_generations_expire(self, post):
+        APIClient().get(reverse('post-list'))
+        key = cache.make_key(blog_cache.GENERATION_KEY.format(scope='post'))
+        assert cache._expire_info[key] is not None  # The test settings use LocMemCache
+
+    def test_restricted_post_still_forbidden(self, post):
+        post.is_restricted = True
+        post.save()
+        response = APIClient().get(reverse('post-detail', kwargs={'pk': post.slug}), HTTP_IF_NONE_MATCH='"x"')
+        assert response.status_code == 403
+        assert not response.has_header('ETag')
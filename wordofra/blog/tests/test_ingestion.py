@@ -0,0 +1,175 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from blog import ingestion, threads
+from blog.models import Category, Comment, CommentOutbox, Post, Quote
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def outbox_mode(settings):
+    settings.BLOG_COMMENT_INGESTION = 'outbox'
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='submitter', email='submitter@example.com', password='testpass123')
+
+
+@pytest.fixture
+def submitter_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def post(user):
+    return Post.objects.create(
+        title='Viral', slug='viral', content='<p>Body</p>', author=user,
+        category=Category.objects.create(name='Ingestion'), status='published',
+    )
+
+
+def _submit(client, **data):
+    return client.post(reverse('comment-list'), {'content': 'Great post', **data}, format='json')
+
+
+@pytest.mark.django_db
+def test_submission_is_queued(submitter_client, post, django_assert_num_queries):
+    ingestion.live_ids('post')
+    with django_assert_num_queries(1):  # The outbox INSERT; ids come from the cache
+        response = _submit(submitter_client, post=post.pk)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data['status'] == 'pending'
+    assert response['Location'] == response.data['url']
+    assert not Comment.objects.exists()
+    entry = CommentOutbox.objects.get()
+    assert (entry.tracking_id, entry.post_id, entry.content) == (response.data['tracking_id'], post.pk, 'Great post')
+
+
+@pytest.mark.django_db
+def test_submission_is_validated_against_live_ids(submitter_client, post, user):
+    draft = Post.objects.create(
+        title='Draft', slug='draft', content='<p>Body</p>', author=user, category=post.category, status='draft',
+    )
+
+    assert _submit(submitter_client, post=draft.pk).status_code == status.HTTP_400_BAD_REQUEST
+    assert _submit(submitter_client, post=10 ** 9).data['post'] == ['Invalid pk "1000000000" - object does not exist.']
+    assert _submit(submitter_client).status_code == status.HTTP_400_BAD_REQUEST
+    assert APIClient().post(reverse('comment-list'), {'post': post.pk, 'content': 'x'}).status_code in (401, 403)
+
+    draft.status = 'published'
+    draft.save()  # Bumps the post generation, so the cached ids are rebuilt
+    assert _submit(submitter_client, post=draft.pk).status_code == status.HTTP_202_ACCEPTED
+    quote = Quote.objects.create(content='Quoted', owner='Owner')
+    assert _submit(submitter_client, quote=quote.pk).status_code == status.HTTP_202_ACCEPTED
+
+
+@pytest.mark.django_db
+def test_replies_are_validated_like_direct_comments(submitter_client, post, user, settings):
+    other = Post.objects.create(
+        title='Other', slug='other', content='<p>Body</p>', author=user, category=post.category, status='published',
+    )
+    parent = Comment.objects.create(post=post, user=user, content='Parent', is_approved=True)
+    pending = Comment.objects.create(post=post, user=user, content='Pending')
+    deep = Comment.objects.create(post=post, user=user, content='Deep', is_approved=True)
+    Comment.objects.filter(pk=deep.pk).update(depth=threads.MAX_DEPTH)
+    cases = [
+        {'parent': pending.pk},
+        {'parent': deep.pk},
+        {'parent': parent.pk, 'post': other.pk},
+        {'parent': 10 ** 9},
+    ]
+
+    for data in cases:
+        settings.BLOG_COMMENT_INGESTION = 'direct'
+        direct = _submit(submitter_client, **data)
+        settings.BLOG_COMMENT_INGESTION = 'outbox'
+        queued = _submit(submitter_client, **data)
+        assert direct.status_code == queued.status_code == status.HTTP_400_BAD_REQUEST
+        assert direct.data == queued.data
+
+    response = _submit(submitter_client, parent=parent.pk)  # Post taken from the parent
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert CommentOutbox.objects.get().post_id == post.pk
+    assert ingestion.flush() == (1, 0)
+
+
+@pytest.mark.django_db
+def test_flush_publishes_in_batches(submitter_client, post):
+    tracking_ids = [_submit(submitter_client, post=post.pk).data['tracking_id'] for _ in range(5)]
+    status_url = reverse('comment-submission', kwargs={'tracking_id': tracking_ids[0]})
+    assert submitter_client.get(status_url).data['status'] == 'pending'
+
+    assert ingestion.flush(batch_size=3) == (3, 0)
+    assert ingestion.flush(batch_size=3) == (2, 0)
+    assert ingestion.flush(batch_size=3) == (0, 0)
+
+    comments = list(Comment.objects.order_by('id'))
+    assert [comment.content for comment in comments] == ['Great post'] * 5
+    assert all(not comment.is_approved for comment in comments)  # Still moderated
+    data = submitter_client.get(status_url).data
+    assert (data['status'], data['comment']) == ('published', comments[0].pk)
+
+
+@pytest.mark.django_db
+def test_flush_cost_does_not_grow_with_the_batch(submitter_client, post, user):
+    def flush_queries(count):
+        CommentOutbox.objects.bulk_create(
+            [CommentOutbox(user=user, post_id=post.pk, content=f'Queued {i}') for i in range(count)]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            ingestion.flush()
+        return len(queries)
+
+    assert flush_queries(2) == flush_queries(40)
+    assert Comment.objects.count() == 42
+
+
+@pytest.mark.django_db
+def test_comments_on_unpublished_posts_are_dropped(submitter_client, post):
+    tracking_id = _submit(submitter_client, post=post.pk).data['tracking_id']
+    post.status = 'draft'
+    post.save()
+
+    assert ingestion.flush() == (0, 1)
+    assert not Comment.objects.exists()
+    status_url = reverse('comment-submission', kwargs={'tracking_id': tracking_id})
+    assert submitter_client.get(status_url).data['status'] == 'dropped'
+
+
+@pytest.mark.django_db
+def test_comments_on_deleted_targets_are_dropped_and_logged(submitter_client, post, caplog):
+    quote = Quote.objects.create(content='Gone soon', owner='Someone')
+    _submit(submitter_client, post=post.pk)
+    _submit(submitter_client, quote=quote.pk)
+    post.delete()
+    quote.delete()
+
+    with caplog.at_level('INFO', logger='blog.ingestion'):
+        assert ingestion.flush() == (0, 2)
+    assert not Comment.objects.exists()
+    assert 'Dropped 2 queued comments' in caplog.text
+
+
+@pytest.mark.django_db
+def test_flush_command(submitter_client, post):
+    for _ in range(3):
+        _submit(submitter_client, post=post.pk)
+    out = StringIO()
+
+    call_command('flush_comment_outbox', '--batch-size', '2', stdout=out)
+
+    assert 'Published 3 comments' in out.getvalue()
+    assert Comment.objects.count() == 3
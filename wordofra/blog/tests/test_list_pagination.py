@@ -0,0 +1,82 @@
+import time
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from blog import snapshots
+from blog.models import Category, Quote, Tag
+
+
+def _walk(client, url, params):
+    """Follow next links to the end; returns every page's rows."""
+    pages = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.data['results'])
+        if not response.data['next']:
+            return pages
+        response = client.get(response.data['next'])
+
+
+@pytest.mark.django_db
+def test_quotes_page_by_cursor_newest_first(db):
+    quotes = [Quote.objects.create(content=f'Quote {i}', owner='Owner') for i in range(7)]
+    pages = _walk(APIClient(), reverse('quote-list'), {'page_size': 3})
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [row['id'] for page in pages for row in page] == [quote.pk for quote in reversed(quotes)]
+
+
+@pytest.mark.django_db
+def test_quote_page_size_is_bounded(db):
+    Quote.objects.bulk_create([Quote(content=f'Quote {i}', owner='Owner') for i in range(105)])
+    response = APIClient().get(reverse('quote-list'), {'page_size': 1000})
+    assert len(response.data['results']) == 100
+
+
+@pytest.mark.django_db
+def test_taxonomy_lists_come_from_the_snapshot(settings, django_assert_num_queries):
+    settings.BLOG_RESPONSE_CACHE_TIMEOUT = 0  # Exercise the snapshot, not the response cache
+    Category.objects.create(name='Beta')
+    Category.objects.create(name='Alpha')
+    client, url = APIClient(), reverse('category-list')
+
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert [row['name'] for row in response.data['results']] == ['Alpha', 'Beta']
+    with django_assert_num_queries(0):
+        assert client.get(url, {'page_size': 1}).data['count'] == 2
+
+    Category.objects.create(name='Gamma')  # The save signal bumps the snapshot's version
+    with django_assert_num_queries(1):
+        assert client.get(url).data['count'] == 3
+
+
+@pytest.mark.django_db
+def test_tag_snapshot_follows_deletes(settings):
+    settings.BLOG_RESPONSE_CACHE_TIMEOUT = 0
+    tags = [Tag.objects.create(name=name) for name in ('one', 'two')]
+    client, url = APIClient(), reverse('tag-list')
+    assert client.get(url).data['count'] == 2
+
+    tags[0].delete()
+    assert [row['name'] for row in client.get(url).data['results']] == ['two']
+
+
+@pytest.mark.django_db
+def test_snapshots_age_out_without_a_signal(settings, monkeypatch):
+    """Another worker's change never bumps this worker's generation when the cache is per-process."""
+    settings.BLOG_RESPONSE_CACHE_TIMEOUT = 0
+    Category.objects.create(name='Alpha')
+    client, url = APIClient(), reverse('category-list')
+    assert client.get(url).data['count'] == 1
+
+    Category.objects.bulk_create([Category(name='Beta', slug='beta')])  # No signal, like a write elsewhere
+    assert client.get(url).data['count'] == 1
+
+    clock = time.monotonic() + settings.BLOG_SNAPSHOT_TIMEOUT
+    monkeypatch.setattr(snapshots.time, 'monotonic', lambda: clock)
+    assert client.get(url).data['count'] == 2
@@ -0,0 +1,122 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from blog import moderation
+from blog.models import Category, Comment, Post, Quote
+
+User = get_user_model()
+
+
+@pytest.fixture
+def moderator(db):
+    return User.objects.create_user(
+        username='moderator', email='moderator@example.com', password='testpass123', is_staff=True,
+    )
+
+
+@pytest.fixture
+def reader(db):
+    return User.objects.create_user(
+        username='reader', email='reader@example.com', password='testpass123', first_name='Grace', last_name='Hopper',
+    )
+
+
+@pytest.fixture
+def comments(reader):
+    post = Post.objects.create(
+        title='Moderated', slug='moderated', content='<p>Body</p>', author=reader,
+        category=Category.objects.create(name='Moderation'), status='published',
+    )
+    quote = Quote.objects.create(content='Moderated quote', owner='Owner')
+    pending = [
+        Comment.objects.create(
+            post=post if i % 2 else None, quote=None if i % 2 else quote, user=reader, content=f'Pending {i}',
+        )
+        for i in range(6)
+    ]
+    Comment.objects.create(post=post, user=reader, content='Approved', is_approved=True)
+    Comment.objects.create(post=post, user=reader, content='Rejected', is_rejected=True)
+    return pending
+
+
+@pytest.fixture
+def staff_client(moderator):
+    client = APIClient()
+    client.force_authenticate(user=moderator)
+    return client
+
+
+@pytest.mark.django_db
+def test_queue_is_staff_only(comments, reader):
+    url = reverse('comment-moderation-list')
+    assert APIClient().get(url).status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+    client = APIClient()
+    client.force_authenticate(user=reader)
+    assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
+    response = client.post(reverse('comment-moderation-approve'), {'ids': [comments[0].pk]}, format='json')
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_queue_pages_pending_comments_oldest_first(staff_client, comments, django_assert_num_queries):
+    url = reverse('comment-moderation-list')
+    with django_assert_num_queries(1):  # Comments joined with user, post and quote
+        first = staff_client.get(url, {'page_size': 4}).data
+
+    assert [row['id'] for row in first['results']] == [comment.pk for comment in comments[:4]]
+    assert first['results'][0]['quote'] == {'id': comments[0].quote_id, 'owner': 'Owner'}
+    assert first['results'][1]['post'] == {'id': comments[1].post_id, 'slug': 'moderated', 'title': 'Moderated'}
+    assert first['results'][1]['user'] == 'Grace Hopper'
+    assert first['results'][1]['user_email'] == 'reader@example.com'
+
+    second = staff_client.get(first['next']).data
+    assert [row['id'] for row in second['results']] == [comment.pk for comment in comments[4:]]
+    assert second['next'] is None
+
+
+@pytest.mark.django_db
+def test_batch_decisions_run_as_one_statement(staff_client, comments, django_assert_num_queries, monkeypatch):
+    bumps = []
+    monkeypatch.setattr(moderation, 'bump_generation', bumps.append)
+    ids = [comment.pk for comment in comments]
+
+    with django_assert_num_queries(1):
+        response = staff_client.post(
+            reverse('comment-moderation-approve'), {'ids': ids[:4] + [10 ** 9]}, format='json',
+        )
+    assert response.data == {'updated': 4}
+    assert bumps == ['comment']
+
+    response = staff_client.post(reverse('comment-moderation-reject'), {'ids': ids[3:]}, format='json')
+    assert response.data == {'updated': 3}
+    assert bumps == ['comment', 'comment']
+
+    assert not moderation.queue().exists()
+    assert set(Comment.objects.filter(is_approved=True).values_list('content', flat=True)) == {
+        'Approved', 'Pending 0', 'Pending 1', 'Pending 2',
+    }
+    public = APIClient().get(reverse('comment-list'), {'page_size': 50}).data['results']
+    assert 'Pending 3' not in {comment['content'] for comment in public}  # Rejected after approval
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('ids', [[], ['x'], list(range(1, moderation.MAX_BATCH + 2))])
+def test_batch_is_validated(staff_client, ids):
+    response = staff_client.post(reverse('comment-moderation-reject'), {'ids': ids}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_commenters_cannot_approve_themselves(comments, reader):
+    client = APIClient()
+    client.force_authenticate(user=reader)
+    response = client.post(
+        reverse('comment-list'), {'post': comments[1].post_id, 'content': 'Sneaky', 'is_approved': True}, format='json',
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert Comment.objects.get(pk=response.data['id']).is_approved is False
@@ -0,0 +1,100 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from blog.models import Category, Comment, Post
+
+User = get_user_model()
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='pager', email='pager@example.com', password='testpass123')
+
+
+@pytest.fixture
+def posts(author):
+    category = Category.objects.create(name='Paging')
+    other = Category.objects.create(name='Other')
+    created = [
+        Post.objects.create(
+            title=f'Post {i}', content='<p>Body</p>', author=author,
+            category=category if i % 4 else other, status='published',
+        )
+        for i in range(12)
+    ]
+    # Several posts share a timestamp, so the id tie-breaker has to keep the order stable
+    Post.objects.filter(pk__in=[post.pk for post in created[3:9]]).update(created_at=timezone.now())
+    return created
+
+
+def _walk(client, url, params, key='next'):
+    pages = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        pages.append(response.data)
+        if not response.data[key]:
+            return pages
+        response = client.get(response.data[key])
+
+
+def _expected(queryset):
+    return list(queryset.order_by('-created_at', '-id').values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_walks_every_post_once_in_order(self, posts):
+        pages = _walk(APIClient(), reverse('post-list'), {'pagination': 'cursor', 'page_size': 5})
+
+        ids = [post['id'] for page in pages for post in page['results']]
+        assert ids == _expected(Post.objects.all())
+        assert [len(page['results']) for page in pages] == [5, 5, 2]
+        assert 'count' not in pages[0]
+        assert pages[0]['previous'] is None
+
+    def test_previous_links_walk_back(self, posts):
+        client = APIClient()
+        forward = _walk(client, reverse('post-list'), {'pagination': 'cursor', 'page_size': 5})
+        backward = [forward[-1]]
+        while backward[-1]['previous']:
+            backward.append(client.get(backward[-1]['previous']).data)
+
+        assert [page['results'] for page in reversed(backward)] == [page['results'] for page in forward]
+
+    def test_respects_filters(self, posts):
+        category = posts[1].category
+        pages = _walk(APIClient(), reverse('post-list'), {'pagination': 'cursor', 'page_size': 2, 'category': category.slug})
+
+        ids = [post['id'] for page in pages for post in page['results']]
+        assert ids == _expected(Post.objects.filter(category=category))
+
+    def test_tampered_cursor_is_rejected(self, posts):
+        client = APIClient()
+        first = client.get(reverse('post-list'), {'pagination': 'cursor', 'page_size': 5}).data
+        response = client.get(first['next'].replace('cursor=', 'cursor=x'))
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('param', [{'ordering': 'created_at'}, {'search': 'post'}])
+    def test_ordering_and_search_are_rejected(self, posts, param):
+        response = APIClient().get(reverse('post-list'), {'pagination': 'cursor', **param})
+        assert response.status_code == 400
+        assert list(response.data) == list(param)
+        assert APIClient().get(reverse('post-list'), param).status_code == 200  # Fine with page numbers
+
+    def test_page_number_mode_is_still_the_default(self, posts):
+        response = APIClient().get(reverse('post-list'))
+        assert response.data['count'] == len(posts)
+
+    def test_comments_by_post(self, posts, author):
+        for i in range(7):
+            Comment.objects.create(post=posts[0], user=author, content=f'Comment {i}', is_approved=True)
+        Comment.objects.create(post=posts[1], user=author, content='Elsewhere', is_approved=True)
+
+        pages = _walk(APIClient(), reverse('comment-list'), {'pagination': 'cursor', 'page_size': 3, 'post': posts[0].pk})
+
+        ids = [comment['id'] for page in pages for comment in page['results']]
+        assert ids == _expected(Comment.objects.filter(post=posts[0]))
@@ -0,0 +1,94 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog.models import Category, Post, Tag
+from blog.views import PostViewSet
+
+User = get_user_model()
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='batcher', email='batcher@example.com', password='testpass123')
+
+
+@pytest.fixture
+def posts(author):
+    category = Category.objects.create(name='Batch')
+    tag = Tag.objects.create(name='Featured')
+    created = {}
+    for slug, status, restricted in [
+        ('first', 'published', False),
+        ('second', 'published', False),
+        ('members-only', 'published', True),
+        ('unfinished', 'draft', False),
+    ]:
+        post = Post.objects.create(
+            title=slug, slug=slug, content=f'<p>{slug}</p>', author=author,
+            category=category, status=status, is_restricted=restricted,
+        )
+        post.tags.add(tag)
+        created[slug] = post
+    return created
+
+
+def _batch(client, slugs):
+    return client.get(reverse('post-batch'), {'slugs': slugs})
+
+
+@pytest.mark.django_db
+def test_results_follow_request_order_with_markers(posts):
+    response = _batch(APIClient(), 'second,missing,first,members-only,unfinished')
+
+    assert response.status_code == 200
+    results = response.data['results']
+    assert [(entry['slug'], entry['status']) for entry in results] == [
+        ('second', 'ok'),
+        ('missing', 'not_found'),
+        ('first', 'ok'),
+        ('members-only', 'forbidden'),
+        ('unfinished', 'not_found'),
+    ]
+    assert results[0]['post']['content'] == '<p>second</p>'
+    assert results[0]['post']['tags'] == ['featured']
+    assert results[1]['post'] is None and results[3]['post'] is None
+
+
+@pytest.mark.django_db
+def test_restricted_posts_visible_when_authenticated(posts, author):
+    client = APIClient()
+    client.force_authenticate(user=author)
+
+    results = _batch(client, 'members-only').data['results']
+
+    assert results[0]['status'] == 'ok'
+    assert results[0]['post']['slug'] == 'members-only'
+
+
+@pytest.mark.django_db
+def test_duplicates_and_blanks_are_ignored(posts):
+    results = _batch(APIClient(), ' first, ,first,second ').data['results']
+    assert [entry['slug'] for entry in results] == ['first', 'second']
+
+
+@pytest.mark.django_db
+def test_one_query_for_posts_however_many_slugs(posts, django_assert_num_queries):
+    with django_assert_num_queries(2):  # Posts joined with author/category, tags
+        response = _batch(APIClient(), 'first,second,members-only,missing')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('slugs', ['', ',,'])
+def test_slugs_are_required(posts, slugs):
+    response = _batch(APIClient(), slugs)
+    assert response.status_code == 400
+    assert 'slugs' in response.data
+
+
+@pytest.mark.django_db
+def test_slug_count_is_bounded(posts):
+    slugs = ','.join(f'post-{i}' for i in range(PostViewSet.batch_max_slugs + 1))
+    assert _batch(APIClient(), slugs).status_code == 400
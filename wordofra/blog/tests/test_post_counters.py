@@ -0,0 +1,148 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import counters
+from blog.models import Category, Post, Tag
+
+User = get_user_model()
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='counter', email='counter@example.com', password='testpass123')
+
+
+@pytest.fixture
+def taxonomy(db):
+    return {
+        'news': Category.objects.create(name='News'),
+        'notes': Category.objects.create(name='Notes'),
+        'django': Tag.objects.create(name='Django'),
+        'python': Tag.objects.create(name='Python'),
+    }
+
+
+def _post(author, category, **kwargs):
+    kwargs.setdefault('status', 'published')
+    title = f'Counted {Post.objects.count()}'
+    return Post.objects.create(title=title, content='<p>Body</p>', author=author, category=category, **kwargs)
+
+
+def _counts(obj):
+    obj.refresh_from_db()
+    return obj.published_post_count, obj.public_post_count
+
+
+def _assert_consistent():
+    assert counters.reconcile(Category, repair=False) == []
+    assert counters.reconcile(Tag, repair=False) == []
+
+
+@pytest.mark.django_db
+def test_lifecycle_of_a_post(author, taxonomy):
+    news, notes, django_tag = taxonomy['news'], taxonomy['notes'], taxonomy['django']
+
+    post = _post(author, news, status='draft')
+    post.tags.add(django_tag)
+    assert _counts(news) == (0, 0) and _counts(django_tag) == (0, 0)
+
+    post.status = 'published'
+    post.save()
+    assert _counts(news) == (1, 1) and _counts(django_tag) == (1, 1)
+
+    post.is_restricted = True
+    post.save()
+    assert _counts(news) == (1, 0) and _counts(django_tag) == (1, 0)
+
+    post.category = notes
+    post.save()
+    assert _counts(news) == (0, 0) and _counts(notes) == (1, 0)
+
+    post.delete()
+    assert _counts(notes) == (0, 0) and _counts(django_tag) == (0, 0)
+    _assert_consistent()
+
+
+@pytest.mark.django_db
+def test_tag_changes_from_either_side(author, taxonomy):
+    django_tag, python_tag = taxonomy['django'], taxonomy['python']
+    public = _post(author, taxonomy['news'])
+    restricted = _post(author, taxonomy['news'], is_restricted=True)
+    draft = _post(author, taxonomy['news'], status='draft')
+
+    public.tags.add(django_tag, python_tag)
+    python_tag.posts.add(restricted, draft)
+    assert _counts(django_tag) == (1, 1)
+    assert _counts(python_tag) == (2, 1)
+
+    # Removing a tag the post does not have must not be counted
+    restricted.tags.remove(django_tag, python_tag)
+    assert _counts(django_tag) == (1, 1)
+    assert _counts(python_tag) == (1, 1)
+
+    python_tag.posts.clear()
+    public.tags.clear()
+    assert _counts(django_tag) == (0, 0) and _counts(python_tag) == (0, 0)
+
+    public.tags.set([python_tag])
+    django_tag.posts.set([public, restricted])
+    assert _counts(python_tag) == (1, 1) and _counts(django_tag) == (2, 1)
+    _assert_consistent()
+
+
+@pytest.mark.django_db
+def test_post_count_depends_on_the_caller(author, taxonomy):
+    news = taxonomy['news']
+    _post(author, news)
+    _post(author, news, is_restricted=True)
+    client = APIClient()
+    url = reverse('category-detail', kwargs={'pk': news.pk})
+
+    assert client.get(url).data['post_count'] == 1
+    client.force_authenticate(user=author)
+    assert client.get(url).data['post_count'] == 2
+
+
+@pytest.mark.django_db
+def test_list_counts_without_extra_queries(author, taxonomy, django_assert_num_queries):
+    for category in (taxonomy['news'], taxonomy['notes']):
+        _post(author, category)
+    with django_assert_num_queries(1):
+        response = APIClient().get(reverse('category-list'))
+    assert {row['slug']: row['post_count'] for row in response.data['results']} == {'news': 1, 'notes': 1}
+
+
+@pytest.mark.django_db
+def test_reconcile_command_repairs_drift(author, taxonomy):
+    news = taxonomy['news']
+    post = _post(author, news)
+    post.tags.add(taxonomy['django'])
+    Post.objects.filter(pk=post.pk).update(status='draft')  # Bypasses the signals
+
+    with pytest.raises(CommandError):
+        call_command('reconcile_post_counts', '--check', stdout=StringIO())
+    out = StringIO()
+    call_command('reconcile_post_counts', stdout=out)
+
+    assert 'Repaired 2 row(s)' in out.getvalue()
+    assert _counts(news) == (0, 0) and _counts(taxonomy['django']) == (0, 0)
+    call_command('reconcile_post_counts', '--check', stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_drifted_counts_never_go_negative(author, taxonomy):
+    news = taxonomy['news']
+    post = _post(author, news)
+    Category.objects.filter(pk=news.pk).update(published_post_count=0, public_post_count=0)  # Drift
+
+    post.delete()
+    assert _counts(news) == (0, 0)
+
+    call_command('reconcile_post_counts', stdout=StringIO())
+    assert _counts(news) == (0, 0)
@@ -0,0 +1,66 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog.models import Category, Post
+
+User = get_user_model()
+
+CONTENT = (
+    '<p><img class="wide" src="https://example.com/cover.jpg"></p>'
+    '<p>' + ' '.join(['word'] * 450) + '</p>'
+    '<img src="data:image/png;base64,AAAA">'
+)
+
+
+@pytest.fixture
+def post(db):
+    author = User.objects.create_user(username='writer', email='writer@example.com', password='testpass123')
+    category = Category.objects.create(name='Essays')
+    return Post.objects.create(
+        title='Long Post', content=CONTENT, author=author, category=category, status='published'
+    )
+
+
+@pytest.mark.django_db
+class TestDerivedColumns:
+    def test_columns_computed_on_save(self, post):
+        post.refresh_from_db()
+        assert post.excerpt == ' '.join(['word'] * 450)[:150] + '...'
+        assert post.first_image_url == 'https://example.com/cover.jpg'
+        assert post.word_count == 450
+        assert post.reading_time == 3
+
+    def test_update_fields_content_refreshes_columns(self, post):
+        post.content = '<p>Short</p>'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        assert post.excerpt == 'Short'
+        assert post.first_image_url is None
+        assert post.word_count == 1
+        assert post.reading_time == 1
+
+    def test_list_never_selects_content(self, post):
+        with CaptureQueriesContext(connection) as ctx:
+            response = APIClient().get(reverse('post-list'))
+        assert response.status_code == 200
+        assert response.data['results'][0]['excerpt'] == post.excerpt
+        assert response.data['results'][0]['reading_time'] == 3
+        assert not any('"blog_post"."content"' in q['sql'] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_backfill_command_recomputes_columns(post):
+    Post.objects.update(excerpt='', first_image_url=None, word_count=0, reading_time=0)
+
+    call_command('backfill_post_metadata', workers=2, batch_size=1, stdout=StringIO())
+
+    post.refresh_from_db()
+    assert post.word_count == 450
+    assert post.first_image_url == 'https://example.com/cover.jpg'
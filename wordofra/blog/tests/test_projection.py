@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db.models.query_utils import DeferredAttribute
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from blog.models import Category, Post
+from blog.projection import DeferredFieldLoadError, forbid_deferred_loading, projected_fields
+from blog.serializers import CommentSerializer, PostListSerializer
+
+User = get_user_model()
+
+
+@pytest.fixture
+def post(db):
+    author = User.objects.create_user(username='projector', email='projector@example.com', password='testpass123')
+    category = Category.objects.create(name='Projection')
+    return Post.objects.create(
+        title='Projected', content='<p>' + 'x' * 10000 + '</p>', author=author, category=category,
+        status='published',
+    )
+
+
+class TestProjectedFields:
+    def test_post_list_columns(self):
+        fields = projected_fields(PostListSerializer)
+        assert 'content' not in fields
+        assert 'search_vector' not in fields
+        assert {'id', 'title', 'excerpt', 'created_at', 'category', 'category__slug', 'author'} <= set(fields)
+        # author is rendered through __str__, so its whole row is loaded
+        assert not any(field.startswith('author__') for field in fields)
+
+    def test_comment_columns(self):
+        assert {'post', 'quote', 'user', 'content'} <= set(projected_fields(CommentSerializer))
+
+    def test_nested_and_dotted_sources(self):
+        class CategoryOnly(serializers.ModelSerializer):
+            class Meta:
+                model = Category
+                fields = ['name']
+
+        class Nested(serializers.ModelSerializer):
+            category = CategoryOnly()
+            author_email = serializers.CharField(source='author.email')
+
+            class Meta:
+                model = Post
+                fields = ['title', 'category', 'author_email']
+
+        assert projected_fields(Nested) == [
+            'author', 'author__email', 'category', 'category__id', 'category__name', 'id', 'title',
+        ]
+
+
+@pytest.mark.django_db
+class TestDeferredGuard:
+    def test_lazy_load_raises(self, post):
+        row = Post.objects.only('id', 'title').get(pk=post.pk)
+        with forbid_deferred_loading(), pytest.raises(DeferredFieldLoadError):
+            row.content
+
+    def test_loaded_fields_are_fine(self, post):
+        row = Post.objects.only('id', 'title').get(pk=post.pk)
+        with forbid_deferred_loading():
+            assert row.title == 'Projected'
+        assert row.content == post.content  # Allowed again outside the guard
+
+    def test_guard_is_removed_on_exit(self):
+        original = DeferredAttribute.__get__
+        with forbid_deferred_loading():
+            with forbid_deferred_loading():
+                assert DeferredAttribute.__get__ is not original
+            assert DeferredAttribute.__get__ is not original  # The outer block still needs it
+        assert DeferredAttribute.__get__ is original
+
+    def test_list_endpoints_stay_within_projection(self, post):
+        assert APIClient().get(reverse('post-list')).status_code == 200
+        assert APIClient().get(reverse('comment-list')).status_code == 200
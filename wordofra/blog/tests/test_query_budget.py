@@ -0,0 +1,122 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from blog.models import Category, Comment, CommentOutbox, Post, PostViewBucket, Quote, Tag
+from blog.tracking import current_hour
+from blog.urls import router
+
+User = get_user_model()
+
+# Maximum number of queries each endpoint may run, regardless of how many rows
+# it returns. Every route registered on the blog router must be listed here.
+QUERY_BUDGETS = {
+    'post-list': 5,        # ETag summary, count, posts joined with author/category, tags, comment counts
+    'post-detail': 3,      # ETag metadata, post joined with author/category, tags
+    'post-batch': 2,       # posts joined with author/category, tags
+    'post-related': 4,     # source post, neighbours joined with author/category, tags, comment counts
+    'post-popular': 4,     # ranking (cold cache), posts joined with author/category, tags, comment counts
+    'comment-list': 2,     # count, comments joined with user
+    'comment-detail': 1,
+    'comment-submission': 1,          # outbox row by tracking id
+    'comment-subtree': 2,             # the comment's path, its subtree joined with users
+    'comment-moderation-list': 1,     # queue joined with user, post and quote
+    'comment-moderation-approve': 1,  # one UPDATE for the whole batch
+    'comment-moderation-reject': 1,
+    'category-list': 1,
+    'category-detail': 1,
+    'tag-list': 1,
+    'tag-detail': 1,
+    'quote-list': 2,       # ETag summary, quotes
+    'quote-detail': 2,     # ETag metadata, quote
+    'quote-daily': 2,      # slot count (cached until quotes change), quote by slot
+    'quote-random': 2,
+}
+
+# Routes only staff can use, and the ones that are not read with GET
+STAFF_ROUTES = {'comment-moderation-list', 'comment-moderation-approve', 'comment-moderation-reject'}
+ROUTE_METHODS = {'comment-moderation-approve': 'post', 'comment-moderation-reject': 'post'}
+
+SEEDED_ROWS = 8
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def seeded(db):
+    """Several rows per model so that per-row queries show up in the counts."""
+    authors = [
+        User.objects.create_user(
+            username=f'author{i}', email=f'author{i}@example.com', password='testpass123'
+        )
+        for i in range(SEEDED_ROWS)
+    ]
+    categories = [Category.objects.create(name=f'Category {i}') for i in range(SEEDED_ROWS)]
+    tags = [Tag.objects.create(name=f'Tag {i}') for i in range(SEEDED_ROWS)]
+    quote = None
+    posts = []
+    for i in range(SEEDED_ROWS):
+        post = Post.objects.create(
+            title=f'Post {i}',
+            content=f'<p>Body {i}</p>',
+            author=authors[i],
+            category=categories[i],
+            status='published',
+        )
+        post.tags.set(tags[:i + 1])
+        PostViewBucket.objects.create(post=post, hour=current_hour(), views=i + 1)
+        posts.append(post)
+        quote = Quote.objects.create(content=f'Quote {i}', owner=f'Owner {i}')
+        Comment.objects.create(post=posts[0], user=authors[i], content=f'Comment {i}', is_approved=True)
+        Comment.objects.create(quote=quote, user=authors[i], content=f'Pending {i}')  # Moderation queue
+    return {
+        'post': posts[-1],
+        'comment': Comment.objects.first(),
+        'category': categories[0],
+        'tag': tags[0],
+        'quote': quote,
+        'submission': CommentOutbox.objects.create(user=authors[0], post_id=posts[0].pk, content='Queued'),
+    }
+
+
+def _route_kwargs(name, seeded):
+    basename, _, action = name.rpartition('-')
+    if action in ('detail', 'related', 'subtree'):
+        obj = seeded[basename]
+        return {'pk': obj.slug if basename == 'post' else obj.pk}
+    if action == 'submission':
+        return {'tracking_id': seeded['submission'].tracking_id}
+    return {}
+
+
+def _route_params(name, seeded):
+    if name == 'post-batch':
+        return {'slugs': ','.join(Post.objects.values_list('slug', flat=True))}
+    if name in ('comment-moderation-approve', 'comment-moderation-reject'):
+        return {'ids': list(Comment.objects.values_list('pk', flat=True))}
+    return {}
+
+
+def test_every_route_declares_a_budget():
+    names = {url.name for url in router.urls if url.name and url.name != 'api-root'}
+    assert names - set(QUERY_BUDGETS) == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(QUERY_BUDGETS))
+def test_endpoint_within_query_budget(api_client, seeded, django_assert_max_num_queries, name):
+    url = reverse(name, kwargs=_route_kwargs(name, seeded))
+    params = _route_params(name, seeded)
+    method = ROUTE_METHODS.get(name, 'get')
+    if name in STAFF_ROUTES:
+        api_client.force_authenticate(user=User.objects.create_user(
+            username='moderator', email='moderator@example.com', password='testpass123', is_staff=True,
+        ))
+    with django_assert_max_num_queries(QUERY_BUDGETS[name]):
+        response = getattr(api_client, method)(url, params, format='json' if method == 'post' else None)
+    assert response.status_code == status.HTTP_200_OK
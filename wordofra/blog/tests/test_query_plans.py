@@ -0,0 +1,134 @@
+"""
+Query-plan regression tests: each hot list query the API issues is run
+through EXPLAIN against seeded data, and the plan must reach the rows through
+an index instead of a sequential scan plus sort. Plans are only checked on
+PostgreSQL; the partial indexes they rely on are checked against the
+migrations on every database.
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog.models import Category, Comment, Post, Quote, Tag
+
+User = get_user_model()
+
+SEEDED_ROWS = 400
+
+# (url name, query params, authenticated, sort allowed)
+CASES = [
+    ('post-list', {}, False, False),
+    ('post-list', {}, True, False),
+    ('post-list', {'category': 'category-1'}, False, False),
+    ('post-list', {'author': 'AUTHOR'}, False, False),
+    ('post-list', {'pagination': 'cursor'}, False, False),
+    # A tag narrows the set through the join table, so sorting its posts is expected
+    ('post-list', {'tag': 'tag-1'}, False, True),
+    ('comment-list', {}, False, False),
+    ('comment-list', {'post': 'POST'}, False, False),
+    ('comment-list', {'quote': 'QUOTE'}, False, False),
+    ('comment-list', {'user': 'AUTHOR'}, False, False),
+    ('comment-list', {'post': 'POST', 'pagination': 'cursor'}, False, False),
+]
+
+# Partial indexes the hot queries rely on: (model, index name) -> (fields, condition)
+PARTIAL_INDEXES = {
+    ('post', 'post_published_created_idx'): (['-created_at', '-id'], Q(status='published')),
+    ('post', 'post_public_created_idx'): (['-created_at', '-id'], Q(is_restricted=False, status='published')),
+    ('post', 'post_pub_category_idx'): (['category', '-created_at', '-id'], Q(status='published')),
+    ('post', 'post_pub_author_idx'): (['author', '-created_at', '-id'], Q(status='published')),
+    ('comment', 'comment_approved_created_idx'): (['-created_at', '-id'], Q(is_approved=True)),
+    ('comment', 'comment_appr_post_idx'): (['post', '-created_at', '-id'], Q(is_approved=True)),
+    ('comment', 'comment_appr_quote_idx'): (['quote', '-created_at', '-id'], Q(is_approved=True)),
+    ('comment', 'comment_appr_user_idx'): (['user', '-created_at', '-id'], Q(is_approved=True)),
+}
+
+
+@pytest.fixture
+def seeded(db):
+    if connection.vendor != 'postgresql':
+        pytest.skip('Query plans are checked against PostgreSQL')
+    authors = [
+        User.objects.create_user(username=f'planner{i}', email=f'planner{i}@example.com', password='testpass123')
+        for i in range(4)
+    ]
+    categories = [Category.objects.create(name=f'Category {i}') for i in range(4)]
+    tags = [Tag.objects.create(name=f'Tag {i}') for i in range(4)]
+    quote = Quote.objects.create(content='Planned', owner='Owner')
+    Post.objects.bulk_create([
+        Post(
+            title=f'Post {i}', slug=f'post-{i}', content='<p>Body</p>',
+            author=authors[i % 4], category=categories[i % 4],
+            status='published' if i % 5 else 'draft', is_restricted=i % 7 == 0,
+        )
+        for i in range(SEEDED_ROWS)
+    ])
+    posts = list(Post.objects.all())
+    Post.tags.through.objects.bulk_create([
+        Post.tags.through(post=post, tag=tags[post.pk % 4]) for post in posts
+    ])
+    Comment.objects.bulk_create([
+        Comment(
+            post=posts[i % 3] if i % 2 else None, quote=None if i % 2 else quote,
+            user=authors[i % 4], content='Comment', is_approved=i % 3 != 0,
+        )
+        for i in range(SEEDED_ROWS)
+    ])
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE blog_post, blog_post_tags, blog_comment')
+    return {'AUTHOR': authors[1].pk, 'POST': posts[1].pk, 'QUOTE': quote.pk, 'user': authors[0]}
+
+
+def _page_queries(client, url, params):
+    """The SELECTs that fetch a page of rows (ordered and limited)."""
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return [
+        query['sql'] for query in ctx.captured_queries
+        if query['sql'].startswith('SELECT') and 'ORDER BY' in query['sql'] and 'LIMIT' in query['sql']
+    ]
+
+
+def _explain(sql):
+    with connection.cursor() as cursor:
+        # Small test tables are cheaper to scan, so make the planner show
+        # whether an index *can* serve the query.
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('SET LOCAL enable_bitmapscan = off')
+        cursor.execute(f'EXPLAIN {sql}')
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name,params,authenticated,sort_allowed', CASES)
+def test_hot_queries_use_indexes(seeded, name, params, authenticated, sort_allowed):
+    client = APIClient()
+    if authenticated:
+        client.force_authenticate(user=seeded['user'])
+    params = {key: seeded.get(value, value) for key, value in params.items()}
+
+    queries = _page_queries(client, reverse(name), params)
+    assert queries, 'expected a paginated SELECT'
+    for sql in queries:
+        plan = _explain(sql)
+        assert 'Seq Scan on blog_post ' not in plan, plan
+        assert 'Seq Scan on blog_comment' not in plan, plan
+        if not sort_allowed:
+            assert 'Sort' not in plan, plan
+
+
+@pytest.mark.parametrize('model_name,index_name', sorted(PARTIAL_INDEXES))
+def test_migrations_create_partial_indexes(model_name, index_name):
+    state = MigrationLoader(None, ignore_no_migrations=True).project_state()
+    indexes = {index.name: index for index in state.models['blog', model_name].options['indexes']}
+    fields, condition = PARTIAL_INDEXES[model_name, index_name]
+
+    assert index_name in indexes
+    assert indexes[index_name].fields == fields
+    assert indexes[index_name].condition == condition
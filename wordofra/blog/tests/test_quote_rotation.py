@@ -0,0 +1,125 @@
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import quote_rotation
+from blog.cache import get_generations
+from blog.models import Quote, QuoteSlot
+
+
+@pytest.fixture
+def quotes(db):
+    return [Quote.objects.create(content=f'Quote {i}', owner=f'Owner {i}') for i in range(7)]
+
+
+def _assert_dense():
+    positions = sorted(QuoteSlot.objects.values_list('position', flat=True))
+    assert positions == list(range(Quote.objects.count()))
+    assert set(QuoteSlot.objects.values_list('quote_id', flat=True)) == set(Quote.objects.values_list('id', flat=True))
+
+
+@pytest.mark.parametrize('count', [1, 2, 7, 10, 36, 97])
+def test_rotation_features_every_quote_once_per_cycle(count):
+    start = date(2026, 1, 1)
+    positions = [quote_rotation.daily_position(start + timedelta(days=i), count) for i in range(count)]
+    assert sorted(positions) == list(range(count))
+
+
+@pytest.mark.django_db
+def test_index_stays_dense(quotes):
+    _assert_dense()
+
+    quotes[2].delete()  # The last slot moves into the gap
+    _assert_dense()
+    assert QuoteSlot.objects.get(position=2).quote_id == quotes[6].pk
+
+    quotes[6].delete()
+    Quote.objects.filter(pk__in=[quotes[0].pk, quotes[5].pk]).delete()
+    Quote.objects.create(content='New', owner='New')
+    _assert_dense()
+
+
+@pytest.mark.django_db
+def test_daily_quote_is_cached_until_midnight(quotes, django_assert_num_queries):
+    url = reverse('quote-daily')
+    response = APIClient().get(url)
+    assert response.status_code == 200
+    max_age = int(response['Cache-Control'].rsplit('=', 1)[1])
+    assert 0 < max_age <= 24 * 60 * 60
+
+    with django_assert_num_queries(0):
+        assert APIClient().get(url).data == response.data
+
+
+@pytest.mark.django_db
+def test_daily_quote_changes_with_the_day(quotes):
+    serialize = lambda quote: quote.pk  # noqa: E731
+    monday = datetime(2026, 3, 2, 23, 59, tzinfo=timezone.utc)
+    picks = [quote_rotation.daily(serialize, monday + timedelta(days=i)) for i in range(len(quotes))]
+
+    assert sorted(picks) == sorted(quote.pk for quote in quotes)
+    assert quote_rotation.daily(serialize, monday.replace(hour=0)) == picks[0]
+    assert quote_rotation.seconds_until_midnight(monday) == 60
+
+
+@pytest.mark.django_db
+def test_random_quote(quotes, django_assert_max_num_queries):
+    with django_assert_max_num_queries(2):
+        response = APIClient().get(reverse('quote-random'))
+    assert response.status_code == 200
+    assert response.data['id'] in {quote.pk for quote in quotes}
+
+
+@pytest.mark.django_db
+def test_no_quotes(db):
+    assert APIClient().get(reverse('quote-daily')).status_code == 404
+    assert APIClient().get(reverse('quote-random')).status_code == 404
+
+
+@pytest.mark.django_db
+def test_rebuild_command(quotes):
+    QuoteSlot.objects.filter(position__gte=3).delete()
+    out = StringIO()
+
+    call_command('rebuild_quote_index', stdout=out)
+
+    assert 'Indexed 7 of 7 quotes' in out.getvalue()
+    _assert_dense()
+
+
+@pytest.mark.django_db
+def test_daily_pick_survives_other_quote_changes(quotes):
+    serialize = lambda quote: quote.pk  # noqa: E731
+    now = datetime(2026, 3, 2, 12, tzinfo=timezone.utc)
+    chosen = quote_rotation.daily(serialize, now)
+
+    for quote in quotes:
+        if quote.pk != chosen:
+            quote.delete()
+            break
+    Quote.objects.create(content='Newcomer', owner='New')
+    Quote.objects.filter(pk=chosen).first().save()
+    assert quote_rotation.daily(serialize, now) == chosen
+
+    Quote.objects.filter(pk=chosen).delete()
+    replacement = quote_rotation.daily(serialize, now)
+    assert replacement not in (None, chosen)
+    assert quote_rotation.daily(serialize, now) == replacement
+
+
+@pytest.mark.django_db
+def test_pick_falls_back_over_a_hole(quotes):
+    QuoteSlot.objects.filter(position=3).delete()  # As if a fill was lost
+    assert quote_rotation._pick(lambda count: 3).pk == QuoteSlot.objects.get(position=4).quote_id
+
+
+@pytest.mark.django_db
+def test_slot_count_expires(quotes):
+    assert quote_rotation.slot_count() == 7
+    key = quote_rotation.COUNT_KEY.format(generation=get_generations(['quote'])['quote'])
+    assert cache._expire_info[cache.make_key(key)] is not None  # The test settings use LocMemCache
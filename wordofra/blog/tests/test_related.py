@@ -0,0 +1,193 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import related
+from blog.models import Category, Post, PostTermVector, RelatedPost, Tag
+
+User = get_user_model()
+
+BODIES = {
+    'python-decorators': ('Python decorators', 'Decorators wrap python functions and closures.', 'python'),
+    'python-generators': ('Python generators', 'Generators yield values lazily in python functions.', 'python'),
+    'python-asyncio': ('Async python', 'Coroutines and the asyncio event loop in python.', 'python'),
+    'sourdough': ('Baking sourdough', 'Flour, water, salt and a starter make bread dough.', 'baking'),
+    'focaccia': ('Focaccia bread', 'Olive oil, flour and salt on a bread dough.', 'baking'),
+}
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='relater', email='relater@example.com', password='testpass123')
+
+
+@pytest.fixture
+def posts(author, django_capture_on_commit_callbacks):
+    categories = {name: Category.objects.create(name=name.title()) for name in ('python', 'baking')}
+    tags = {name: Tag.objects.create(name=name) for name in ('python', 'baking')}
+    created = {}
+    with django_capture_on_commit_callbacks(execute=True):
+        for slug, (title, body, topic) in BODIES.items():
+            post = Post.objects.create(
+                title=title, slug=slug, content=f'<p>{body}</p>', author=author,
+                category=categories[topic], status='published',
+            )
+            post.tags.add(tags[topic])
+            created[slug] = post
+    related.rebuild()
+    return created
+
+
+def _neighbours(post):
+    return list(
+        RelatedPost.objects.filter(post=post).order_by('rank').values_list('related__slug', flat=True)
+    )
+
+
+def test_vectors_are_normalized():
+    vector = related.weigh({'python': 4, 'code': 1, 'tag:python': 2}, {'code': 3}, 10)
+    assert sum(weight * weight for weight in vector.values()) == pytest.approx(1.0)
+    assert max(vector, key=vector.get) == 'python'
+
+
+@pytest.mark.django_db
+def test_rebuild_ranks_posts_on_the_same_topic_first(posts):
+    neighbours = _neighbours(posts['python-decorators'])
+    assert set(neighbours[:2]) == {'python-generators', 'python-asyncio'}
+    assert set(_neighbours(posts['sourdough'])[:1]) == {'focaccia'}
+    assert 'python-decorators' not in neighbours
+
+
+@pytest.mark.django_db
+def test_saving_a_post_updates_its_neighbours_incrementally(posts, author, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        post = Post.objects.create(
+            title='Python closures', slug='python-closures',
+            content='<p>Closures capture variables in python functions, like decorators.</p>',
+            author=author, category=posts['python-decorators'].category, status='published',
+        )
+
+    assert PostTermVector.objects.filter(post=post).exists()
+    assert _neighbours(post)[0] == 'python-decorators'
+    assert 'python-closures' in _neighbours(posts['python-decorators'])
+
+
+@pytest.mark.django_db
+def test_a_shared_category_alone_selects_no_candidates(posts, author, django_capture_on_commit_callbacks):
+    before = _neighbours(posts['sourdough'])
+    with django_capture_on_commit_callbacks(execute=True):
+        post = Post.objects.create(
+            title='Python closures', slug='python-closures',
+            content='<p>Closures capture variables in python functions, like decorators.</p>',
+            author=author, category=posts['sourdough'].category, status='published',
+        )
+
+    assert not {'sourdough', 'focaccia'} & set(_neighbours(post))
+    assert _neighbours(posts['sourdough']) == before
+
+
+@pytest.mark.django_db
+def test_unpublishing_removes_the_post_everywhere(posts, django_capture_on_commit_callbacks):
+    post = posts['python-generators']
+    post.status = 'draft'
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+
+    assert not PostTermVector.objects.filter(post=post).exists()
+    assert not RelatedPost.objects.filter(related=post).exists()
+    assert _neighbours(post) == []
+
+
+@pytest.mark.django_db
+def test_one_save_recomputes_once(posts, author, monkeypatch, django_capture_on_commit_callbacks):
+    updated = []
+    original = related.update_post
+    monkeypatch.setattr(related, 'update_post', lambda post: updated.append(post.slug) or original(post))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post = Post.objects.create(
+            title='Python closures', slug='python-closures', content='<p>Closures in python.</p>',
+            author=author, category=posts['python-decorators'].category, status='published',
+        )
+        post.tags.set(Tag.objects.filter(name='python'))
+        post.content = '<p>Closures capture variables in python functions.</p>'
+        post.save()
+        assert updated == []  # Nothing runs before the commit
+
+    assert updated == ['python-closures']
+    assert 'tag:python' in PostTermVector.objects.get(post=post).terms
+
+
+@pytest.mark.django_db
+def test_rolled_back_saves_do_not_block_later_ones(posts, monkeypatch, django_capture_on_commit_callbacks):
+    updated = []
+    monkeypatch.setattr(related, 'update_post', lambda post: updated.append(post.slug))
+    post = posts['focaccia']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            post.save()
+            raise RuntimeError
+        assert updated == []
+        post.save()
+
+    assert updated == ['focaccia']
+
+
+@pytest.mark.django_db
+def test_related_list_is_invalidated_after_the_recompute(posts, author, django_capture_on_commit_callbacks):
+    url = reverse('post-related', kwargs={'pk': 'python-decorators'})
+    client = APIClient()
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.create(
+            title='Python closures', slug='python-closures',
+            content='<p>Closures capture variables in python functions, like decorators.</p>',
+            author=author, category=posts['python-decorators'].category, status='published',
+        )
+        client.get(url)  # Between the save and the recompute
+
+    assert 'python-closures' in [post['slug'] for post in client.get(url).data['results']]
+
+
+@pytest.mark.django_db
+def test_related_endpoint(posts, django_assert_num_queries):
+    url = reverse('post-related', kwargs={'pk': 'python-decorators'})
+    with django_assert_num_queries(4):
+        response = APIClient().get(url, {'limit': 2})
+
+    assert response.status_code == 200
+    assert [post['slug'] for post in response.data['results']] == _neighbours(posts['python-decorators'])[:2]
+    assert 'content' not in response.data['results'][0]
+
+
+@pytest.mark.django_db
+def test_related_endpoint_respects_restrictions(posts, author):
+    Post.objects.filter(slug='python-generators').update(is_restricted=True)
+    client = APIClient()
+    url = reverse('post-related', kwargs={'pk': 'python-decorators'})
+
+    slugs = [post['slug'] for post in client.get(url).data['results']]
+    assert 'python-generators' not in slugs
+
+    restricted_url = reverse('post-related', kwargs={'pk': 'python-generators'})
+    assert client.get(restricted_url).status_code == 403
+    client.force_authenticate(user=author)
+    assert client.get(restricted_url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_related_endpoint_unknown_post(posts):
+    response = APIClient().get(reverse('post-related', kwargs={'pk': 'missing'}))
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_rebuild_command(posts):
+    RelatedPost.objects.all().delete()
+    call_command('rebuild_related_posts', stdout=StringIO())
+    assert _neighbours(posts['focaccia'])[0] == 'sourdough'
@@ -0,0 +1,104 @@
+import hashlib
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import rendering
+from blog.models import Category, Post
+from blog.rendering import render_html
+
+User = get_user_model()
+
+TINYMCE_BODY = (
+    '<h2 style="text-align: center;" data-mce-style="text-align: center;">Getting   started</h2>\n'
+    '<p>&nbsp;</p>\n'
+    '<p style="color: #000;"><span class="mce-word">Hello</span>&nbsp; <strong>world</strong></p>\n'
+    '<h2>Getting started</h2>\n'
+    '<script>alert("x")</script>'
+)
+
+
+@pytest.mark.parametrize('html,expected', [
+    # Whitelist: unknown tags are unwrapped, dangerous ones dropped with their content
+    ('<div><p>Kept</p></div>', '<p>Kept</p>'),
+    ('<p>Hi<script>alert(1)</script><style>p{}</style></p>', '<p>Hi</p>'),
+    ('<iframe src="https://x"><p>gone</p></iframe>after', 'after'),
+    ('<p onclick="x()" class="y" style="z">Text</p>', '<p>Text</p>'),
+    ('<a href="javascript:alert(1)" target="_blank">x</a>', '<a>x</a>'),
+    ('<a href=" https://example.com/?a=1&b=2 ">x</a>', '<a href="https://example.com/?a=1&amp;b=2">x</a>'),
+    ('<a href="/relative">x</a><a href="mailto:a@b.c">y</a>', '<a href="/relative">x</a><a href="mailto:a@b.c">y</a>'),
+    ('<img src="data:image/png;base64,AAAA" alt="A"><img src="data:text/html,x">', '<img src="data:image/png;base64,AAAA" alt="A">'),
+    ('<p>5 &lt; 6</p>', '<p>5 &lt; 6</p>'),
+    ('<p>unclosed <strong>bold', '<p>unclosed <strong>bold</strong></p>'),
+    # Minification
+    ('<ul>\n  <li> One </li>\n  <li>Two  <b>b</b>  c</li>\n</ul>', '<ul><li>One</li><li>Two <b>b</b> c</li></ul>'),
+    ('<p>Hi</p>\n<p>&nbsp;</p>\n<p></p><p>There</p>', '<p>Hi</p><p>There</p>'),
+    ('<pre class="language-python">def f():\n    return  1</pre>', '<pre class="language-python">def f():\n    return  1</pre>'),
+    ('<p>a<br/>b</p>', '<p>a<br>b</p>'),
+    # Heading anchors
+    ('<h2 id="old">Intro &amp; Setup</h2><h2>Intro &amp; Setup</h2><h3><em>Deep</em> dive</h3>',
+     '<h2 id="intro-setup">Intro &amp; Setup</h2><h2 id="intro-setup-2">Intro &amp; Setup</h2>'
+     '<h3 id="deep-dive"><em>Deep</em> dive</h3>'),
+])
+def test_render_html(html, expected):
+    assert render_html(html) == expected
+
+
+@pytest.fixture
+def post(db):
+    author = User.objects.create_user(username='renderer', email='renderer@example.com', password='testpass123')
+    return Post.objects.create(
+        title='Rendered', content=TINYMCE_BODY, author=author,
+        category=Category.objects.create(name='Rendering'), status='published',
+    )
+
+
+@pytest.mark.django_db
+def test_retrieve_serves_rendered_content(post):
+    response = APIClient().get(reverse('post-detail', kwargs={'pk': post.slug}))
+
+    assert response.status_code == 200
+    assert response.data['content'] == (
+        '<h2 id="getting-started">Getting started</h2>'
+        '<p>Hello\xa0 <strong>world</strong></p>'
+        '<h2 id="getting-started-2">Getting started</h2>'
+    )
+    post.refresh_from_db()
+    assert post.content == TINYMCE_BODY  # The stored HTML is left alone
+
+
+@pytest.mark.django_db
+def test_rendered_once_per_distinct_content(post, monkeypatch):
+    calls = []
+    monkeypatch.setattr(rendering, 'render_html', lambda html: calls.append(html) or html)
+
+    assert rendering.render_content(post.content) == post.content
+    assert rendering.render_content(post.content) == post.content
+    assert len(calls) == 1
+
+    post.content = '<p>Edited</p>'
+    post.save()
+    rendering.render_content(post.content)
+    assert len(calls) == 2
+
+
+def test_rendered_content_expires(settings):
+    settings.BLOG_RENDER_CACHE_TIMEOUT = 60
+    rendering.render_content('<p>Short-lived</p>')
+    digest = hashlib.sha256(b'<p>Short-lived</p>').hexdigest()
+    key = cache.make_key(rendering.RENDERED_KEY.format(version=rendering.RENDER_VERSION, digest=digest))
+    assert cache._expire_info[key] is not None  # The test settings use LocMemCache
+
+
+@pytest.mark.django_db
+def test_report_command(post):
+    out = StringIO()
+    call_command('content_render_report', stdout=out)
+
+    assert 'Posts rendered: 1' in out.getvalue()
+    assert 'Render ms' in out.getvalue()
@@ -0,0 +1,89 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog.cache import cache_stats
+from blog.models import Category, Comment, Post, Quote, Tag
+
+User = get_user_model()
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='cached', email='cached@example.com', password='testpass123')
+
+
+@pytest.fixture
+def post(author):
+    category = Category.objects.create(name='Cached')
+    return Post.objects.create(
+        title='Cached post', content='<p>Body</p>', author=author, category=category, status='published'
+    )
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_second_request_is_a_hit(self, post, django_assert_num_queries):
+        client = APIClient()
+        first = client.get(reverse('post-list'))
+        with django_assert_num_queries(0):
+            second = client.get(reverse('post-list'))
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert second.data == first.data
+        assert cache_stats() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    def test_query_params_are_normalized(self, post):
+        client = APIClient()
+        client.get(reverse('post-list'), {'page_size': 5, 'category': post.category.slug})
+        response = client.get(reverse('post-list'), {'category': post.category.slug, 'page_size': 5, 'tag': ''})
+        assert response['X-Cache'] == 'HIT'
+
+    def test_post_save_invalidates(self, post):
+        client = APIClient()
+        client.get(reverse('post-detail', kwargs={'pk': post.slug}))
+
+        post.title = 'Renamed'
+        post.save()
+        response = client.get(reverse('post-detail', kwargs={'pk': post.slug}))
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['title'] == 'Renamed'
+
+    def test_tag_changes_invalidate_posts(self, post):
+        client = APIClient()
+        client.get(reverse('post-list'))
+
+        post.tags.add(Tag.objects.create(name='Fresh'))
+        response = client.get(reverse('post-list'))
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['tags'] == ['fresh']
+
+    def test_unrelated_changes_keep_entries(self, post, author):
+        client = APIClient()
+        client.get(reverse('category-list'))
+
+        Quote.objects.create(content='Unrelated', owner='Someone')
+        Comment.objects.create(post=post, user=author, content='Hi', is_approved=True)
+        assert client.get(reverse('category-list'))['X-Cache'] == 'HIT'
+
+    def test_visibility_classes_are_cached_separately(self, post, author):
+        post.is_restricted = True
+        post.save()
+        anonymous = APIClient()
+        authenticated = APIClient()
+        authenticated.force_authenticate(user=author)
+
+        assert anonymous.get(reverse('post-list')).data['count'] == 0
+        assert authenticated.get(reverse('post-list')).data['count'] == 1
+        assert anonymous.get(reverse('post-list')).data['count'] == 0
+
+    def test_forbidden_responses_are_not_cached(self, post):
+        post.is_restricted = True
+        post.save()
+        client = APIClient()
+        client.get(reverse('post-detail', kwargs={'pk': post.slug}))
+        response = client.get(reverse('post-detail', kwargs={'pk': post.slug}))
+        assert response.status_code == 403
+        assert cache_stats()['hits'] == 0
@@ -0,0 +1,89 @@
+import cloudinary
+import pytest
+from cloudinary import CloudinaryResource
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import responsive
+from blog.models import Category, Post, Quote
+from blog.rendering import render_html
+from portfolio.models import Project, Service
+
+User = get_user_model()
+
+UPLOADED = 'https://res.cloudinary.com/demo/image/upload/v1700000000/blog/assets/abc.png'
+
+
+@pytest.fixture(autouse=True)
+def cloud(monkeypatch):
+    monkeypatch.setattr(cloudinary.config(), 'cloud_name', 'demo')
+    responsive.build_image_set.cache_clear()
+    yield
+    responsive.build_image_set.cache_clear()
+
+
+def _resource(public_id='blog/assets/abc'):
+    return CloudinaryResource(public_id, format='png', version='1700000000', type='upload', resource_type='image')
+
+
+def test_image_set_has_every_width():
+    image_set = responsive.image_set(_resource())
+
+    assert image_set['src'] == (
+        'https://res.cloudinary.com/demo/image/upload/c_limit,f_auto,q_auto,w_960/v1700000000/blog/assets/abc.png'
+    )
+    variants = image_set['srcset'].split(', ')
+    assert [variant.rsplit(' ', 1)[1] for variant in variants] == [f'{width}w' for width in responsive.WIDTHS]
+    assert all('c_limit,f_auto,q_auto,w_' in variant for variant in variants)
+
+
+def test_image_sets_are_memoized():
+    responsive.image_set(_resource())
+    responsive.image_set(_resource())
+    responsive.image_set(_resource('blog/assets/def'))
+    info = responsive.build_image_set.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_no_image_set_without_an_image(monkeypatch):
+    assert responsive.image_set(None) is None
+    assert responsive.image_set('') is None
+    monkeypatch.setattr(cloudinary.config(), 'cloud_name', None)
+    assert responsive.image_set(_resource()) is None
+
+
+@pytest.mark.parametrize('url,rewritten', [
+    (UPLOADED, True),
+    ('https://res.cloudinary.com/demo/image/upload/blog/assets/abc.png', True),
+    ('https://res.cloudinary.com/demo/image/upload/c_fill,w_100/v1700000000/blog/assets/abc.png', False),
+    ('https://example.com/image/upload/v1/abc.png', False),
+])
+def test_content_images_get_srcsets(url, rewritten):
+    html = render_html(f'<p><img src="{url}" alt="Diagram"></p>')
+    assert ('srcset=' in html and 'sizes=' in html and 'q_auto' in html) == rewritten
+    assert 'alt="Diagram"' in html
+
+
+def test_content_srcset_keeps_the_cloud_of_the_url():
+    html = render_html(UPLOADED.replace('/demo/', '/other/').join(['<img src="', '">']))
+    assert 'res.cloudinary.com/other/image/upload/c_limit,f_auto,q_auto,w_320/' in html
+
+
+def test_serializers_emit_image_sets(db):
+    author = User.objects.create_user(username='photographer', email='photo@example.com', password='testpass123')
+    Post.objects.create(
+        title='Pictured', content='<p>Body</p>', author=author, image=_resource(),
+        category=Category.objects.create(name='Photos'), status='published',
+    )
+    quote = Quote.objects.create(content='Look', owner='Someone', owner_image=_resource('quotes/someone'))
+    Project.objects.create(title='Gallery', description='A project', image=_resource('projects/gallery'))
+    Service.objects.create(name='Shoots', description='A service', icon=_resource('services/shoots'))
+    api = APIClient()
+
+    post = api.get(reverse('post-list')).data['results'][0]
+    assert post['image_set']['src'].endswith('c_limit,f_auto,q_auto,w_960/v1700000000/blog/assets/abc.png')
+    assert api.get(reverse('post-detail', kwargs={'pk': 'pictured'})).data['image_set'] == post['image_set']
+    assert 'quotes/someone' in api.get(reverse('quote-detail', kwargs={'pk': quote.pk})).data['owner_image_set']['src']
+    assert 'projects/gallery' in api.get(reverse('project-list')).data['results'][0]['image_set']['srcset']
+    assert 'services/shoots' in api.get(reverse('service-list')).data['results'][0]['icon_set']['srcset']
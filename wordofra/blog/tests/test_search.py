@@ -0,0 +1,76 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog.models import Category, Post, Tag
+
+User = get_user_model()
+
+
+@pytest.fixture
+def make_post(db):
+    author = User.objects.create_user(username='searcher', email='searcher@example.com', password='testpass123')
+    category = Category.objects.create(name='Search')
+
+    def make(title, content='<p>Nothing to see</p>', **kwargs):
+        return Post.objects.create(
+            title=title, content=content, author=author, category=category, status='published', **kwargs
+        )
+    return make
+
+
+def _search(term, **params):
+    response = APIClient().get(reverse('post-list'), {'search': term, **params})
+    assert response.status_code == 200
+    return [post['title'] for post in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestPostSearch:
+    def test_ranks_title_matches_above_body_matches(self, make_post):
+        make_post('Gardening notes', '<p>Some thoughts on <b>volcanoes</b> and soil</p>')
+        make_post('Volcanoes explained')
+        make_post('Unrelated')
+
+        assert _search('volcano') == ['Volcanoes explained', 'Gardening notes']
+
+    def test_tags_outrank_body(self, make_post):
+        body_match = make_post('First', '<p>a short remark about astronomy</p>')
+        tagged = make_post('Second')
+        tagged.tags.add(Tag.objects.create(name='Astronomy'))
+
+        assert _search('astronomy') == [tagged.title, body_match.title]
+
+    def test_index_follows_saves(self, make_post):
+        post = make_post('Draft title')
+        assert _search('rewritten') == []
+
+        post.title = 'Rewritten title'
+        post.save()
+        assert _search('rewritten') == ['Rewritten title']
+
+    def test_explicit_ordering_overrides_rank(self, make_post):
+        make_post('Comets', '<p>comets comets</p>')
+        make_post('Notes', '<p>comets</p>')
+
+        assert _search('comets', ordering='created_at') == ['Comets', 'Notes']
+
+    def test_query_syntax_is_not_interpreted(self, make_post):
+        make_post('Quotes')
+        assert _search('"unbalanced OR (') == []
+
+    def test_rebuild_command(self, make_post):
+        template = make_post('Template')
+        # bulk_create skips the signal handlers, so the new post is not indexed yet
+        Post.objects.bulk_create([Post(
+            title='Indexed later', slug='indexed-later', content='<p>Body</p>',
+            author=template.author, category=template.category, status='published',
+        )])
+        assert _search('indexed') == []
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert _search('indexed') == ['Indexed later']
@@ -0,0 +1,176 @@
+import gzip
+import xml.etree.ElementTree as ET
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+
+from blog import syndication
+from blog.models import Category, Post, Tag
+from portfolio.models import Project
+
+User = get_user_model()
+
+NS = {'sm': syndication.SITEMAP_NS, 'atom': 'http://www.w3.org/2005/Atom'}
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(syndication, 'SITEMAP_SHARD_SIZE', 3)
+
+
+@pytest.fixture
+def posts(db, settings):
+    settings.FRONTEND_URL = 'https://frontend.example'
+    author = User.objects.create_user(username='syndic', email='syndic@example.com', password='testpass123')
+    category = Category.objects.create(name='News')
+    Tag.objects.create(name='Django')
+    Project.objects.create(title='Portfolio site', description='A project')
+    created = [
+        Post.objects.create(
+            title=f'Post {i}', slug=f'post-{i}', content=f'<p>Body of post {i}</p>',
+            author=author, category=category, status='published',
+        )
+        for i in range(7)
+    ]
+    Post.objects.create(title='Draft', slug='draft', content='x', author=author, category=category)
+    Post.objects.create(
+        title='Members', slug='members', content='x', author=author, category=category,
+        status='published', is_restricted=True,
+    )
+    return created
+
+
+def _xml(response):
+    assert response.status_code == 200
+    return ET.fromstring(response.content)
+
+
+def _locs(root):
+    return [loc.text for loc in root.iter(f'{{{syndication.SITEMAP_NS}}}loc')]
+
+
+@pytest.mark.django_db
+def test_index_lists_every_shard(posts, small_shards, client):
+    locs = _locs(_xml(client.get(reverse('sitemap-index'))))
+
+    shard_urls = [loc for loc in locs if '-posts-' in loc]
+    assert len(shard_urls) == len({post.pk // 3 for post in posts})
+    assert any('-categories-' in loc for loc in locs)
+    assert any('-tags-' in loc for loc in locs)
+    assert any('-projects-' in loc for loc in locs)
+
+
+@pytest.mark.django_db
+def test_shards_list_public_posts_only(posts, small_shards, client):
+    urls = []
+    for loc in _locs(_xml(client.get(reverse('sitemap-index')))):
+        if '-posts-' in loc:
+            urls += _locs(_xml(client.get(loc)))
+
+    assert sorted(urls) == sorted(f'https://frontend.example/blog/{post.slug}' for post in posts)
+
+
+@pytest.mark.django_db
+def test_saving_a_post_rebuilds_only_its_shard(posts, small_shards, client, monkeypatch):
+    for shard in {post.pk // 3 for post in posts}:
+        client.get(reverse('sitemap-shard', kwargs={'section': 'posts', 'shard': shard}))
+
+    built = []
+    original = syndication.build_sitemap_shard
+    monkeypatch.setattr(
+        syndication, 'build_sitemap_shard',
+        lambda section, shard: built.append((section.name, shard)) or original(section, shard),
+    )
+    changed = posts[0]
+    changed.title = 'Renamed'
+    changed.slug = 'renamed'
+    changed.save()
+    for shard in {post.pk // 3 for post in posts}:
+        response = client.get(reverse('sitemap-shard', kwargs={'section': 'posts', 'shard': shard}))
+        assert response.status_code == 200
+
+    assert built == [('posts', changed.pk // 3)]
+    shard_url = reverse('sitemap-shard', kwargs={'section': 'posts', 'shard': changed.pk // 3})
+    assert 'https://frontend.example/blog/renamed' in _locs(_xml(client.get(shard_url)))
+
+
+@pytest.mark.django_db
+def test_unknown_or_empty_shard_is_not_found(posts, client):
+    assert client.get(reverse('sitemap-shard', kwargs={'section': 'users', 'shard': 0})).status_code == 404
+    assert client.get(reverse('sitemap-shard', kwargs={'section': 'posts', 'shard': 99})).status_code == 404
+
+
+@pytest.mark.django_db
+def test_rss_feed_lists_latest_public_posts(posts, client):
+    response = client.get(reverse('feed-rss'))
+    assert response['Content-Type'].startswith('application/rss+xml')
+    items = _xml(response).findall('./channel/item')
+
+    assert [item.findtext('title') for item in items] == [f'Post {i}' for i in reversed(range(7))]
+    assert items[0].findtext('link') == 'https://frontend.example/blog/post-6'
+    assert items[0].findtext('description') == 'Body of post 6'
+
+
+@pytest.mark.django_db
+def test_atom_feed(posts, client):
+    entries = _xml(client.get(reverse('feed-atom'))).findall('atom:entry', NS)
+    assert len(entries) == 7
+    assert entries[0].findtext('atom:id', namespaces=NS) == 'https://frontend.example/blog/post-6'
+
+
+@pytest.mark.django_db
+def test_changed_post_rerenders_one_feed_entry(posts, client, monkeypatch):
+    client.get(reverse('feed-rss'))
+
+    rendered = []
+    original = syndication.RssFeed.render_entry.__func__
+    monkeypatch.setattr(
+        syndication.RssFeed, 'render_entry',
+        classmethod(lambda cls, **item: rendered.append(item['title']) or original(cls, **item)),
+    )
+    post = posts[2]
+    post.title = 'Retitled'
+    post.save()
+    items = _xml(client.get(reverse('feed-rss'))).findall('./channel/item')
+
+    assert rendered == ['Retitled']
+    assert 'Retitled' in [item.findtext('title') for item in items]
+
+
+@pytest.mark.django_db
+def test_gzip_and_conditional_requests(posts, client):
+    url = reverse('sitemap-index')
+    compressed = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    plain = client.get(url)
+
+    assert compressed['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.content) == plain.content
+    assert 'Accept-Encoding' in plain['Vary']
+    assert client.get(url, HTTP_IF_NONE_MATCH=plain['ETag']).status_code == 304
+
+
+@pytest.mark.django_db
+def test_build_command_prebuilds_shards_and_entries(posts, client):
+    cache.clear()
+    call_command('build_syndication', stdout=StringIO())
+
+    assert cache.get(syndication.SHARD_KEY.format(section='posts', shard=posts[0].pk // syndication.SITEMAP_SHARD_SIZE)) is not None
+    assert cache.get(syndication.ENTRY_KEY.format(kind='atom', pk=posts[0].pk)) is not None
+
+
+@pytest.mark.django_db
+def test_artifacts_expire(posts, client):
+    shard = posts[0].pk // syndication.SITEMAP_SHARD_SIZE
+    assert client.get(reverse('sitemap-shard', kwargs={'section': 'posts', 'shard': shard})).status_code == 200
+    assert client.get(reverse('feed-atom')).status_code == 200
+
+    keys = [
+        syndication.SHARD_KEY.format(section='posts', shard=shard),
+        syndication.ENTRY_KEY.format(kind='atom', pk=posts[0].pk),
+    ]
+    expiries = [cache._expire_info[cache.make_key(key)] for key in keys]  # The test settings use LocMemCache
+    assert all(expiry is not None for expiry in expiries)
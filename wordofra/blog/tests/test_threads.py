@@ -0,0 +1,163 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from blog import ingestion, threads
+from blog.models import Category, Comment, Post
+
+User = get_user_model()
+
+
+@pytest.mark.parametrize('pk,segment', [(1, '0000001'), (35, '000000z'), (36, '0000010'), (36 ** 7 - 1, 'zzzzzzz')])
+def test_encode(pk, segment):
+    assert threads.encode(pk) == segment
+
+
+def test_encode_rejects_ids_that_do_not_fit():
+    with pytest.raises(ValueError):
+        threads.encode(36 ** 7)
+
+
+@pytest.mark.parametrize('path,upper', [('0000001', '0000002'), ('000000z', '000001'), ('zzzzzzz', None)])
+def test_successor(path, upper):
+    assert threads.successor(path) == upper
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='threader', email='threader@example.com', password='testpass123')
+
+
+@pytest.fixture
+def posts(user):
+    category = Category.objects.create(name='Threads')
+    return [
+        Post.objects.create(
+            title=f'Threaded {i}', slug=f'threaded-{i}', content='<p>Body</p>', author=user,
+            category=category, status='published',
+        )
+        for i in range(2)
+    ]
+
+
+@pytest.fixture
+def tree(posts, user):
+    """
+    a
+    ├── a1
+    │   └── a1x
+    └── a2
+    b
+    """
+    def reply(content, parent=None):
+        return Comment.objects.create(
+            post=posts[0], parent=parent, user=user, content=content, is_approved=True,
+        )
+    a = reply('a')
+    a1 = reply('a1', a)
+    b = reply('b')
+    a2 = reply('a2', a)
+    a1x = reply('a1x', a1)
+    return {comment.content: comment for comment in (a, a1, a2, a1x, b)}
+
+
+def _contents(response):
+    return [comment['content'] for comment in response.data['results']]
+
+
+@pytest.mark.django_db
+def test_paths_nest(tree):
+    a, a1x = tree['a'], tree['a1x']
+    a1x.refresh_from_db()
+    assert a1x.path == threads.encode(a.pk) + threads.encode(tree['a1'].pk) + threads.encode(a1x.pk)
+    assert a1x.depth == 2
+
+
+@pytest.mark.django_db
+def test_subtree_is_depth_first_in_one_range_query(tree, django_assert_num_queries):
+    url = reverse('comment-subtree', kwargs={'pk': tree['a'].pk})
+    with django_assert_num_queries(2):  # The comment's path, then its subtree
+        response = APIClient().get(url)
+
+    assert _contents(response) == ['a', 'a1', 'a1x', 'a2']
+    assert [comment['depth'] for comment in response.data['results']] == [0, 1, 2, 1]
+    assert _contents(APIClient().get(url, {'max_depth': 1})) == ['a', 'a1', 'a2']
+    assert _contents(APIClient().get(reverse('comment-subtree', kwargs={'pk': tree['a1'].pk}))) == ['a1', 'a1x']
+
+
+@pytest.mark.django_db
+def test_subtree_pages_by_cursor(tree):
+    client = APIClient()
+    first = client.get(reverse('comment-subtree', kwargs={'pk': tree['a'].pk}), {'page_size': 3})
+    assert _contents(first) == ['a', 'a1', 'a1x']
+
+    second = client.get(first.data['next'])
+    assert _contents(second) == ['a2']
+    assert second.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_unapproved_comments_are_left_out(tree):
+    Comment.objects.filter(pk=tree['a1x'].pk).update(is_approved=False)
+    client = APIClient()
+
+    assert _contents(client.get(reverse('comment-subtree', kwargs={'pk': tree['a'].pk}))) == ['a', 'a1', 'a2']
+    response = client.get(reverse('comment-subtree', kwargs={'pk': tree['a1x'].pk}))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_list_in_thread_order(tree, posts):
+    response = APIClient().get(reverse('comment-list'), {'post': posts[0].pk, 'ordering': 'path'})
+    assert _contents(response) == ['a', 'a1', 'a1x', 'a2', 'b']
+
+
+@pytest.mark.django_db
+def test_reply_through_the_api(tree, posts, user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.post(reverse('comment-list'), {'parent': tree['a2'].pk, 'content': 'Reply'}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    assert (response.data['post'], response.data['depth']) == (posts[0].pk, 2)
+
+    response = client.post(
+        reverse('comment-list'), {'parent': tree['a2'].pk, 'post': posts[1].pk, 'content': 'Elsewhere'}, format='json',
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    Comment.objects.filter(pk=tree['b'].pk).update(depth=threads.MAX_DEPTH)
+    response = client.post(reverse('comment-list'), {'parent': tree['b'].pk, 'content': 'Deep'}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_outbox_replies_get_paths(tree, posts, user, settings):
+    settings.BLOG_COMMENT_INGESTION = 'outbox'
+    ingestion.enqueue(user, 'Queued reply', post=posts[0].pk, parent=tree['a1'].pk)
+    ingestion.enqueue(user, 'Wrong post', post=posts[1].pk, parent=tree['a1'].pk)
+
+    assert ingestion.flush() == (1, 1)
+    reply = Comment.objects.get(content='Queued reply')
+    assert reply.depth == 2
+    assert reply.path == tree['a1'].path + threads.encode(reply.pk)
+
+
+@pytest.mark.django_db
+def test_comments_cannot_be_moved(tree, posts, user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    a, a1 = tree['a'], tree['a1']
+    url = reverse('comment-detail', kwargs={'pk': a.pk})
+
+    for change in ({'parent': a1.pk}, {'parent': tree['b'].pk}, {'post': posts[1].pk}):
+        response = client.patch(url, change, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.patch(url, {'content': 'Edited', 'parent': None}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    a.refresh_from_db()
+    assert (a.content, a.parent_id, a.path, a.depth) == ('Edited', None, threads.encode(a.pk), 0)
+    assert _contents(client.get(reverse('comment-subtree', kwargs={'pk': a.pk}))) == ['Edited', 'a1', 'a1x', 'a2']
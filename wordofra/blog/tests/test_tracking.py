@@ -0,0 +1,138 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import tracking
+from blog.models import Category, Post, PostViewBucket
+from blog.tracking import current_hour
+
+User = get_user_model()
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='viewed', email='viewed@example.com', password='testpass123')
+
+
+@pytest.fixture
+def posts(author):
+    category = Category.objects.create(name='Views')
+    return [
+        Post.objects.create(
+            title=f'Viewed {i}', slug=f'viewed-{i}', content='<p>Body</p>', author=author,
+            category=category, status='published', is_restricted=i == 2,
+        )
+        for i in range(3)
+    ]
+
+
+def _views(post):
+    return sum(PostViewBucket.objects.filter(post=post).values_list('views', flat=True))
+
+
+@pytest.mark.django_db
+def test_views_are_buffered_until_flushed(posts):
+    client = APIClient()
+    url = reverse('post-detail', kwargs={'pk': posts[0].slug})
+    for _ in range(3):
+        assert client.get(url).status_code == 200  # The last two are cache hits
+
+    assert _views(posts[0]) == 0
+    assert tracking.buffer.flush() == 3
+    assert _views(posts[0]) == 3
+
+    client.get(url)
+    tracking.buffer.flush()
+    bucket = PostViewBucket.objects.get(post=posts[0])  # Added to the same hourly row
+    assert bucket.views == 4
+    assert bucket.hour == current_hour()
+
+
+@pytest.mark.django_db
+def test_missing_posts_are_not_counted(posts):
+    client = APIClient()
+    assert client.get(reverse('post-detail', kwargs={'pk': 'no-such-post'})).status_code == 404
+    tracking.record_view('deleted-meanwhile')
+
+    assert tracking.buffer.flush() == 0
+    assert not PostViewBucket.objects.exists()
+
+
+@pytest.mark.django_db
+def test_flushes_after_a_request_once_the_interval_has_passed(posts, settings):
+    settings.BLOG_VIEW_FLUSH_INTERVAL = 0
+    tracking.record_view(posts[1].slug)
+    assert _views(posts[1]) == 0  # Recording never writes
+
+    APIClient().get(reverse('category-list'))  # Any finished request flushes a due buffer
+    assert _views(posts[1]) == 1
+    assert tracking.popular_post_ids() == [posts[1].pk]  # Refreshed by the flush
+
+
+@pytest.mark.django_db
+def test_failed_flush_never_fails_a_read(posts, settings, monkeypatch):
+    settings.BLOG_VIEW_FLUSH_INTERVAL = 0
+
+    def broken(counts):
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(tracking, 'write_views', broken)
+    response = APIClient().get(reverse('post-detail', kwargs={'pk': posts[0].slug}))
+    assert response.status_code == 200
+
+    monkeypatch.undo()
+    assert tracking.buffer.flush() == 1  # The view was kept for the next flush
+    assert _views(posts[0]) == 1
+
+
+@pytest.mark.django_db
+def test_recent_views_weigh_more(posts):
+    now = current_hour()
+    PostViewBucket.objects.create(post=posts[0], hour=now - timedelta(hours=48), views=10)  # Decays to 2.5
+    PostViewBucket.objects.create(post=posts[1], hour=now, views=4)
+    PostViewBucket.objects.create(post=posts[2], hour=now - timedelta(days=8), views=1000)  # Out of the window
+
+    assert tracking.refresh_popular() == [posts[1].pk, posts[0].pk]
+
+
+@pytest.mark.django_db
+def test_popular_endpoint(posts):
+    for views, post in zip((5, 1, 9), posts):
+        PostViewBucket.objects.create(post=post, hour=current_hour(), views=views)
+    url = reverse('post-popular')
+
+    response = APIClient().get(url)
+    assert response.status_code == 200
+    assert [post['slug'] for post in response.data['results']] == ['viewed-0', 'viewed-1']
+
+    client = APIClient()
+    client.force_authenticate(user=posts[0].author)
+    assert [post['slug'] for post in client.get(url, {'limit': 2}).data['results']] == ['viewed-2', 'viewed-0']
+
+
+@pytest.mark.django_db
+def test_popular_ranking_is_precomputed(posts, django_assert_num_queries):
+    PostViewBucket.objects.create(post=posts[0], hour=current_hour(), views=1)
+    tracking.refresh_popular()
+    PostViewBucket.objects.create(post=posts[1], hour=current_hour(), views=50)
+
+    with django_assert_num_queries(3):  # Posts, their tags and comment counts; the ranking comes from the cache
+        response = APIClient().get(reverse('post-popular'))
+    assert [post['slug'] for post in response.data['results']] == ['viewed-0']
+
+
+@pytest.mark.django_db
+def test_refresh_command_prunes_old_buckets(posts):
+    PostViewBucket.objects.create(post=posts[0], hour=current_hour() - timedelta(days=100), views=3)
+    PostViewBucket.objects.create(post=posts[1], hour=current_hour(), views=1)
+    out = StringIO()
+
+    call_command('refresh_popular_posts', '--prune', '90', stdout=out)
+
+    assert 'Pruned 1 view buckets' in out.getvalue()
+    assert 'Ranked 1 posts' in out.getvalue()
+    assert tracking.popular_post_ids() == [posts[1].pk]
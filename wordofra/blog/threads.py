@@ -0,0 +1,53 @@
+"""
+Materialized paths for threaded comments.
+
+A comment's ``path`` is its parent's path followed by its own id, written
+as a fixed-width base-36 segment. So ordering by ``path`` gives depth-first
+order (replies oldest first), and the descendants of a comment are the
+paths in a contiguous range: ``[path, successor(path))``. That range is
+one B-tree index range scan. The index needs no ``LIKE`` prefix matching,
+so it works under any collation.
+"""
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+SEGMENT_WIDTH = 7  # 36 ** 7 ids, about 78 billion
+PATH_MAX_LENGTH = 252
+MAX_DEPTH = PATH_MAX_LENGTH // SEGMENT_WIDTH - 1  # Depth is 0 for top-level comments
+
+
+def encode(pk):
+    digits, number = [], pk
+    while number:
+        number, remainder = divmod(number, len(ALPHABET))
+        digits.append(ALPHABET[remainder])
+    segment = ''.join(reversed(digits)).rjust(SEGMENT_WIDTH, '0')
+    if len(segment) > SEGMENT_WIDTH:
+        raise ValueError(f'Comment id {pk} does not fit in a path segment')
+    return segment
+
+
+def child_path(parent_path, pk):
+    return (parent_path or '') + encode(pk)
+
+
+def successor(path):
+    """
+    The smallest string of ``path``'s length sorting after every path that
+    starts with ``path``, or None when there is none (``path`` is all 'z').
+    """
+    chars = list(path)
+    for index in range(len(chars) - 1, -1, -1):
+        position = ALPHABET.index(chars[index])
+        if position + 1 < len(ALPHABET):
+            chars[index] = ALPHABET[position + 1]
+            return ''.join(chars[:index + 1])
+        chars[index] = ALPHABET[0]
+    return None
+
+
+def subtree_filter(path):
+    """Lookups selecting the comment at ``path`` and all of its descendants."""
+    lookups = {'path__gte': path}
+    upper = successor(path)
+    if upper is not None:
+        lookups['path__lt'] = upper
+    return lookups
@@ -0,0 +1,151 @@
+"""
+Buffered post view counting and the "popular posts" ranking.
+
+Views are never written per request, which would serialize every reader
+of a hot post on one row lock. ``record_view`` adds to an in-process
+buffer. The buffer is flushed at most every ``BLOG_VIEW_FLUSH_INTERVAL``
+seconds (and at exit) as one multi-row upsert into ``PostViewBucket``,
+which holds per-post, per-hour totals. Flushes run from ``request_finished``
+(see blog.signals), once the response has been sent, and a failed flush
+is logged and retried later, so counting views never fails or slows a read.
+
+The popular list is ranked by exponentially decayed views over the last
+``POPULAR_WINDOW``. It is precomputed into the cache as the ``POPULAR_SIZE``
+best post ids. Flushes recompute it when it is older than
+``POPULAR_REFRESH``, and so does the refresh_popular_posts command.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog.models import Post, PostViewBucket
+
+POPULAR_KEY = 'blog:popular'
+POPULAR_SIZE = 50
+POPULAR_WINDOW = timedelta(days=7)
+POPULAR_REFRESH = timedelta(minutes=5)
+HALF_LIFE_HOURS = 24
+
+logger = logging.getLogger(__name__)
+
+
+def current_hour():
+    return timezone.now().replace(minute=0, second=0, microsecond=0)
+
+
+class ViewBuffer:
+    """Thread-safe per-process tally of (post slug, hour) -> views."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.last_flush = time.monotonic()
+
+    def add(self, slug):
+        with self.lock:
+            self.counts[(slug, current_hour())] += 1
+
+    def flush_if_due(self):
+        with self.lock:
+            due = self.counts and time.monotonic() - self.last_flush >= settings.BLOG_VIEW_FLUSH_INTERVAL
+        return self.flush() if due else 0
+
+    def drain(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.last_flush = time.monotonic()
+        return counts
+
+    def flush(self):
+        """Write the buffered views; returns how many were written. Never raises."""
+        counts = self.drain()
+        if not counts:
+            return 0
+        try:
+            written = write_views(counts)
+        except Exception:
+            logger.exception("Could not write %d buffered post views; keeping them", sum(counts.values()))
+            with self.lock:
+                self.counts.update(counts)  # Keep them for the next flush
+            return 0
+        try:
+            if popular_is_stale():
+                refresh_popular()
+        except Exception:
+            logger.exception("Could not refresh the popular posts ranking")
+        return written
+
+
+buffer = ViewBuffer()
+atexit.register(lambda: buffer.flush())
+
+
+def record_view(slug):
+    buffer.add(slug)
+
+
+def write_views(counts):
+    """Add ``counts`` ((slug, hour) -> views) to the hourly buckets in one statement."""
+    slugs = {slug for slug, _ in counts}
+    post_ids = dict(Post.objects.filter(slug__in=slugs).values_list('slug', 'pk'))
+    rows = [
+        (post_ids[slug], hour, views)
+        for (slug, hour), views in counts.items()
+        if slug in post_ids
+    ]
+    if not rows:
+        return 0
+
+    table = connection.ops.quote_name(PostViewBucket._meta.db_table)
+    placeholders = ', '.join(['(%s, %s, %s)'] * len(rows))
+    params = [
+        value
+        for post_id, hour, views in rows
+        for value in (post_id, connection.ops.adapt_datetimefield_value(hour), views)
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (post_id, hour, views) VALUES {placeholders} '
+            f'ON CONFLICT (post_id, hour) DO UPDATE SET views = {table}.views + EXCLUDED.views',
+            params,
+        )
+    return sum(views for _, _, views in rows)
+
+
+def decayed_scores(now=None):
+    """post id -> views in the window, each hour weighted down by its age."""
+    now = now or timezone.now()
+    buckets = PostViewBucket.objects.filter(hour__gte=now - POPULAR_WINDOW).values_list('post_id', 'hour', 'views')
+    scores = Counter()
+    for post_id, hour, views in buckets.iterator(chunk_size=2000):
+        age_hours = max((now - hour).total_seconds() / 3600, 0)
+        scores[post_id] += views * math.pow(0.5, age_hours / HALF_LIFE_HOURS)
+    return scores
+
+
+def refresh_popular():
+    """Recompute and cache the top ``POPULAR_SIZE`` post ids."""
+    ranked = [post_id for post_id, _ in decayed_scores().most_common(POPULAR_SIZE)]
+    cache.set(POPULAR_KEY, {'post_ids': ranked, 'computed_at': timezone.now()}, None)
+    return ranked
+
+
+def popular_is_stale():
+    popular = cache.get(POPULAR_KEY)
+    return popular is None or timezone.now() - popular['computed_at'] >= POPULAR_REFRESH
+
+
+def popular_post_ids():
+    popular = cache.get(POPULAR_KEY)
+    if popular is None:
+        return refresh_popular()
+    return popular['post_ids']
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from blog.views import PostViewSet, CommentViewSet, CategoryViewSet, TagViewSet, QuoteViewSet
+from blog.views import (
+    PostViewSet, CommentViewSet, CommentModerationViewSet, CategoryViewSet, TagViewSet, QuoteViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
 router.register(r'comments', CommentViewSet, basename='comment')
+router.register(r'moderation/comments', CommentModerationViewSet, basename='comment-moderation')
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'quotes', QuoteViewSet, basename='quote')
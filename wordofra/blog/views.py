@@ -1,14 +1,30 @@
 # Create your views here.
+from django.db.models import Subquery
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404
 from rest_framework.response import Response 
+from rest_framework.reverse import reverse
+from rest_framework import status
 from rest_framework import viewsets, filters
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import AllowAny
-from rest_framework import viewsets, permissions
-from .models import Post, Category, Tag, Comment, Quote
+from rest_framework import viewsets, permissions, mixins
+from . import ingestion, moderation, quote_rotation, syndication, threads, tracking
+from .cache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .models import Post, Category, Tag, Comment, CommentOutbox, Quote
+from .pagination import KeysetPagination, KeysetPaginationMixin
+from .projection import ProjectedListMixin, forbid_deferred_loading, projected_fields
+from .related import NEIGHBOURS
+from .search import PostSearchFilter
+from .streaming import StreamingListMixin
+from .snapshots import SnapshotListMixin
 from .serializers import (
     PostSerializer, PostListSerializer, CategorySerializer, TagSerializer,
-    CommentSerializer, QuoteSerializer,
+    CommentSerializer, QuoteSerializer, ModerationCommentSerializer, ModerationBatchSerializer,
+    CommentSubmissionSerializer, CommentSubmissionStatusSerializer,
 )
 
 # Blog App Viewsets
@@ -18,20 +34,36 @@ class PostPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 50
 
-class PostViewSet(viewsets.ReadOnlyModelViewSet):
+class PostViewSet(
+    CachedResponseMixin, ConditionalGetMixin, ProjectedListMixin, StreamingListMixin,
+    KeysetPaginationMixin, viewsets.ReadOnlyModelViewSet,
+):
     """
     API endpoint for listing and retrieving blog posts.
+
+    Lists are page-numbered by default; pass ?pagination=cursor to page by
+    (created_at, id) cursors instead, and ?format=jsonstream to stream them.
+    Several posts can be fetched at once with batch/?slugs=a,b,c, and a
+    post's most similar posts with <slug>/related/. popular/ ranks posts
+    by recent views. Listed posts carry their approved comment count; add
+    ?include=latest_comments for a preview of their newest comments.
     """
     serializer_class = PostSerializer
     permission_classes = [AllowAny]
+    lookup_field = 'slug'
+    lookup_url_kwarg = 'pk'  # Posts are addressed by slug
     pagination_class = PostPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'content']
+    # Search runs after ordering so relevance ranking can replace the default order
+    filter_backends = [filters.OrderingFilter, PostSearchFilter]
     ordering_fields = ['created_at']
     ordering = ['-created_at']  # Default ordering (newest first)
+    cache_scopes = ('post', 'category', 'tag', 'comment')  # Lists carry comment counts
+    batch_max_slugs = 50
+    related_limit = 5
+    popular_limit = 10
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ('list', 'related', 'popular'):
             return PostListSerializer
         return PostSerializer
 
@@ -39,12 +71,19 @@ class PostViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Custom queryset filtering based on query parameters.
         """
-        queryset = Post.objects.filter(status='published')
+        queryset = (
+            Post.objects.filter(status='published')
+            .select_related('author', 'category')
+            .prefetch_related('tags')
+        )
 
         # Filtering by category
         category_slug = self.request.query_params.get('category', None)
         if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+            # Compare category_id with a scalar subquery rather than joining on
+            # the slug, so the (category, created_at) index also supplies the order
+            category_id = Category.objects.filter(slug=category_slug).values('id')[:1]
+            queryset = queryset.filter(category_id=Subquery(category_id))
 
         # Filtering by tag
         tag_slug = self.request.query_params.get('tag', None)
@@ -64,18 +103,120 @@ class PostViewSet(viewsets.ReadOnlyModelViewSet):
             # Public users can only see unrestricted posts
             return queryset.filter(is_restricted=False)
 
-    def retrieve(self, request, *args, **kwargs):
+    def get_detail_queryset(self):
+        """
+        Published posts with their relations loaded, before any visibility rules.
+        """
+        return (
+            Post.objects.filter(status='published')
+            .select_related('author', 'category')
+            .prefetch_related('tags')
+        )
+
+    def get_object(self):
         """
         Fetch a single post by slug instead of ID.
         """
-        slug = kwargs.get('pk')  # Django REST uses 'pk' by default
-        post = get_object_or_404(Post, slug=slug, status='published')
+        slug = self.kwargs.get('pk')  # Django REST uses 'pk' by default
+        post = get_object_or_404(self.get_detail_queryset(), slug=slug)
+
+        if post.is_restricted and not self.request.user.is_authenticated:
+            raise PermissionDenied("This post is restricted. Please log in.")
+        return post
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code in (200, 304):  # Cached and revalidated reads are views too
+            tracking.record_view(kwargs.get('pk'))
+        return response
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Fetch up to ``batch_max_slugs`` posts in one query with ?slugs=a,b,c.
+
+        Results follow the order of the requested slugs. Each entry has a
+        status of "ok", "not_found" or "forbidden", decided by the same rules
+        as retrieving the post on its own.
+        """
+        return self.cached_response(self._batch, request)
+
+    def _batch(self, request):
+        raw_slugs = (slug.strip() for slug in request.query_params.get('slugs', '').split(','))
+        slugs = list(dict.fromkeys(slug for slug in raw_slugs if slug))
+        if not slugs:
+            raise ValidationError({'slugs': 'Provide one or more comma-separated post slugs.'})
+        if len(slugs) > self.batch_max_slugs:
+            raise ValidationError({'slugs': f'At most {self.batch_max_slugs} slugs can be fetched at once.'})
+
+        posts = {post.slug: post for post in self.get_detail_queryset().filter(slug__in=slugs)}
+        visible = [
+            post for post in posts.values()
+            if request.user.is_authenticated or not post.is_restricted
+        ]
+        serialized = {
+            post.slug: data for post, data in zip(visible, self.get_serializer(visible, many=True).data)
+        }
+
+        results = []
+        for slug in slugs:
+            if slug in serialized:
+                results.append({'slug': slug, 'status': 'ok', 'post': serialized[slug]})
+            else:
+                outcome = 'forbidden' if slug in posts else 'not_found'
+                results.append({'slug': slug, 'status': outcome, 'post': None})
+        return Response({'results': results})
+
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """
+        The posts most similar to this one, read from the precomputed
+        neighbour rows (see blog.related). ?limit= returns up to NEIGHBOURS.
+        """
+        return self.cached_response(self._related, request, pk=pk)
 
-        if post.is_restricted and not request.user.is_authenticated:
-            return Response({"detail": "This post is restricted. Please log in."}, status=403)
+    def _related(self, request, pk=None):
+        source = self.get_detail_queryset().filter(slug=pk).values('pk', 'is_restricted').first()
+        if source is None:
+            raise Http404("No Post matches the given query.")
+        if source['is_restricted'] and not request.user.is_authenticated:
+            raise PermissionDenied("This post is restricted. Please log in.")
 
-        serializer = self.get_serializer(post)
-        return Response(serializer.data)
+        try:
+            limit = min(max(int(request.query_params['limit']), 1), NEIGHBOURS)
+        except (KeyError, ValueError):
+            limit = self.related_limit
+        posts = (
+            self.get_detail_queryset()
+            .filter(incoming_related__post_id=source['pk'])
+            .order_by('incoming_related__rank')
+            .only(*projected_fields(PostListSerializer))
+        )
+        if not request.user.is_authenticated:
+            posts = posts.filter(is_restricted=False)
+        with forbid_deferred_loading():
+            data = self.get_serializer(posts[:limit], many=True).data
+        return Response({'results': data})
+
+    @action(detail=False, methods=['get'])
+    def popular(self, request):
+        """
+        The most viewed posts, recent views counting more, from the ranking
+        precomputed by blog.tracking. ?limit= returns up to POPULAR_SIZE.
+        """
+        try:
+            limit = min(max(int(request.query_params['limit']), 1), tracking.POPULAR_SIZE)
+        except (KeyError, ValueError):
+            limit = self.popular_limit
+        ranked = tracking.popular_post_ids()
+        posts = self.get_detail_queryset().filter(pk__in=ranked).only(*projected_fields(PostListSerializer))
+        if not request.user.is_authenticated:
+            posts = posts.filter(is_restricted=False)
+        order = {post_id: position for position, post_id in enumerate(ranked)}
+        posts = sorted(posts, key=lambda post: order[post.pk])[:limit]
+        with forbid_deferred_loading():
+            data = self.get_serializer(posts, many=True).data
+        return Response({'results': data})
 
 
 
@@ -84,22 +225,35 @@ class CommentPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 50
 
-class CommentViewSet(viewsets.ModelViewSet):
+class ThreadPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+    ordering = ('path',)  # Depth first; paths are unique
+    signing_salt = 'blog.views.ThreadPagination'
+
+class CommentViewSet(ProjectedListMixin, StreamingListMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     API endpoint for listing, retrieving, creating, and managing comments.
+
+    Lists are page-numbered by default; pass ?pagination=cursor to page by
+    (created_at, id) cursors instead, and ?format=jsonstream to stream them.
+    Replies set ``parent``; <id>/subtree/ returns a comment with its replies
+    depth first, and ?ordering=path lists a post's threads that way.
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     pagination_class = CommentPagination
     filter_backends = [filters.OrderingFilter]
-    ordering_fields = ['created_at']
+    ordering_fields = ['created_at', 'path']
     ordering = ['-created_at']  # Show newest comments first
+    # Read by CustomUser.display_name
+    projection_extra_fields = ('user__username', 'user__first_name', 'user__last_name')
 
     def get_queryset(self):
         """
         Custom filtering for comments based on post, quote, or user.
         """
-        queryset = Comment.objects.filter(is_approved=True)  # Only show approved comments by default
+        queryset = Comment.objects.filter(is_approved=True).select_related('user')  # Only show approved comments by default
 
         post_id = self.request.query_params.get('post', None)
         if post_id:
@@ -121,21 +275,169 @@ class CommentViewSet(viewsets.ModelViewSet):
         """
         serializer.save(user=self.request.user)
 
+    def create(self, request, *args, **kwargs):
+        """
+        In the 'outbox' ingestion mode (BLOG_COMMENT_INGESTION), queue the
+        comment and answer 202 with a tracking id instead of inserting it.
+        """
+        if ingestion.ingestion_mode() != 'outbox':
+            return super().create(request, *args, **kwargs)
+        submission = CommentSubmissionSerializer(data=request.data)
+        submission.is_valid(raise_exception=True)
+        entry = ingestion.enqueue(request.user, **submission.validated_data)
+        url = reverse('comment-submission', kwargs={'tracking_id': entry.tracking_id}, request=request)
+        return Response(
+            {'tracking_id': entry.tracking_id, 'status': entry.status, 'url': url},
+            status=status.HTTP_202_ACCEPTED, headers={'Location': url},
+        )
+
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, pk=None):
+        """
+        This comment and its replies in depth-first order, read as one
+        index range over ``path`` and paged by cursor. ?max_depth= limits
+        how many levels of replies below the comment are included.
+        """
+        node = self.get_queryset().filter(pk=pk).values('path', 'depth').first()
+        if node is None:
+            raise Http404("No Comment matches the given query.")
+        queryset = self.get_queryset().filter(**threads.subtree_filter(node['path']))
+        try:
+            max_depth = max(int(request.query_params['max_depth']), 0)
+        except (KeyError, ValueError):
+            max_depth = None
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=node['depth'] + max_depth)
+        queryset = queryset.only(*projected_fields(CommentSerializer), *self.projection_extra_fields)
+
+        paginator = ThreadPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        with forbid_deferred_loading():
+            data = self.get_serializer(page, many=True).data
+        return paginator.get_paginated_response(data)
+
+    @action(
+        detail=False, methods=['get'],
+        url_path=r'submissions/(?P<tracking_id>[0-9a-f-]{36})', url_name='submission',
+    )
+    def submission(self, request, tracking_id=None):
+        """Where a queued comment stands: pending, published (with its id) or dropped."""
+        entry = get_object_or_404(CommentOutbox, tracking_id=tracking_id)
+        return Response(CommentSubmissionStatusSerializer(entry).data)
+
+
+
+class ModerationQueuePagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
+    ordering = ('created_at', 'id')  # Oldest first
+    signing_salt = 'blog.views.ModerationQueuePagination'
+
+class CommentModerationViewSet(ProjectedListMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Moderation queue for staff: comments that are neither approved nor
+    rejected, oldest first, paged by cursor.
+
+    POST {"ids": [...]} to approve/ or reject/ to decide on up to
+    moderation.MAX_BATCH comments at once.
+    """
+    serializer_class = ModerationCommentSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = ModerationQueuePagination
+    # Read by CustomUser.display_name, plus the email the serializer shows
+    projection_extra_fields = ('user__username', 'user__first_name', 'user__last_name', 'user__email')
+
+    def get_queryset(self):
+        return moderation.queue().select_related('user', 'post', 'quote')
+
+    @action(detail=False, methods=['post'])
+    def approve(self, request):
+        return self._decide(request, moderation.approve)
+
+    @action(detail=False, methods=['post'])
+    def reject(self, request):
+        return self._decide(request, moderation.reject)
 
+    def _decide(self, request, decide):
+        batch = ModerationBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        return Response({'updated': decide(batch.validated_data['ids'])})
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Category.objects.all()
+
+
+class TaxonomyPagination(PageNumberPagination):
+    page_size = 100  # Categories and tags usually fit on one page
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+class QuotePagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+    signing_salt = 'blog.views.QuotePagination'
+
+class CategoryViewSet(CachedResponseMixin, SnapshotListMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Category.objects.order_by('name', 'id')
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = TaxonomyPagination
+    cache_scopes = ('category',)
+    snapshot_scope = 'category'
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Tag.objects.all()
+class TagViewSet(CachedResponseMixin, SnapshotListMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Tag.objects.order_by('name', 'id')
     serializer_class = TagSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = TaxonomyPagination
+    cache_scopes = ('tag',)
+    snapshot_scope = 'tag'
 
-class QuoteViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Quote.objects.all().order_by('-created_at')
+class QuoteViewSet(CachedResponseMixin, ConditionalGetMixin, StreamingListMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for quotes, newest first and paged by cursor. daily/
+    returns the quote of the UTC day and random/ any one quote, both picked
+    from the dense quote index (see blog.quote_rotation) rather than by
+    sorting the table.
+    """
+    queryset = Quote.objects.all().order_by('-created_at', '-id')
     serializer_class = QuoteSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = QuotePagination
+    cache_scopes = ('quote',)
+
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        data = quote_rotation.daily(lambda quote: self.get_serializer(quote).data)
+        if data is None:
+            raise Http404("There are no quotes yet.")
+        response = Response(data)
+        response['Cache-Control'] = f'public, max-age={quote_rotation.seconds_until_midnight()}'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def random(self, request):
+        quote = quote_rotation.random_quote()
+        if quote is None:
+            raise Http404("There are no quotes yet.")
+        response = Response(self.get_serializer(quote).data)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+
+
+# Sitemaps and feeds are plain Django views, so crawlers bypass the API throttles
+
+def sitemap_index(request):
+    artifact = syndication.get_sitemap_index(request.build_absolute_uri('/'))
+    return syndication.artifact_response(request, artifact, 'application/xml')
 
+def sitemap_shard(request, section, shard):
+    artifact = syndication.get_sitemap_shard(section, shard)
+    if artifact is None:
+        raise Http404("No such sitemap.")
+    return syndication.artifact_response(request, artifact, 'application/xml')
 
+def feed(request, kind):
+    artifact = syndication.get_feed(kind, request.build_absolute_uri())
+    content_type = syndication.FEEDS[kind].content_type
+    return syndication.artifact_response(request, artifact, content_type)
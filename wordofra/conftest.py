@@ -1,11 +1,29 @@
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 
 def pytest_configure():
     """Override some Django settings for testing."""
     settings.DEBUG = False
     settings.USE_TZ = True
+    settings.BLOG_STRICT_QUERY_PROJECTION = True
+    settings.BLOG_VIEW_FLUSH_INTERVAL = 10 ** 9  # Tests flush buffered views explicitly
 
 @pytest.fixture(autouse=True)
 def disable_throttling(settings):
-    settings.REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
\ No newline at end of file
+    settings.REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Throttle history and cached data must not leak between tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.fixture(autouse=True)
+def discard_buffered_views():
+    """Views recorded by one test must not be written by another."""
+    from blog.tracking import buffer
+    buffer.drain()
+    yield
+    buffer.drain()
@@ -48,3 +48,7 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Newest-first cursor pages (see ProjectViewSet)
+            models.Index(fields=['-created_at', '-id'], name='project_created_idx'),
+        ]
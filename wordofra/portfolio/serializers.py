@@ -1,14 +1,19 @@
 from rest_framework import serializers
+from blog.responsive import ImageSetField
 from portfolio.models import Project, Service
 
 class ProjectSerializer(serializers.ModelSerializer):
+    image_set = ImageSetField(source='image')
+
     class Meta:
         model = Project
-        fields = ['id', 'title', 'slug', 'description', 'image', 'link', 'tags', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'slug', 'description', 'image', 'image_set', 'link', 'tags', 'created_at', 'updated_at']
 
 
 
 class ServiceSerializer(serializers.ModelSerializer):
+    icon_set = ImageSetField(source='icon')
+
     class Meta:
         model = Service
-        fields = ['id', 'name', 'description', 'icon', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'description', 'icon', 'icon_set', 'created_at', 'updated_at']
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blog.cache import bump_generation
+from portfolio.models import Project, Service
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def bump_service_generation(sender, raw=False, **kwargs):
+    """Service lists are served from in-process snapshots (see blog.snapshots)."""
+    if raw:
+        return
+    bump_generation('service')
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def bump_project_generation(sender, raw=False, **kwargs):
+    """Project list validators are derived from this generation (see blog.conditional)."""
+    if raw:
+        return
+    bump_generation('project')
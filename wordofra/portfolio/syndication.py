@@ -0,0 +1,5 @@
+"""Lists project pages in the sitemap (see blog/syndication.py)."""
+from blog.syndication import SitemapSection, register_section
+from portfolio.models import Project
+
+register_section(SitemapSection('projects', Project.objects.all(), '/projects/{slug}', lastmod_field='updated_at'))
@@ -0,0 +1,34 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from portfolio.models import Project, Service
+
+
+@pytest.mark.django_db
+def test_projects_page_by_cursor(db):
+    projects = [Project.objects.create(title=f'Project {i}', description='A project') for i in range(5)]
+    client = APIClient()
+
+    first = client.get(reverse('project-list'), {'page_size': 3})
+    second = client.get(first.data['next'])
+
+    assert [row['slug'] for row in first.data['results'] + second.data['results']] == [
+        project.slug for project in reversed(projects)
+    ]
+    assert second.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_service_snapshot_is_rebuilt_on_change(django_assert_num_queries):
+    service = Service.objects.create(name='Consulting', description='Advice')
+    client, url = APIClient(), reverse('service-list')
+    client.get(url)
+
+    with django_assert_num_queries(0):
+        assert client.get(url).data['results'][0]['name'] == 'Consulting'
+
+    service.name = 'Training'
+    service.save()
+    with django_assert_num_queries(1):
+        assert client.get(url).data['results'][0]['name'] == 'Training'
@@ -0,0 +1,52 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from portfolio.models import Project, Service
+from portfolio.urls import router
+
+# Maximum number of queries each endpoint may run, regardless of how many rows
+# it returns. Every route registered on the portfolio router must be listed here.
+QUERY_BUDGETS = {
+    'project-list': 2,     # ETag summary, projects
+    'project-detail': 2,   # ETag metadata, project
+    'service-list': 1,
+    'service-detail': 1,
+}
+
+SEEDED_ROWS = 8
+
+
+@pytest.fixture
+def seeded(db):
+    projects = [
+        Project.objects.create(title=f'Project {i}', description='A project', tags='Django, Python')
+        for i in range(SEEDED_ROWS)
+    ]
+    services = [
+        Service.objects.create(name=f'Service {i}', description='A service')
+        for i in range(SEEDED_ROWS)
+    ]
+    return {'project': projects[0], 'service': services[0]}
+
+
+def _route_kwargs(name, seeded):
+    basename, _, action = name.rpartition('-')
+    if action == 'detail':
+        obj = seeded[basename]
+        return {'pk': obj.slug if basename == 'project' else obj.pk}
+    return {}
+
+
+def test_every_route_declares_a_budget():
+    names = {url.name for url in router.urls if url.name and url.name != 'api-root'}
+    assert names - set(QUERY_BUDGETS) == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(QUERY_BUDGETS))
+def test_endpoint_within_query_budget(client, seeded, django_assert_max_num_queries, name):
+    url = reverse(name, kwargs=_route_kwargs(name, seeded))
+    with django_assert_max_num_queries(QUERY_BUDGETS[name]):
+        response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
@@ -1,25 +1,37 @@
-from django.shortcuts import get_object_or_404
+from blog.conditional import ConditionalGetMixin
+from blog.pagination import KeysetPagination
+from blog.snapshots import SnapshotListMixin
+from blog.streaming import StreamingListMixin
 from portfolio.models import Project, Service
 from portfolio.serializers import ProjectSerializer, ServiceSerializer
 from rest_framework import viewsets, permissions
-from rest_framework.response import Response 
+from rest_framework.pagination import PageNumberPagination
+
+class ProjectPagination(KeysetPagination):
+    page_size = 12
+    max_page_size = 50
+    signing_salt = 'portfolio.views.ProjectPagination'
 
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Project.objects.all()
-    serializer_class = ProjectSerializer
 
-    def retrieve(self, request, *args, **kwargs):
-        """
-        Fetch a single project by slug instead of ID.
-        """
-        slug = kwargs.get('pk')  # DRF defaults to 'pk'
-        project = get_object_or_404(Project, slug=slug)
+class ServicePagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
-        serializer = self.get_serializer(project)
-        return Response(serializer.data)
+
+class ProjectViewSet(ConditionalGetMixin, StreamingListMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Project.objects.order_by('-created_at', '-id')
+    serializer_class = ProjectSerializer
+    pagination_class = ProjectPagination  # Newest first, paged by cursor
+    # Fetch a single project by slug instead of ID (DRF defaults to 'pk')
+    lookup_field = 'slug'
+    lookup_url_kwarg = 'pk'
+    cache_scopes = ('project',)  # Bumped by portfolio.signals
 
 
-class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Service.objects.all()
+class ServiceViewSet(StreamingListMixin, SnapshotListMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Service.objects.order_by('name', 'id')
     serializer_class = ServiceSerializer
-    permission_classes = [permissions.AllowAny]
\ No newline at end of file
+    permission_classes = [permissions.AllowAny]
+    pagination_class = ServicePagination
+    snapshot_scope = 'service'  # Bumped by portfolio.signals
@@ -306,3 +306,44 @@ CORS_ALLOW_CREDENTIALS = True
 # EMAIL_HOST_USER = "your@email.com"
 # EMAIL_HOST_PASSWORD = "yourpassword"
 # DEFAULT_FROM_EMAIL = "noreply@yourdomain.com"
+
+
+# Cache backing API responses, invalidation counters and throttling.
+# Multi-process deployments need a shared backend (set REDIS_URL); with the
+# default per-process memory cache a write only invalidates the worker that
+# handled it.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+
+BLOG_RESPONSE_CACHE_TIMEOUT = 60 * 15  # Seconds; 0 disables the blog response cache
+# Cache generations invalidate responses and conditional-GET validators (see
+# blog/cache.py). They need a shared cache (REDIS_URL) to reach every worker.
+# They also expire after this many seconds, which bounds how long a worker on
+# the per-process default cache can miss another worker's changes.
+BLOG_GENERATION_TIMEOUT = int(os.getenv('BLOG_GENERATION_TIMEOUT', 60 * 60))
+# Raise when a list endpoint lazily loads a column its projection deferred
+# (see blog/projection.py). Enabled in the test suite.
+BLOG_STRICT_QUERY_PROJECTION = False
+
+# Seconds rendered post bodies stay cached (see blog/rendering.py)
+BLOG_RENDER_CACHE_TIMEOUT = int(os.getenv('BLOG_RENDER_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Public site that sitemap and feed entries link to
+FRONTEND_URL = os.getenv('FRONTEND_URL', 'https://www.wordofra.com')
+
+# Post views are buffered in each process and written at most this often
+# (seconds); see blog/tracking.py
+BLOG_VIEW_FLUSH_INTERVAL = int(os.getenv('BLOG_VIEW_FLUSH_INTERVAL', 60))
+
+# 'direct' inserts each new comment; 'outbox' queues it for batched inserts by
+# the flush_comment_outbox command and answers 202 (see blog/ingestion.py)
+BLOG_COMMENT_INGESTION = os.getenv('BLOG_COMMENT_INGESTION', 'direct')
+
+# Seconds a worker serves category, tag and service lists from memory before
+# reloading them, even if no change was signalled to it (see blog/snapshots.py)
+BLOG_SNAPSHOT_TIMEOUT = int(os.getenv('BLOG_SNAPSHOT_TIMEOUT', 60))
@@ -20,6 +20,7 @@ from django.contrib import admin
 from django.http import HttpResponse
 from django.urls import path, include
 from accounts.views import UserLoginView # Import custom views
+from blog.views import feed, sitemap_index, sitemap_shard
 from rest_framework_simplejwt.views import TokenRefreshView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
@@ -48,6 +49,12 @@ urlpatterns = [
     path('api/blog/', include('blog.urls')),  # Blog-related API endpoints
     path('api/portfolio/', include('portfolio.urls')),  # Portfolio-related API endpoints
 
+    # Sitemaps and feeds for crawlers and feed readers
+    path('sitemap.xml', sitemap_index, name='sitemap-index'),
+    path('sitemap-<slug:section>-<int:shard>.xml', sitemap_shard, name='sitemap-shard'),
+    path('feeds/rss.xml', feed, {'kind': 'rss'}, name='feed-rss'),
+    path('feeds/atom.xml', feed, {'kind': 'atom'}, name='feed-atom'),
+
 
 
     # API schema in JSON format